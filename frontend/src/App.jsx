@@ -34,6 +34,8 @@ import { ConnectionState } from "lib/ConnectionState"
 import { ReportRunState } from "lib/ReportRunState"
 import { SessionEventDispatcher } from "lib/SessionEventDispatcher"
 import { applyDelta } from "lib/DeltaParser"
+import { ElementHistory } from "lib/ElementHistory"
+import { DataFrameWindowLoader } from "lib/WindowedDataFrame"
 import { ForwardMsg } from "autogen/proto"
 
 import { RERUN_PROMPT_MODAL_DIALOG } from "lib/baseconsts"
@@ -93,6 +95,7 @@ class App extends PureComponent {
 
     this.userLoginResolver = new Resolver()
     this.sessionEventDispatcher = new SessionEventDispatcher()
+    this.elementHistory = new ElementHistory()
     this.statusWidgetRef = React.createRef()
 
     this.connectionManager = null
@@ -126,6 +129,10 @@ class App extends PureComponent {
       connectionStateChanged: this.handleConnectionStateChanged,
     })
 
+    DataFrameWindowLoader.current = new DataFrameWindowLoader(() =>
+      this.connectionManager.getBaseUriParts()
+    )
+
     if (isEmbeddedInIFrame()) {
       document.body.classList.add("embedded")
     }
@@ -183,7 +190,11 @@ class App extends PureComponent {
         sessionStateChanged: msg => this.handleSessionStateChanged(msg),
         sessionEvent: evtMsg => this.handleSessionEvent(evtMsg),
         newReport: newReportMsg => this.handleNewReport(newReportMsg),
-        delta: deltaMsg => this.handleDeltaMsg(deltaMsg, msgProto.metadata),
+        delta: deltaMsg =>
+          this.handleDeltaMsg(
+            this.elementHistory.processDelta(deltaMsg, msgProto.hash),
+            msgProto.metadata
+          ),
         reportFinished: status => this.handleReportFinished(status),
         uploadReportProgress: progress =>
           this.openDialog({ progress, type: DialogType.UPLOAD_PROGRESS }),
@@ -306,6 +317,8 @@ class App extends PureComponent {
    * @param newReportProto a NewReport protobuf
    */
   handleNewReport(newReportProto) {
+    this.elementHistory.onNewReport()
+
     const name = newReportProto.name
     const scriptPath = newReportProto.scriptPath
 
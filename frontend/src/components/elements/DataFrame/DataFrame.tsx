@@ -26,6 +26,12 @@ import {
   getSortedDataRowIndices,
 } from "lib/dataFrameProto"
 import { toFormattedString } from "lib/format"
+import {
+  DataFrameCellData,
+  DataFrameDimensions,
+  isWindowedDataFrame,
+  WindowedDataFrame,
+} from "lib/WindowedDataFrame"
 import { ElementDimensionSpec } from "autogen/proto"
 import "./DataFrame.scss"
 
@@ -92,6 +98,10 @@ interface CellContentsGetter {
   (columnIndex: number, rowIndex: number): CellContents
 }
 
+interface CellDataGetter {
+  (columnIndex: number, rowIndex: number): DataFrameCellData
+}
+
 interface ComputedWidths {
   elementWidth: number
   columnWidth: ({ index }: { index: number }) => number
@@ -115,6 +125,11 @@ interface CellRenderer {
 class DataFrame extends React.PureComponent<Props, State> {
   private multiGridRef = React.createRef<MultiGrid>()
 
+  /**
+   * Our element, if the server sent it in windows.
+   */
+  private windowedDataFrame?: WindowedDataFrame
+
   public constructor(props: Props) {
     super(props)
     this.state = {
@@ -137,6 +152,59 @@ class DataFrame extends React.PureComponent<Props, State> {
     this.toggleSortOrder = this.toggleSortOrder.bind(this)
   }
 
+  public componentWillUnmount(): void {
+    this.windowedDataFrame = undefined
+  }
+
+  /**
+   * Returns a WindowedDataFrame for our element if the server sent it in
+   * windows, or undefined otherwise.
+   */
+  private getWindowedDataFrame(): WindowedDataFrame | undefined {
+    const { element } = this.props
+    if (!isWindowedDataFrame(element)) {
+      this.windowedDataFrame = undefined
+      return undefined
+    }
+
+    if (
+      this.windowedDataFrame == null ||
+      this.windowedDataFrame.id !== element.getIn(["window", "id"])
+    ) {
+      const windowedDataFrame = new WindowedDataFrame(element, () => {
+        // Show the fetched window, unless our element was replaced since.
+        if (this.windowedDataFrame === windowedDataFrame) {
+          this.forceUpdate()
+        }
+      })
+      this.windowedDataFrame = windowedDataFrame
+    }
+
+    // The server sorts the rows of DataFrames sent in windows, since only it
+    // has all of them.
+    if (this.state.sortedByUser) {
+      const { sortColumn, sortDirection } = this.state
+      const { headerCols } = this.windowedDataFrame.getDimensions()
+      this.windowedDataFrame.setQuery({
+        sortColumn:
+          sortColumn < headerCols ? undefined : sortColumn - headerCols,
+        ascending: sortDirection !== SortDirection.DESCENDING,
+      })
+    }
+    return this.windowedDataFrame
+  }
+
+  /**
+   * Returns the dimensions of our whole DataFrame, even if the server sent it
+   * in windows.
+   */
+  private getDataFrameDimensions(): DataFrameDimensions {
+    const windowedDataFrame = this.getWindowedDataFrame()
+    return windowedDataFrame != null
+      ? windowedDataFrame.getDimensions()
+      : dataFrameGetDimensions(this.props.element)
+  }
+
   /**
    * Returns a function that creates a DataFrameCell component for the given cell.
    */
@@ -206,9 +274,14 @@ class DataFrame extends React.PureComponent<Props, State> {
    * Returns the row indices, in display order, for this DataFrame,
    * given its sortColumn and sortDirection.
    */
-  private getDataRowIndices(): number[] {
+  private getDataRowIndices(): number[] | undefined {
     const { element } = this.props
     const { sortColumn, sortDirection } = this.state
+    if (this.getWindowedDataFrame() != null) {
+      // The server sends the rows of DataFrames sent in windows in order.
+      return undefined
+    }
+
     const { headerCols, dataRows } = dataFrameGetDimensions(element)
 
     const sortAscending = sortDirection !== SortDirection.DESCENDING
@@ -235,7 +308,7 @@ class DataFrame extends React.PureComponent<Props, State> {
    * Returns rendering dimensions for this DataFrame
    */
   private getDimensions(cellContentsGetter: CellContentsGetter): Dimensions {
-    const { element, width, elementDimensionSpec } = this.props
+    const { width, elementDimensionSpec } = this.props
 
     const {
       headerRows,
@@ -243,7 +316,7 @@ class DataFrame extends React.PureComponent<Props, State> {
       dataRows,
       cols,
       rows,
-    } = dataFrameGetDimensions(element)
+    } = this.getDataFrameDimensions()
 
     // Rendering constants.
     const rowHeight = 25
@@ -258,9 +331,17 @@ class DataFrame extends React.PureComponent<Props, State> {
           : 300
       )
 
+    // Only measure the cells of the first window of DataFrames sent in
+    // windows, rather than fetching other windows to measure theirs.
+    const windowedDataFrame = this.getWindowedDataFrame()
+    const measuredRows =
+      windowedDataFrame != null
+        ? Math.min(rows, headerRows + windowedDataFrame.windowRows)
+        : rows
+
     let { elementWidth, columnWidth, headerWidth } = getWidths(
       cols,
-      rows,
+      measuredRows,
       headerCols,
       headerRows,
       width - border,
@@ -315,13 +396,20 @@ class DataFrame extends React.PureComponent<Props, State> {
       dataRows,
       cols,
       rows,
-    } = dataFrameGetDimensions(element)
+    } = this.getDataFrameDimensions()
 
     const sortedDataRowIndices = this.getDataRowIndices()
 
     // Get the cell renderer.
+    const windowedDataFrame = this.getWindowedDataFrame()
+    const cellDataGetter: CellDataGetter =
+      windowedDataFrame != null
+        ? (columnIndex, rowIndex) =>
+            windowedDataFrame.get(columnIndex, rowIndex)
+        : (columnIndex, rowIndex) =>
+            dataFrameGet(element, columnIndex, rowIndex)
     const cellContentsGetter = getCellContentsGetter(
-      element,
+      cellDataGetter,
       headerRows,
       headerCols,
       sortedDataRowIndices
@@ -398,13 +486,14 @@ class DataFrame extends React.PureComponent<Props, State> {
  *    contents: str - the cell's formatted display string
  * }
  *
- * element              - a DataFrame
+ * cellDataGetter       - a function like dataFrameGet(df, col, row) for a
+ *                        DataFrame
  * headerRows           - the number of frozen rows
  * headerCols           - the number of frozen columns
  * sortedDataRowIndices - (optional) an array containing an ordering for row indices
  */
 function getCellContentsGetter(
-  element: ImmutableMap<string, any>,
+  cellDataGetter: CellDataGetter,
   headerRows: number,
   headerCols: number,
   sortedDataRowIndices?: number[]
@@ -427,11 +516,7 @@ function getCellContentsGetter(
       }
     }
 
-    const { contents, styles, type } = dataFrameGet(
-      element,
-      columnIndex,
-      rowIndex
-    )
+    const { contents, styles, type } = cellDataGetter(columnIndex, rowIndex)
 
     // All table elements have class 'dataframe'.
     const classes = `dataframe ${type}`
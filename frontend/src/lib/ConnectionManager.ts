@@ -25,7 +25,7 @@ import { StaticConnection } from "./StaticConnection"
 import { WebsocketConnection } from "./WebsocketConnection"
 import { configureCredentials, getObject } from "./s3helper"
 import { logError } from "./log"
-import { getWindowBaseUriParts } from "lib/UriUtil"
+import { BaseUriParts, getWindowBaseUriParts } from "lib/UriUtil"
 
 /**
  * When the websocket connection retries this many times, we show a dialog
@@ -103,6 +103,18 @@ export class ConnectionManager {
     }
   }
 
+  /**
+   * Returns the host and port of the server we're connected to, or undefined
+   * if we're not connected to a server.
+   */
+  public getBaseUriParts(): BaseUriParts | undefined {
+    // StaticConnection does not have a server.
+    if (this.connection instanceof WebsocketConnection) {
+      return this.connection.getBaseUriParts()
+    }
+    return undefined
+  }
+
   private async connect(): Promise<void> {
     try {
       if (IS_SHARED_REPORT) {
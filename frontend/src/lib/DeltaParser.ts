@@ -15,13 +15,9 @@
  * limitations under the License.
  */
 
-import {
-  BlockPath,
-  Delta,
-  ForwardMsgMetadata,
-  NamedDataSet,
-} from "autogen/proto"
+import { BlockPath, Delta, ForwardMsgMetadata } from "autogen/proto"
 import { List, Map as ImmutableMap } from "immutable"
+import { fromArrowDataFrame } from "lib/arrowDataFrame"
 import { addRows } from "lib/dataFrameProto"
 import { dispatchOneOf, toImmutableProto } from "lib/immutableProto"
 import { MetricsManager } from "lib/MetricsManager"
@@ -64,7 +60,7 @@ export function applyDelta(
         handleNewBlockMessage(container, element)
       )
     },
-    addRows: (namedDataSet: NamedDataSet) => {
+    addRows: (namedDataSet: SimpleElement) => {
       elements[container] = elements[container].updateIn(deltaPath, element =>
         handleAddRowsMessage(container, element, namedDataSet)
       )
@@ -85,7 +81,21 @@ function handleNewElementMessage(
   // Set reportId on elements so we can clear old elements
   // when the report script is re-executed.
   // Set metadata on elements so that we can use them downstream.
-  return element.set("reportId", reportId).set("metadata", metadata)
+  return decodeArrowData(element)
+    .set("reportId", reportId)
+    .set("metadata", metadata)
+}
+
+/**
+ * Replace DataFrames sent as Arrow data with regular DataFrame protos, so
+ * that elements don't need to know how their data was sent.
+ */
+function decodeArrowData(element: SimpleElement): SimpleElement {
+  const type = element.get("type")
+  if (type === "dataFrame" || type === "table") {
+    return element.update(type, fromArrowDataFrame)
+  }
+  return element
 }
 
 function handleNewBlockMessage(
@@ -103,9 +113,9 @@ function handleNewBlockMessage(
 function handleAddRowsMessage(
   container: Container,
   element: SimpleElement,
-  namedDataSet: NamedDataSet
+  namedDataSet: SimpleElement
 ): SimpleElement {
   MetricsManager.current.incrementDeltaCounter(container)
   MetricsManager.current.incrementDeltaCounter("add rows")
-  return addRows(element, namedDataSet)
+  return addRows(element, namedDataSet.update("data", fromArrowDataFrame))
 }
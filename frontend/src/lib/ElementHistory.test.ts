@@ -0,0 +1,51 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { Delta } from "autogen/proto"
+import { ElementHistory } from "lib/ElementHistory"
+
+function createElementDelta(body: string): Delta {
+  return Delta.fromObject({ newElement: { text: { body } } })
+}
+
+function createUnchangedDelta(hash: string): Delta {
+  return Delta.fromObject({ unchangedElement: hash })
+}
+
+test("resolves unchanged elements from the previous run", () => {
+  const history = new ElementHistory()
+  const delta = createElementDelta("hello")
+  expect(history.processDelta(delta, "hash1")).toBe(delta)
+
+  history.onNewReport()
+  expect(history.processDelta(createUnchangedDelta("hash1"), "")).toBe(delta)
+
+  // Resolved elements are remembered for the next run, too.
+  history.onNewReport()
+  expect(history.processDelta(createUnchangedDelta("hash1"), "")).toBe(delta)
+})
+
+test("forgets elements that weren't in the previous run", () => {
+  const history = new ElementHistory()
+  history.processDelta(createElementDelta("hello"), "hash1")
+
+  history.onNewReport()
+  history.onNewReport()
+  expect(() =>
+    history.processDelta(createUnchangedDelta("hash1"), "")
+  ).toThrow()
+})
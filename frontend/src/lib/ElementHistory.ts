@@ -0,0 +1,69 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { Delta } from "autogen/proto"
+
+/**
+ * Remembers the elements we received in the current and the previous report
+ * run, by the hash of the ForwardMsg that delivered them.
+ *
+ * When an element is unchanged since the previous run, the server sends a
+ * Delta.unchangedElement with that hash instead of resending the element.
+ * The server only does this for elements it sent in the previous run, so
+ * this works even for deltas that we didn't apply (e.g. because the user
+ * had already stopped the report).
+ */
+export class ElementHistory {
+  private current = new Map<string, Delta>()
+  private previous = new Map<string, Delta>()
+
+  /**
+   * Start a new report run. This must be called for each newReport message.
+   */
+  public onNewReport(): void {
+    this.previous = this.current
+    this.current = new Map<string, Delta>()
+  }
+
+  /**
+   * Remember a newElement delta, or resolve an unchangedElement delta to the
+   * newElement delta it refers to.
+   *
+   * @param delta The delta we received.
+   * @param hash The hash of the ForwardMsg that contained the delta.
+   * @return The delta to apply.
+   */
+  public processDelta(delta: Delta, hash: string): Delta {
+    if (delta.type === "newElement") {
+      this.current.set(hash, delta)
+      return delta
+    }
+
+    if (delta.type === "unchangedElement") {
+      const elementHash = delta.unchangedElement
+      const element =
+        this.current.get(elementHash) || this.previous.get(elementHash)
+      if (element == null) {
+        throw new Error(`Unchanged element not found (hash=${elementHash})`)
+      }
+      this.current.set(elementHash, element)
+      return element
+    }
+
+    return delta
+  }
+}
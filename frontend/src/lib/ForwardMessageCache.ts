@@ -17,6 +17,7 @@
 
 import { ForwardMsg, ForwardMsgMetadata } from "autogen/proto"
 import { logMessage } from "lib/log"
+import { PersistentMessageStore } from "lib/PersistentMessageStore"
 import { BaseUriParts, buildHttpUri } from "lib/UriUtil"
 
 class CacheEntry {
@@ -39,6 +40,12 @@ class CacheEntry {
 export class ForwardMsgCache {
   private readonly messages = new Map<string, CacheEntry>()
 
+  /**
+   * Cached messages are also persisted here, so that they outlive
+   * the page.
+   */
+  private readonly persistentStore = new PersistentMessageStore()
+
   /**
    * A function that returns our server's base URI, or undefined
    * if we're not connected.
@@ -78,6 +85,18 @@ export class ForwardMsgCache {
     })
   }
 
+  /**
+   * Return the hashes of all the messages we have, in memory or persisted.
+   * We send these to the server when we connect, so that it can send us
+   * references to messages we already have, rather than the messages
+   * themselves. Waits for the persisted hashes to be loaded.
+   */
+  public async getCachedHashes(): Promise<string[]> {
+    const hashes = new Set(await this.persistentStore.getHashes())
+    this.messages.forEach((_, hash) => hashes.add(hash))
+    return Array.from(hashes)
+  }
+
   /**
    * Process a ForwardMsg, "de-referencing" it if it's a reference to
    * a cached message.
@@ -86,8 +105,9 @@ export class ForwardMsgCache {
    *   unmodified.
    * - If the message is instead a reference to another message, look for
    *   the referenced message in the cache, and return it.
-   * - If the referenced message isn't in our cache, request it from the
-   *   server, cache it, and return it.
+   * - If the referenced message isn't in our cache, load it from the
+   *   persistent store or, failing that, request it from the server,
+   *   cache it, and return it.
    */
   public async processMessagePayload(msg: ForwardMsg): Promise<ForwardMsg> {
     this.maybeCacheMessage(msg)
@@ -100,9 +120,14 @@ export class ForwardMsgCache {
     if (newMsg != null) {
       logMessage(`Cached ForwardMsg HIT [hash=${msg.refHash}]`)
     } else {
-      // Cache miss: fetch from the server
-      logMessage(`Cached ForwardMsg MISS [hash=${msg.refHash}]`)
-      newMsg = await this.fetchMessagePayload(msg.refHash)
+      newMsg = await this.persistentStore.get(msg.refHash)
+      if (newMsg != null) {
+        logMessage(`Persisted ForwardMsg HIT [hash=${msg.refHash}]`)
+      } else {
+        // Cache miss: fetch from the server
+        logMessage(`Cached ForwardMsg MISS [hash=${msg.refHash}]`)
+        newMsg = await this.fetchMessagePayload(msg.refHash)
+      }
       this.maybeCacheMessage(newMsg)
     }
 
@@ -177,6 +202,7 @@ export class ForwardMsgCache {
       msg.hash,
       new CacheEntry(ForwardMsg.create(msg), this.reportRunCount)
     )
+    this.persistentStore.put(msg)
   }
 
   /**
@@ -119,6 +119,15 @@ test("caches messages correctly", async () => {
   expect(unreferenced).not.toBe(msg3)
 })
 
+test("lists cached message hashes", async () => {
+  const { cache } = createCache()
+  expect(await cache.getCachedHashes()).toEqual([])
+
+  await cache.processMessagePayload(createForwardMsg("Cacheable", true))
+  await cache.processMessagePayload(createForwardMsg("Uncacheable", false))
+  expect(await cache.getCachedHashes()).toEqual(["Cacheable"])
+})
+
 test("fetches uncached messages from server", async () => {
   const msg = createForwardMsg("Cacheable", true)
   const refMsg = createRefMsg(msg)
@@ -0,0 +1,295 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { ForwardMsg } from "autogen/proto"
+import { logMessage, logWarning } from "lib/log"
+
+const DB_NAME = "streamlit"
+const DB_VERSION = 1
+
+/** Holds the messages, keyed by hash. */
+const MESSAGE_STORE = "forwardMsgs"
+
+/**
+ * Holds the size and last-used time of each message, so that they can be
+ * read without reading the messages themselves.
+ */
+const METADATA_STORE = "forwardMsgMetadata"
+
+/**
+ * Persisted messages that haven't been used for this long are deleted
+ * the next time the store is opened.
+ */
+const MAX_MESSAGE_AGE_MS = 24 * 60 * 60 * 1000
+
+/**
+ * When the persisted messages take up more space than this, the least
+ * recently used ones are deleted.
+ */
+const MAX_TOTAL_BYTES = 50 * 1024 * 1024
+
+interface StoredMessage {
+  hash: string
+  data: Uint8Array
+}
+
+interface MessageMetadata {
+  hash: string
+  size: number
+  lastUsed: number
+}
+
+/**
+ * Persists cacheable ForwardMsgs in IndexedDB, so that they survive page
+ * reloads and are shared between tabs. The hashes of the stored messages
+ * are sent to the server when we connect, so that it can send references
+ * instead of the messages themselves.
+ *
+ * If IndexedDB isn't available, the store is always empty.
+ */
+export class PersistentMessageStore {
+  private readonly db: Promise<IDBDatabase | undefined>
+
+  /** Resolved once the metadata of the stored messages has been read. */
+  private readonly loaded: Promise<void>
+
+  /** Metadata of the messages in the store, by hash. */
+  private readonly metadata = new Map<string, MessageMetadata>()
+
+  /** Total size of the messages in the store. */
+  private totalBytes = 0
+
+  public constructor() {
+    this.db = openDatabase().catch(error => {
+      logWarning(`Persistent message store unavailable: ${error}`)
+      return undefined
+    })
+    this.loaded = this.db
+      .then(db => (db != null ? this.loadMetadata(db) : undefined))
+      .catch(error => {
+        logWarning(`Failed to load persisted ForwardMsg hashes: ${error}`)
+      })
+  }
+
+  /**
+   * Return the hashes of the messages in the store, once they've been
+   * loaded from disk.
+   */
+  public async getHashes(): Promise<string[]> {
+    await this.loaded
+    return Array.from(this.metadata.keys())
+  }
+
+  /**
+   * Return the stored message with the given hash, or undefined if
+   * there's no such message.
+   */
+  public async get(hash: string): Promise<ForwardMsg | undefined> {
+    const db = await this.db
+    await this.loaded
+    if (db == null || !this.metadata.has(hash)) {
+      return undefined
+    }
+
+    const store = db
+      .transaction(MESSAGE_STORE, "readonly")
+      .objectStore(MESSAGE_STORE)
+    const stored: StoredMessage | undefined = await promisify(store.get(hash))
+    if (stored == null) {
+      this.forget(hash)
+      return undefined
+    }
+
+    this.refreshLastUsed(db, hash)
+    return ForwardMsg.decode(stored.data)
+  }
+
+  /**
+   * Store a message, or refresh its last-used time if it's already stored.
+   */
+  public async put(msg: ForwardMsg): Promise<void> {
+    const db = await this.db
+    await this.loaded
+    if (db == null) {
+      return
+    }
+
+    if (this.metadata.has(msg.hash)) {
+      this.refreshLastUsed(db, msg.hash)
+      return
+    }
+
+    const data = ForwardMsg.encode(msg).finish()
+    const metadata: MessageMetadata = {
+      hash: msg.hash,
+      size: data.length,
+      lastUsed: Date.now(),
+    }
+    const transaction = db.transaction(
+      [MESSAGE_STORE, METADATA_STORE],
+      "readwrite"
+    )
+    transaction.objectStore(MESSAGE_STORE).put({ hash: msg.hash, data })
+    transaction.objectStore(METADATA_STORE).put(metadata)
+    try {
+      await whenComplete(transaction)
+      this.remember(metadata)
+      this.evictLeastRecentlyUsed(db)
+    } catch (error) {
+      // Most likely we're over the storage quota. The message is still
+      // cached in memory.
+      logWarning(`Failed to persist ForwardMsg [hash=${msg.hash}]: ${error}`)
+    }
+  }
+
+  /**
+   * Read the metadata of the stored messages, deleting expired messages.
+   */
+  private async loadMetadata(db: IDBDatabase): Promise<void> {
+    const minLastUsed = Date.now() - MAX_MESSAGE_AGE_MS
+    const store = db
+      .transaction(METADATA_STORE, "readonly")
+      .objectStore(METADATA_STORE)
+    const records: MessageMetadata[] = await readAll(store)
+
+    const expiredHashes: string[] = []
+    records.forEach(metadata => {
+      if (metadata.lastUsed < minLastUsed) {
+        expiredHashes.push(metadata.hash)
+      } else {
+        this.remember(metadata)
+      }
+    })
+    deleteMessages(db, expiredHashes)
+    this.evictLeastRecentlyUsed(db)
+
+    logMessage(`Loaded ${this.metadata.size} persisted ForwardMsg hashes`)
+  }
+
+  /**
+   * Delete the least recently used messages until the store is no larger
+   * than MAX_TOTAL_BYTES.
+   */
+  private evictLeastRecentlyUsed(db: IDBDatabase): void {
+    if (this.totalBytes <= MAX_TOTAL_BYTES) {
+      return
+    }
+
+    const byLastUsed = Array.from(this.metadata.values()).sort(
+      (a, b) => a.lastUsed - b.lastUsed
+    )
+    const evictedHashes: string[] = []
+    for (const metadata of byLastUsed) {
+      if (this.totalBytes <= MAX_TOTAL_BYTES) {
+        break
+      }
+      evictedHashes.push(metadata.hash)
+      this.forget(metadata.hash)
+    }
+    deleteMessages(db, evictedHashes)
+    logMessage(`Evicted ${evictedHashes.length} persisted ForwardMsgs`)
+  }
+
+  private refreshLastUsed(db: IDBDatabase, hash: string): void {
+    const metadata = this.metadata.get(hash)
+    if (metadata == null) {
+      return
+    }
+
+    metadata.lastUsed = Date.now()
+    db.transaction(METADATA_STORE, "readwrite")
+      .objectStore(METADATA_STORE)
+      .put(metadata)
+  }
+
+  private remember(metadata: MessageMetadata): void {
+    this.forget(metadata.hash)
+    this.metadata.set(metadata.hash, metadata)
+    this.totalBytes += metadata.size
+  }
+
+  private forget(hash: string): void {
+    const metadata = this.metadata.get(hash)
+    if (metadata != null) {
+      this.metadata.delete(hash)
+      this.totalBytes -= metadata.size
+    }
+  }
+}
+
+function openDatabase(): Promise<IDBDatabase> {
+  if (typeof indexedDB === "undefined") {
+    return Promise.reject(new Error("IndexedDB is not supported"))
+  }
+
+  const request = indexedDB.open(DB_NAME, DB_VERSION)
+  request.onupgradeneeded = () => {
+    request.result.createObjectStore(MESSAGE_STORE, { keyPath: "hash" })
+    request.result.createObjectStore(METADATA_STORE, { keyPath: "hash" })
+  }
+  return promisify(request)
+}
+
+/**
+ * Delete the messages with the given hashes, and their metadata.
+ */
+function deleteMessages(db: IDBDatabase, hashes: string[]): void {
+  if (hashes.length === 0) {
+    return
+  }
+
+  const transaction = db.transaction(
+    [MESSAGE_STORE, METADATA_STORE],
+    "readwrite"
+  )
+  hashes.forEach(hash => {
+    transaction.objectStore(MESSAGE_STORE).delete(hash)
+    transaction.objectStore(METADATA_STORE).delete(hash)
+  })
+}
+
+function readAll<T>(store: IDBObjectStore): Promise<T[]> {
+  return new Promise((resolve, reject) => {
+    const values: T[] = []
+    const request = store.openCursor()
+    request.onsuccess = () => {
+      const cursor = request.result
+      if (cursor == null) {
+        resolve(values)
+        return
+      }
+      values.push(cursor.value)
+      cursor.continue()
+    }
+    request.onerror = () => reject(request.error)
+  })
+}
+
+function whenComplete(transaction: IDBTransaction): Promise<void> {
+  return new Promise((resolve, reject) => {
+    transaction.oncomplete = () => resolve()
+    transaction.onerror = () => reject(transaction.error)
+    transaction.onabort = () => reject(transaction.error)
+  })
+}
+
+function promisify<T>(request: IDBRequest): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  })
+}
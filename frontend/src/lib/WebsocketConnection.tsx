@@ -15,7 +15,7 @@
  * limitations under the License.
  */
 
-import { BackMsg, ForwardMsg, IBackMsg } from "autogen/proto"
+import { BackMsg, ForwardMsg, ForwardMsgChunk, IBackMsg } from "autogen/proto"
 import { ConnectionState } from "lib/ConnectionState"
 import { ForwardMsgCache } from "lib/ForwardMessageCache"
 import { logError, logMessage, logWarning } from "lib/log"
@@ -149,6 +149,12 @@ export class WebsocketConnection {
    */
   private messageQueue: MessageQueue = {}
 
+  /**
+   * Chunks of oversized messages that we haven't received in full yet,
+   * keyed by the hash of the message they belong to.
+   */
+  private pendingChunks: Map<string, Uint8Array[]> = new Map()
+
   /**
    * The current state of this object's state machine.
    */
@@ -304,10 +310,16 @@ export class WebsocketConnection {
       }
     }
 
-    this.websocket.onopen = () => {
+    this.websocket.onopen = async () => {
       if (checkWebsocket()) {
         logMessage(LOG, "WebSocket onopen")
-        this.stepFsm("CONNECTION_SUCCEEDED")
+        // Send the manifest before anything else, so the server knows
+        // which messages we have before it sends us the report. On a
+        // reload, this waits for the persisted hashes to be loaded.
+        await this.sendCacheManifest()
+        if (checkWebsocket()) {
+          this.stepFsm("CONNECTION_SUCCEEDED")
+        }
       }
     }
 
@@ -406,6 +418,17 @@ export class WebsocketConnection {
     this.cache.incrementRunCount(maxMessageAge)
   }
 
+  /**
+   * Tells the server which cacheable messages we already have, so that it
+   * can send us references to them instead of the messages themselves.
+   */
+  private async sendCacheManifest(): Promise<void> {
+    const hashes = await this.cache.getCachedHashes()
+    if (hashes.length > 0) {
+      this.sendMessage({ cacheManifest: { hashes } })
+    }
+  }
+
   private async handleMessage(data: any): Promise<void> {
     // Assign this message an index.
     const messageIndex = this.nextMessageIndex
@@ -422,10 +445,23 @@ export class WebsocketConnection {
     }
 
     const resultArray = new Uint8Array(result)
-    const msg = ForwardMsg.decode(resultArray)
-    this.messageQueue[messageIndex] = await this.cache.processMessagePayload(
-      msg
-    )
+    let msg = ForwardMsg.decode(resultArray)
+    if (msg.type === "chunk") {
+      const reassembled = this.addMessageChunk(msg)
+      if (reassembled == null) {
+        // Chunks that don't complete a message take up their slot in the
+        // queue without being dispatched.
+        this.messageQueue[messageIndex] = null
+      } else {
+        msg = reassembled
+      }
+    }
+
+    if (this.messageQueue[messageIndex] !== null) {
+      this.messageQueue[messageIndex] = await this.cache.processMessagePayload(
+        msg
+      )
+    }
 
     // Dispatch any pending messages in the queue. This may *not* result
     // in our just-decoded message being dispatched: if there are other
@@ -433,11 +469,43 @@ export class WebsocketConnection {
     // downloaded, our message won't be sent until they're done.
     while (this.lastDispatchedMessageIndex + 1 in this.messageQueue) {
       const dispatchMessageIndex = this.lastDispatchedMessageIndex + 1
-      this.args.onMessage(this.messageQueue[dispatchMessageIndex])
+      if (this.messageQueue[dispatchMessageIndex] !== null) {
+        this.args.onMessage(this.messageQueue[dispatchMessageIndex])
+      }
       delete this.messageQueue[dispatchMessageIndex]
       this.lastDispatchedMessageIndex = dispatchMessageIndex
     }
   }
+
+  /**
+   * Stores a chunk of an oversized message. Returns the reassembled message
+   * once all of its chunks have been received, and undefined before that.
+   */
+  private addMessageChunk(msg: ForwardMsg): ForwardMsg | undefined {
+    const chunk = msg.chunk as ForwardMsgChunk
+    let chunks = this.pendingChunks.get(chunk.msgHash)
+    if (chunks == null) {
+      chunks = []
+      this.pendingChunks.set(chunk.msgHash, chunks)
+    }
+    chunks[chunk.index] = chunk.data
+
+    // Chunk reads can finish out of order, so count the received chunks
+    // rather than relying on the index of the last one.
+    if (chunks.filter(data => data != null).length < chunk.numChunks) {
+      return undefined
+    }
+
+    this.pendingChunks.delete(chunk.msgHash)
+    const totalLength = chunks.reduce((total, data) => total + data.length, 0)
+    const msgArray = new Uint8Array(totalLength)
+    let offset = 0
+    for (const data of chunks) {
+      msgArray.set(data, offset)
+      offset += data.length
+    }
+    return ForwardMsg.decode(msgArray)
+  }
 }
 
 /**
@@ -0,0 +1,165 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { DataFrame } from "autogen/proto"
+import fetchMock from "fetch-mock"
+import { toImmutableProto } from "lib/immutableProto"
+import { buildHttpUri } from "lib/UriUtil"
+import {
+  DataFrameWindowLoader,
+  isWindowedDataFrame,
+  WindowedDataFrame,
+} from "lib/WindowedDataFrame"
+
+const MOCK_SERVER_URI = { host: "streamlit.mock", port: 80 }
+
+/**
+ * Create a DataFrame proto with one column "a", whose rows have the given
+ * values and a range index starting at start.
+ */
+function createDataFrame(start: number, values: number[]): DataFrame {
+  return DataFrame.fromObject({
+    data: { cols: [{ doubles: { data: values } }] },
+    index: { rangeIndex: { start, stop: start + values.length } },
+    columns: { plainIndex: { data: { strings: { data: ["a"] } } } },
+    style: { cols: [] },
+  })
+}
+
+/**
+ * Create the first window of a 4-row DataFrame sent in windows of 2 rows.
+ */
+function createFirstWindow(): DataFrame {
+  return DataFrame.fromObject({
+    ...DataFrame.toObject(createDataFrame(0, [0.5, 1.5])),
+    window: {
+      id: "mockId",
+      numRows: 4,
+      columns: { plainIndex: { data: { strings: { data: ["a"] } } } },
+      windowRows: 2,
+      windowColumns: 1,
+    },
+  })
+}
+
+function mockGetWindowResponse(
+  rowStart: number,
+  df: DataFrame,
+  query: object = {}
+): void {
+  const response = {
+    status: 200,
+    headers: { "Content-Type": "application/octet-stream" },
+    body: DataFrame.encode(df).finish(),
+  }
+  const options = {
+    query: {
+      id: "mockId",
+      row_start: String(rowStart),
+      row_end: String(rowStart + 2),
+      col_start: "0",
+      col_end: "1",
+      ...query,
+    },
+    method: "get",
+  }
+  fetchMock.mock(buildHttpUri(MOCK_SERVER_URI, "dataframe"), response, options)
+}
+
+beforeEach(() => {
+  fetchMock.config.sendAsJson = false
+  DataFrameWindowLoader.current = new DataFrameWindowLoader(
+    () => MOCK_SERVER_URI
+  )
+})
+afterEach(() => fetchMock.restore())
+
+test("detects DataFrames sent in windows", () => {
+  expect(
+    isWindowedDataFrame(toImmutableProto(DataFrame, createFirstWindow()))
+  ).toBe(true)
+  expect(
+    isWindowedDataFrame(toImmutableProto(DataFrame, createDataFrame(0, [1])))
+  ).toBe(false)
+})
+
+test("fetches windows as their cells are read", async () => {
+  mockGetWindowResponse(2, createDataFrame(2, [2.5, 3.5]))
+
+  let onWindowFetched = (): void => {}
+  const windowFetched = new Promise(resolve => (onWindowFetched = resolve))
+  const df = new WindowedDataFrame(
+    toImmutableProto(DataFrame, createFirstWindow()),
+    () => onWindowFetched()
+  )
+
+  expect(df.getDimensions()).toEqual({
+    headerRows: 1,
+    headerCols: 1,
+    dataRows: 4,
+    dataCols: 1,
+    cols: 2,
+    rows: 5,
+  })
+  expect(df.get(1, 0).contents).toBe("a")
+  expect(df.get(1, 2).contents).toBe(1.5)
+
+  // The second window isn't fetched yet.
+  expect(df.get(0, 4)).toEqual({ contents: "", styles: {}, type: "col-header" })
+  expect(df.get(1, 4)).toEqual({ contents: "", styles: {}, type: "data" })
+
+  await windowFetched
+  expect(fetchMock.calls().length).toBe(1)
+
+  expect(df.get(0, 4).contents).toBe(3)
+  expect(df.get(1, 4).contents).toBe(3.5)
+})
+
+test("fetches windows of sorted rows", async () => {
+  // The rows with values 3.5 and 2.5, out of the 3 rows that match "5".
+  const sortedWindow = DataFrame.fromObject({
+    ...DataFrame.toObject(createDataFrame(0, [3.5, 2.5])),
+    index: { int_64Index: { data: { data: [3, 2] } } },
+    window: { numRows: 3 },
+  })
+  mockGetWindowResponse(0, sortedWindow, {
+    sort_column: "0",
+    ascending: "0",
+    filter: "5",
+  })
+
+  let onWindowFetched = (): void => {}
+  const windowFetched = new Promise(resolve => (onWindowFetched = resolve))
+  const df = new WindowedDataFrame(
+    toImmutableProto(DataFrame, createFirstWindow()),
+    () => onWindowFetched()
+  )
+
+  // Setting the same query again doesn't drop the fetched windows.
+  df.setQuery({ ascending: true })
+  expect(df.get(1, 1).contents).toBe(0.5)
+
+  df.setQuery({ sortColumn: 0, ascending: false, filter: "5" })
+  expect(df.get(1, 1)).toEqual({ contents: "", styles: {}, type: "data" })
+
+  await windowFetched
+  expect(fetchMock.calls().length).toBe(1)
+
+  expect(df.getDimensions().dataRows).toBe(3)
+  expect(df.get(0, 1).contents).toBe(3)
+  expect(df.get(1, 1).contents).toBe(3.5)
+})
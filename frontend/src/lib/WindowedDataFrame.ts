@@ -0,0 +1,339 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { Map as ImmutableMap } from "immutable"
+import { DataFrame } from "autogen/proto"
+import {
+  dataFrameGet,
+  dataFrameGetDimensions,
+  indexGet,
+  indexGetLevelsAndLength,
+} from "lib/dataFrameProto"
+import { toImmutableProto } from "lib/immutableProto"
+import { logError } from "lib/log"
+import { BaseUriParts, buildHttpUri } from "lib/UriUtil"
+
+/**
+ * Maximum number of fetched windows that each WindowedDataFrame keeps.
+ */
+const MAX_CACHED_WINDOWS = 100
+
+type ImmutableDataFrame = ImmutableMap<string, any>
+
+export interface DataFrameDimensions {
+  headerRows: number
+  headerCols: number
+  dataRows: number
+  dataCols: number
+  cols: number
+  rows: number
+}
+
+export interface DataFrameCellData {
+  contents: any
+  styles: object
+  type: string
+}
+
+/**
+ * Which rows of a DataFrame the server puts in its windows, and in what
+ * order. The server sorts and filters the whole DataFrame.
+ */
+export interface DataFrameQuery {
+  // Data column to sort the rows by. If unset, the rows keep their order.
+  sortColumn?: number
+  // If false and sortColumn is unset, the rows are in reverse order.
+  ascending: boolean
+  // If set, only the rows with a cell containing this string, ignoring
+  // case, are shown.
+  filter?: string
+}
+
+const DEFAULT_QUERY: DataFrameQuery = { ascending: true }
+
+function queriesEqual(a: DataFrameQuery, b: DataFrameQuery): boolean {
+  return (
+    a.sortColumn === b.sortColumn &&
+    a.ascending === b.ascending &&
+    (a.filter || "") === (b.filter || "")
+  )
+}
+
+/**
+ * Fetches windows of DataFrames from the server's /dataframe endpoint.
+ */
+export class DataFrameWindowLoader {
+  private readonly getServerUri: () => BaseUriParts | undefined
+
+  private static singleton?: DataFrameWindowLoader
+
+  public static get current(): DataFrameWindowLoader {
+    if (!DataFrameWindowLoader.singleton) {
+      throw new Error(
+        "Tried to use DataFrameWindowLoader before it was initialized"
+      )
+    }
+    return DataFrameWindowLoader.singleton
+  }
+
+  public static set current(loader: DataFrameWindowLoader) {
+    DataFrameWindowLoader.singleton = loader
+  }
+
+  public constructor(getServerUri: () => BaseUriParts | undefined) {
+    this.getServerUri = getServerUri
+  }
+
+  /**
+   * Fetches the rows [rowStart, rowEnd) and columns [colStart, colEnd) of the
+   * DataFrame with the given ID, as an immutable DataFrame proto. The rows
+   * are those that the query selects, in its order.
+   */
+  public async fetchWindow(
+    id: string,
+    rowStart: number,
+    rowEnd: number,
+    colStart: number,
+    colEnd: number,
+    query: DataFrameQuery = DEFAULT_QUERY
+  ): Promise<ImmutableDataFrame> {
+    const serverURI = this.getServerUri()
+    if (serverURI === undefined) {
+      throw new Error(
+        "Cannot fetch DataFrame window: not connected to a server"
+      )
+    }
+
+    let path =
+      `dataframe?id=${id}&row_start=${rowStart}&row_end=${rowEnd}` +
+      `&col_start=${colStart}&col_end=${colEnd}`
+    if (query.sortColumn != null) {
+      path += `&sort_column=${query.sortColumn}`
+    }
+    if (!query.ascending) {
+      path += "&ascending=0"
+    }
+    if (query.filter) {
+      path += `&filter=${encodeURIComponent(query.filter)}`
+    }
+
+    const url = buildHttpUri(serverURI, path)
+    const rsp = await fetch(url)
+    if (!rsp.ok) {
+      throw new Error(
+        `Failed to fetch DataFrame window (id=${id}): ${rsp.statusText}`
+      )
+    }
+
+    const data = await rsp.arrayBuffer()
+    return toImmutableProto(DataFrame, DataFrame.decode(new Uint8Array(data)))
+  }
+}
+
+/**
+ * Returns true if the given DataFrame proto only holds the first window of
+ * a DataFrame, whose other windows are fetched from the server.
+ */
+export function isWindowedDataFrame(df: ImmutableDataFrame): boolean {
+  return Boolean(df.getIn(["window", "id"]))
+}
+
+/**
+ * A DataFrame that the server sent in windows. Its cells are read like those
+ * of a whole DataFrame, but cells in windows that weren't fetched yet are
+ * empty, and reading them starts fetching their window.
+ */
+export class WindowedDataFrame {
+  private readonly firstWindow: ImmutableDataFrame
+
+  private readonly onWindowFetched: () => void
+
+  // Map: "row,column" window position -> fetched window, in fetch order.
+  private readonly windows = new Map<string, ImmutableDataFrame>()
+
+  // Positions of the windows that are being fetched, or failed to be.
+  private readonly requestedWindows = new Set<string>()
+
+  private query: DataFrameQuery = DEFAULT_QUERY
+
+  // Number of rows that the query selects.
+  private numRows: number
+
+  /**
+   * @param firstWindow the DataFrame proto sent by the server.
+   * @param onWindowFetched called whenever a window has been fetched, so
+   * that the DataFrame can be displayed again.
+   */
+  public constructor(
+    firstWindow: ImmutableDataFrame,
+    onWindowFetched: () => void
+  ) {
+    this.firstWindow = firstWindow
+    this.onWindowFetched = onWindowFetched
+    this.numRows = firstWindow.getIn(["window", "numRows"])
+  }
+
+  public get id(): string {
+    return this.firstWindow.getIn(["window", "id"])
+  }
+
+  /**
+   * The number of rows in each window.
+   */
+  public get windowRows(): number {
+    return this.firstWindow.getIn(["window", "windowRows"])
+  }
+
+  /**
+   * Sets which rows are shown, and in what order. Windows that were fetched
+   * for the previous query are dropped.
+   */
+  public setQuery(query: DataFrameQuery): void {
+    if (queriesEqual(query, this.query)) {
+      return
+    }
+    this.query = query
+    this.windows.clear()
+    this.requestedWindows.clear()
+  }
+
+  /**
+   * Returns the dimensions of the whole DataFrame, like
+   * dataFrameGetDimensions. Its data rows are those that the query selects.
+   */
+  public getDimensions(): DataFrameDimensions {
+    const { headerCols } = dataFrameGetDimensions(this.firstWindow)
+    const [headerRows, dataCols] = indexGetLevelsAndLength(this.columns)
+    const dataRows = this.numRows
+    return {
+      headerRows,
+      headerCols,
+      dataRows,
+      dataCols,
+      cols: headerCols + dataCols,
+      rows: headerRows + dataRows,
+    }
+  }
+
+  /**
+   * Returns the data of a cell of the whole DataFrame, like dataFrameGet.
+   */
+  public get(col: number, row: number): DataFrameCellData {
+    const { headerRows, headerCols } = this.getDimensions()
+    if (row < headerRows) {
+      if (col < headerCols) {
+        return { contents: "", styles: {}, type: "corner" }
+      }
+      return {
+        contents: indexGet(this.columns, row, col - headerCols),
+        styles: {},
+        type: "row-header",
+      }
+    }
+
+    const { windowRows, windowCols } = this
+    const dataRow = row - headerRows
+    const dataCol = Math.max(col - headerCols, 0)
+    const windowRow = Math.floor(dataRow / windowRows)
+    const windowCol = Math.floor(dataCol / windowCols)
+
+    const windowDf = this.getWindow(windowRow, windowCol)
+    if (windowDf == null) {
+      return {
+        contents: "",
+        styles: {},
+        type: col < headerCols ? "col-header" : "data",
+      }
+    }
+
+    return dataFrameGet(
+      windowDf,
+      col < headerCols ? col : col - windowCol * windowCols,
+      row - windowRow * windowRows
+    )
+  }
+
+  private get windowCols(): number {
+    return this.firstWindow.getIn(["window", "windowColumns"])
+  }
+
+  /**
+   * The column names of the whole DataFrame.
+   */
+  private get columns(): ImmutableDataFrame {
+    return this.firstWindow.getIn(["window", "columns"])
+  }
+
+  /**
+   * Returns the window at the given position, or undefined if it wasn't
+   * fetched yet, in which case it starts fetching it.
+   */
+  private getWindow(
+    windowRow: number,
+    windowCol: number
+  ): ImmutableDataFrame | undefined {
+    if (
+      windowRow === 0 &&
+      windowCol === 0 &&
+      queriesEqual(this.query, DEFAULT_QUERY)
+    ) {
+      return this.firstWindow
+    }
+
+    const key = `${windowRow},${windowCol}`
+    const windowDf = this.windows.get(key)
+    if (windowDf != null || this.requestedWindows.has(key)) {
+      return windowDf
+    }
+
+    this.requestedWindows.add(key)
+    const { windowRows, windowCols, query } = this
+    DataFrameWindowLoader.current
+      .fetchWindow(
+        this.id,
+        windowRow * windowRows,
+        (windowRow + 1) * windowRows,
+        windowCol * windowCols,
+        (windowCol + 1) * windowCols,
+        query
+      )
+      .then(
+        fetchedWindow => {
+          // Drop windows of a previous query.
+          if (this.query !== query) {
+            return
+          }
+          this.numRows = fetchedWindow.getIn(["window", "numRows"])
+          this.addWindow(key, fetchedWindow)
+          this.onWindowFetched()
+        },
+        err => logError(err.message)
+      )
+    return undefined
+  }
+
+  private addWindow(key: string, windowDf: ImmutableDataFrame): void {
+    this.requestedWindows.delete(key)
+    this.windows.set(key, windowDf)
+    if (this.windows.size > MAX_CACHED_WINDOWS) {
+      // Drop the window that was fetched first. It's fetched again if it's
+      // scrolled back into view.
+      const oldestKey = this.windows.keys().next().value
+      this.windows.delete(oldestKey)
+    }
+  }
+}
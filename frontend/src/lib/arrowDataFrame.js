@@ -0,0 +1,372 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Decodes DataFrame protos whose data was sent as an Arrow IPC stream (see
+ * arrow_data_frame.py) into regular DataFrame protos.
+ *
+ * This only reads the subset of the Arrow format that arrow_data_frame.py
+ * writes: float64, int64, utf8 and int32-indexed utf8 dictionary columns,
+ * without nulls.
+ */
+
+import { fromJS } from "immutable"
+
+// Arrow's MessageHeader union.
+const HEADER_SCHEMA = 1
+const HEADER_DICTIONARY_BATCH = 2
+const HEADER_RECORD_BATCH = 3
+
+// Arrow's Type union.
+const TYPE_INT = 2
+const TYPE_FLOATING_POINT = 3
+const TYPE_UTF8 = 5
+
+const CONTINUATION_MARKER = -1
+const INDEX_COLUMN = "index"
+const UTF8_DECODER = new TextDecoder("utf-8")
+
+/**
+ * If the given immutable DataFrame proto holds Arrow data, returns the
+ * equivalent DataFrame proto without it. Otherwise, returns it unchanged.
+ */
+export function fromArrowDataFrame(df) {
+  const arrowData = df.get("arrowData")
+  if (!arrowData || arrowData.length === 0) {
+    return df
+  }
+
+  const { columns, metadata } = readStream(arrowData)
+  const index = metadata.index
+
+  return fromJS({
+    data: {
+      cols: metadata.types.map((type, i) =>
+        anyArray(type, columns[`col_${i}`])
+      ),
+    },
+    index: toIndex(index, columns[INDEX_COLUMN]),
+    columns: {
+      type: "plainIndex",
+      plainIndex: { data: anyArray("strings", metadata.columns) },
+    },
+    style: { cols: [] },
+  }).set("arrowData", new Uint8Array(0))
+}
+
+function anyArray(type, data) {
+  return { type, [type]: { data } }
+}
+
+function toIndex(index, data) {
+  switch (index.type) {
+    case "range_index":
+      return {
+        type: "rangeIndex",
+        rangeIndex: { start: index.start, stop: index.stop },
+      }
+    case "plain_index":
+      return {
+        type: "plainIndex",
+        plainIndex: { data: anyArray(index.data_type, data) },
+      }
+    case "int_64_index":
+      return { type: "int_64Index", int_64Index: { data: { data } } }
+    case "float_64_index":
+      return { type: "float_64Index", float_64Index: { data: { data } } }
+    case "datetime_index":
+      return { type: "datetimeIndex", datetimeIndex: { data: { data } } }
+    case "timedelta_index":
+      return { type: "timedeltaIndex", timedeltaIndex: { data: { data } } }
+    default:
+      throw new Error(`Cannot handle index "${index.type}".`)
+  }
+}
+
+/**
+ * Reads an Arrow IPC stream. Returns {columns, metadata}, where columns maps
+ * column names to arrays of values, and metadata is the schema's parsed
+ * "streamlit" metadata.
+ */
+function readStream(bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength)
+  let fields = null
+  let metadata = null
+  const dictionaries = {}
+  const columns = {}
+  let pos = 0
+
+  while (pos + 4 <= bytes.length) {
+    let metadataLength = view.getInt32(pos, true)
+    pos += 4
+    if (metadataLength === CONTINUATION_MARKER) {
+      metadataLength = view.getInt32(pos, true)
+      pos += 4
+    }
+    if (metadataLength === 0) {
+      break
+    }
+
+    const message = new FlatBuffer(bytes, view, pos)
+    const root = message.root()
+    const bodyStart = pos + metadataLength
+    pos = bodyStart + message.long(root, 3)
+
+    const headerType = message.uint8(root, 1)
+    const header = message.table(root, 2)
+
+    if (headerType === HEADER_SCHEMA) {
+      fields = message
+        .vector(header, 1)
+        .map(field => readField(message, field))
+      metadata = JSON.parse(readMetadata(message, header).streamlit)
+      fields.forEach(field => {
+        columns[field.name] = []
+      })
+    } else if (headerType === HEADER_DICTIONARY_BATCH) {
+      const id = message.long(header, 0)
+      const batch = message.table(header, 1)
+      const utf8Field = { type: TYPE_UTF8 }
+      const [values] = readRecordBatch(
+        message,
+        batch,
+        [utf8Field],
+        bytes,
+        view,
+        bodyStart
+      )
+      dictionaries[id] = values
+    } else if (headerType === HEADER_RECORD_BATCH) {
+      const batchColumns = readRecordBatch(
+        message,
+        header,
+        fields,
+        bytes,
+        view,
+        bodyStart
+      )
+      fields.forEach((field, i) => {
+        let values = batchColumns[i]
+        if (field.dictionaryId != null) {
+          const dictionary = dictionaries[field.dictionaryId]
+          values = values.map(code => dictionary[code])
+        }
+        appendAll(columns[field.name], values)
+      })
+    }
+  }
+
+  return { columns, metadata }
+}
+
+function readField(message, field) {
+  const dictionary = message.table(field, 4)
+  return {
+    name: message.string(field, 0),
+    type: message.uint8(field, 2),
+    // Dictionary-encoded columns are int32 codes in record batches.
+    dictionaryId: dictionary == null ? null : message.long(dictionary, 0),
+  }
+}
+
+function readMetadata(message, schema) {
+  const metadata = {}
+  message.vector(schema, 2).forEach(keyValue => {
+    metadata[message.string(keyValue, 0)] = message.string(keyValue, 1)
+  })
+  return metadata
+}
+
+/**
+ * Returns an array of column values for each field in the record batch.
+ */
+function readRecordBatch(message, batch, fields, bytes, view, bodyStart) {
+  const length = message.long(batch, 0)
+  const buffers = message.structVector(batch, 2, 16).map(offset => ({
+    start: bodyStart + readInt64(view, offset),
+    length: readInt64(view, offset + 8),
+  }))
+
+  // Each field has a validity bitmap buffer, which is ignored as there are
+  // no nulls, then its data buffers.
+  let bufferIndex = 0
+  return fields.map(field => {
+    bufferIndex += 1
+    if (field.dictionaryId != null) {
+      bufferIndex += 1
+      return readInt32s(view, buffers[bufferIndex - 1], length)
+    }
+
+    switch (field.type) {
+      case TYPE_FLOATING_POINT:
+        bufferIndex += 1
+        return readFloat64s(bytes, buffers[bufferIndex - 1], length)
+      case TYPE_INT:
+        bufferIndex += 1
+        return readInt64s(view, buffers[bufferIndex - 1], length)
+      case TYPE_UTF8:
+        bufferIndex += 2
+        return readStrings(
+          bytes,
+          view,
+          buffers[bufferIndex - 2],
+          buffers[bufferIndex - 1],
+          length
+        )
+      default:
+        throw new Error(`Cannot handle Arrow type ${field.type}.`)
+    }
+  })
+}
+
+function readFloat64s(bytes, buffer, length) {
+  // Copy the buffer, since typed arrays need aligned offsets.
+  const start = buffer.start
+  const copy = bytes.slice(start, start + length * 8)
+  return Array.from(new Float64Array(copy.buffer, copy.byteOffset, length))
+}
+
+function readInt64s(view, buffer, length) {
+  const values = new Array(length)
+  for (let i = 0; i < length; i += 1) {
+    values[i] = readInt64(view, buffer.start + i * 8)
+  }
+  return values
+}
+
+function readInt32s(view, buffer, length) {
+  const values = new Array(length)
+  for (let i = 0; i < length; i += 1) {
+    values[i] = view.getInt32(buffer.start + i * 4, true)
+  }
+  return values
+}
+
+function readStrings(bytes, view, offsetsBuffer, dataBuffer, length) {
+  const values = new Array(length)
+  for (let i = 0; i < length; i += 1) {
+    const start = view.getInt32(offsetsBuffer.start + i * 4, true)
+    const end = view.getInt32(offsetsBuffer.start + (i + 1) * 4, true)
+    values[i] = UTF8_DECODER.decode(
+      bytes.subarray(dataBuffer.start + start, dataBuffer.start + end)
+    )
+  }
+  return values
+}
+
+/**
+ * Reads a little-endian int64. Values beyond 2^53 lose precision, like
+ * int64s in regular DataFrame protos.
+ */
+function readInt64(view, offset) {
+  const low = view.getUint32(offset, true)
+  const high = view.getInt32(offset + 4, true)
+  return high * 4294967296 + low
+}
+
+function appendAll(target, values) {
+  for (let i = 0; i < values.length; i += 1) {
+    target.push(values[i])
+  }
+}
+
+/**
+ * Minimal reader for the flatbuffer tables that hold Arrow messages. Fields
+ * are referred to by their index in the table's schema.
+ */
+class FlatBuffer {
+  constructor(bytes, view, start) {
+    this.bytes = bytes
+    this.view = view
+    this.start = start
+  }
+
+  root() {
+    return this.start + this.view.getUint32(this.start, true)
+  }
+
+  // Returns the position of a table's field, or 0 if it's not set.
+  fieldPos(table, field) {
+    const vtable = table - this.view.getInt32(table, true)
+    const vtableSize = this.view.getUint16(vtable, true)
+    const entry = 4 + field * 2
+    if (entry >= vtableSize) {
+      return 0
+    }
+    const offset = this.view.getUint16(vtable + entry, true)
+    return offset === 0 ? 0 : table + offset
+  }
+
+  uint8(table, field) {
+    const pos = this.fieldPos(table, field)
+    return pos === 0 ? 0 : this.view.getUint8(pos)
+  }
+
+  long(table, field) {
+    const pos = this.fieldPos(table, field)
+    return pos === 0 ? 0 : readInt64(this.view, pos)
+  }
+
+  deref(pos) {
+    return pos + this.view.getUint32(pos, true)
+  }
+
+  table(table, field) {
+    const pos = this.fieldPos(table, field)
+    return pos === 0 ? null : this.deref(pos)
+  }
+
+  string(table, field) {
+    const pos = this.fieldPos(table, field)
+    if (pos === 0) {
+      return null
+    }
+    const str = this.deref(pos)
+    const length = this.view.getUint32(str, true)
+    return UTF8_DECODER.decode(this.bytes.subarray(str + 4, str + 4 + length))
+  }
+
+  // Returns the positions of the tables in a vector of tables.
+  vector(table, field) {
+    const pos = this.fieldPos(table, field)
+    if (pos === 0) {
+      return []
+    }
+    const vec = this.deref(pos)
+    const length = this.view.getUint32(vec, true)
+    const tables = new Array(length)
+    for (let i = 0; i < length; i += 1) {
+      tables[i] = this.deref(vec + 4 + i * 4)
+    }
+    return tables
+  }
+
+  // Returns the positions of the structs in a vector of structs.
+  structVector(table, field, structSize) {
+    const pos = this.fieldPos(table, field)
+    if (pos === 0) {
+      return []
+    }
+    const vec = this.deref(pos)
+    const length = this.view.getUint32(vec, true)
+    const structs = new Array(length)
+    for (let i = 0; i < length; i += 1) {
+      structs[i] = vec + 4 + i * structSize
+    }
+    return structs
+  }
+}
@@ -0,0 +1,100 @@
+/**
+ * @license
+ * Copyright 2018-2019 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { fromJS } from "immutable"
+import { fromArrowDataFrame } from "./arrowDataFrame"
+
+// Written by arrow_data_frame.marshall for this DataFrame:
+//
+// pd.DataFrame(
+//     {
+//         "f": [1.5, np.nan, -2.25],
+//         "i": [1, -2, 2 ** 40],
+//         "s": ["x", "h\u00e9llo", ""],
+//         "c": pd.Categorical(["u", None, "u"]),
+//         "t": pd.to_datetime(
+//             ["2019-01-01", "2019-01-02", "2019-01-03"]
+//         ).tz_localize("UTC"),
+//     },
+//     index=["a", "b", "c"],
+// )
+const ARROW_DATA = [
+  "/////4ACAAAQAAAAAAAKAA4ABgAFAAgACgAAAAABAwAQAAAAAAAKAAwAAAAEAAgACgAAANwA",
+  "AAAEAAAAAQAAAAwAAAAIAAwABAAIAAgAAAAIAAAAFAAAAAkAAABzdHJlYW1saXQAAACjAAAA",
+  "eyJjb2x1bW5zIjogWyJmIiwgImkiLCAicyIsICJjIiwgInQiXSwgInR5cGVzIjogWyJkb3Vi",
+  "bGVzIiwgImludDY0cyIsICJzdHJpbmdzIiwgInN0cmluZ3MiLCAiZGF0ZXRpbWVzIl0sICJp",
+  "bmRleCI6IHsidHlwZSI6ICJwbGFpbl9pbmRleCIsICJkYXRhX3R5cGUiOiAic3RyaW5ncyJ9",
+  "fQAGAAAAPAEAAPAAAADAAAAAdAAAADAAAAAEAAAA7P7//wAAAQUUAAAADAAAAAQAAAAAAAAA",
+  "UP///wUAAABpbmRleAAAABT///8AAAECHAAAAAwAAAAEAAAAAAAAAEz///8AAAABQAAAAAUA",
+  "AABjb2xfNAAAABAAGAAIAAYABwAMABAAFAAQAAAAAAABBTQAAAAsAAAAEAAAACAAAAAIAAgA",
+  "AAAEAAgAAAAEAAAAnP///wAAAAEgAAAAAAAAANj///8FAAAAY29sXzMAAACc////AAABBRgA",
+  "AAAQAAAABAAAAAAAAAAEAAQABAAAAAUAAABjb2xfMgAAAMj///8AAAECJAAAABQAAAAEAAAA",
+  "AAAAAAgADAAIAAcACAAAAAAAAAFAAAAABQAAAGNvbF8xAAAAEAAUAAgABgAHAAwAAAAQABAA",
+  "AAAAAAEDIAAAABQAAAAEAAAAAAAAAAAABgAIAAYABgAAAAAAAgAFAAAAY29sXzAAAAAAAAAA",
+  "/////6gAAAAUAAAAAAAAAAwAFAAGAAUACAAMAAwAAAAAAgMAFAAAABgAAAAAAAAACAAKAAAA",
+  "BAAIAAAAEAAAAAAACgAYAAwABAAIAAoAAABMAAAAEAAAAAIAAAAAAAAAAAAAAAMAAAAAAAAA",
+  "AAAAAAAAAAAAAAAAAAAAAAAAAAAQAAAAAAAAABAAAAAAAAAACAAAAAAAAAAAAAAAAQAAAAIA",
+  "AAAAAAAAAAAAAAAAAAAAAAAAAQAAAAQAAAAAAAAAdW5hbgAAAAD/////mAEAABQAAAAAAAAA",
+  "DAAWAAYABQAIAAwADAAAAAADAwAYAAAAiAAAAAAAAAAAAAoAGAAMAAQACAAKAAAA/AAAABAA",
+  "AAADAAAAAAAAAAAAAAAOAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAGAAAAAAAAAAYAAAA",
+  "AAAAAAAAAAAAAAAAGAAAAAAAAAAYAAAAAAAAADAAAAAAAAAAAAAAAAAAAAAwAAAAAAAAABAA",
+  "AAAAAAAAQAAAAAAAAAAIAAAAAAAAAEgAAAAAAAAAAAAAAAAAAABIAAAAAAAAABAAAAAAAAAA",
+  "WAAAAAAAAAAAAAAAAAAAAFgAAAAAAAAAGAAAAAAAAABwAAAAAAAAAAAAAAAAAAAAcAAAAAAA",
+  "AAAQAAAAAAAAAIAAAAAAAAAACAAAAAAAAAAAAAAABgAAAAMAAAAAAAAAAAAAAAAAAAADAAAA",
+  "AAAAAAAAAAAAAAAAAwAAAAAAAAAAAAAAAAAAAAMAAAAAAAAAAAAAAAAAAAADAAAAAAAAAAAA",
+  "AAAAAAAAAwAAAAAAAAAAAAAAAAAAAAAAAAAAAPg/AAAAAAAA+H8AAAAAAAACwAEAAAAAAAAA",
+  "/v////////8AAAAAAAEAAAAAAAABAAAABwAAAAcAAAB4aMOpbGxvAAAAAAABAAAAAAAAAAAA",
+  "AAAAAOeLYpB1FQAANh333nUVAACFrostdhUAAAAAAQAAAAIAAAADAAAAYWJjAAAAAAD/////",
+  "AAAAAA==",
+].join("")
+
+function toBytes(base64) {
+  return new Uint8Array(Buffer.from(base64, "base64"))
+}
+
+test("fromArrowDataFrame leaves DataFrames without Arrow data alone", () => {
+  const df = fromJS({ data: { cols: [] } }).set("arrowData", new Uint8Array(0))
+  expect(fromArrowDataFrame(df)).toBe(df)
+})
+
+test("fromArrowDataFrame decodes Arrow data", () => {
+  const df = fromJS({}).set("arrowData", toBytes(ARROW_DATA))
+  const decoded = fromArrowDataFrame(df)
+
+  expect(decoded.get("arrowData").length).toBe(0)
+  expect(decoded.getIn(["data", "cols"]).toJS()).toEqual([
+    { type: "doubles", doubles: { data: [1.5, NaN, -2.25] } },
+    { type: "int64s", int64s: { data: [1, -2, 1099511627776] } },
+    { type: "strings", strings: { data: ["x", "h\u00e9llo", ""] } },
+    { type: "strings", strings: { data: ["u", "nan", "u"] } },
+    {
+      type: "datetimes",
+      datetimes: {
+        data: [1546300800000000000, 1546387200000000000, 1546473600000000000],
+      },
+    },
+  ])
+  expect(decoded.get("index").toJS()).toEqual({
+    type: "plainIndex",
+    plainIndex: {
+      data: { type: "strings", strings: { data: ["a", "b", "c"] } },
+    },
+  })
+  expect(
+    decoded.getIn(["columns", "plainIndex", "data", "strings", "data"]).toJS()
+  ).toEqual(["f", "i", "s", "c", "t"])
+})
@@ -21,7 +21,7 @@
 
 import camelcase from "camelcase"
 import { dispatchOneOf, mapOneOf, updateOneOf } from "./immutableProto"
-import { fromJS } from "immutable"
+import { fromJS, List, Map as ImmutableMap } from "immutable"
 import { format } from "./format"
 
 // Must match dict_builder.py
@@ -32,6 +32,9 @@ const STRING_COLLATOR = new Intl.Collator("en", {
   sensitivity: "base",
 })
 
+// Significant digits that single precision floats are shown with.
+const FLOAT_DIGITS = 7
+
 function compareValues(a, b) {
   if (a < b) {
     return -1
@@ -64,7 +67,9 @@ export function getSortedDataRowIndices(df, sortColumnIdx, sortAscending) {
   const col = table.getIn(["cols", sortColumnIdx])
   const cmp = mapOneOf(col, "type", {
     strings: compareStrings,
+    stringDictionary: compareStrings,
     doubles: compareValues,
+    floats: compareValues,
     int64s: compareValues,
     datetimes: compareValues,
     timedeltas: compareValues,
@@ -239,14 +244,7 @@ export function dataFrameGet(df, col, row) {
  * or undefined if there's no such value.
  */
 export function tableStyleGetDisplayValue(tableStyle, columnIndex, rowIndex) {
-  if (tableStyle == null) {
-    return undefined
-  }
-
-  const cellStyle = tableStyle.getIn(
-    ["cols", columnIndex, "styles", rowIndex],
-    undefined
-  )
+  const cellStyle = tableStyleGetCellStyle(tableStyle, columnIndex, rowIndex)
   if (cellStyle == null) {
     return undefined
   }
@@ -261,14 +259,12 @@ export function tableStyleGetDisplayValue(tableStyle, columnIndex, rowIndex) {
  * JSX element's {style} attribute, or undefined if table/cell has no style.
  */
 export function tableStyleGetCSS(tableStyle, columnIndex, rowIndex) {
-  if (tableStyle == null) {
+  const cellStyle = tableStyleGetCellStyle(tableStyle, columnIndex, rowIndex)
+  if (cellStyle == null) {
     return undefined
   }
 
-  const cssStyles = tableStyle.getIn(
-    ["cols", columnIndex, "styles", rowIndex, "css"],
-    undefined
-  )
+  const cssStyles = cellStyle.get("css")
   if (cssStyles == null) {
     return undefined
   }
@@ -283,6 +279,39 @@ export function tableStyleGetCSS(tableStyle, columnIndex, rowIndex) {
   return styles
 }
 
+/**
+ * Returns the CellStyle of the given element in a TableStyle, or undefined
+ * if there's no such style.
+ */
+function tableStyleGetCellStyle(tableStyle, columnIndex, rowIndex) {
+  if (tableStyle == null) {
+    return undefined
+  }
+
+  if (!isDictionaryEncoded(tableStyle)) {
+    return tableStyle.getIn(["cols", columnIndex, "styles", rowIndex])
+  }
+
+  const styleIndex = tableStyle.getIn([
+    "styleIndices",
+    columnIndex,
+    "data",
+    rowIndex,
+  ])
+  return styleIndex == null
+    ? undefined
+    : tableStyle.getIn(["uniqueStyles", styleIndex])
+}
+
+/**
+ * Returns true if the cells of a TableStyle refer to its uniqueStyles,
+ * rather than each having a CellStyle in its cols.
+ */
+function isDictionaryEncoded(tableStyle) {
+  const styleIndices = tableStyle.get("styleIndices")
+  return styleIndices != null && styleIndices.size > 0
+}
+
 /**
  * Returns the given element from the table, formatted for display.
  */
@@ -294,7 +323,7 @@ export function tableGet(table, columnIndex, rowIndex) {
  * Returns the raw data of the given element from the table.
  */
 export function tableData(table, columnIndex, rowIndex) {
-  return anyArrayData(table.getIn(["cols", columnIndex])).get(rowIndex)
+  return anyArrayData(table.getIn(["cols", columnIndex]), rowIndex)
 }
 
 /**
@@ -363,7 +392,16 @@ export function indexGetByName(index, name) {
  * Returns the length of an AnyArray.
  */
 function anyArrayLen(anyArray) {
-  return anyArrayData(anyArray).size
+  const getSize = obj => obj.get("data").size
+  return dispatchOneOf(anyArray, "type", {
+    strings: getSize,
+    stringDictionary: obj => obj.getIn(["codes", "data"]).size,
+    doubles: getSize,
+    floats: getSize,
+    int64s: getSize,
+    datetimes: getSize,
+    timedeltas: getSize,
+  })
 }
 
 /**
@@ -373,7 +411,10 @@ function anyArrayGet(anyArray, i) {
   const getData = obj => obj.get("data").get(i)
   return dispatchOneOf(anyArray, "type", {
     strings: getData,
+    stringDictionary: obj => stringDictionaryGet(obj, i),
     doubles: getData,
+    // Drop the digits that single precision floats don't have.
+    floats: obj => Number(getData(obj).toPrecision(FLOAT_DIGITS)),
     int64s: getData,
     datetimes: obj => format.nanosToDate(getData(obj)),
     timedeltas: obj => format.nanosToDuration(getData(obj)),
@@ -381,25 +422,36 @@ function anyArrayGet(anyArray, i) {
 }
 
 /**
- * Returns the data array of an proto.AnyArray.
+ * Returns the raw data of the ith element of this AnyArray.
  */
-function anyArrayData(anyArray) {
-  const getData = obj => obj.get("data")
+function anyArrayData(anyArray, i) {
+  const getData = obj => obj.get("data").get(i)
   return dispatchOneOf(anyArray, "type", {
     strings: getData,
+    stringDictionary: obj => stringDictionaryGet(obj, i),
     doubles: getData,
+    floats: getData,
     int64s: getData,
     datetimes: getData,
     timedeltas: getData,
   })
 }
 
+/**
+ * Returns the ith string of a proto.StringDictionaryArray.
+ */
+function stringDictionaryGet(dictionary, i) {
+  const code = dictionary.getIn(["codes", "data", i])
+  return dictionary.getIn(["values", "data", code])
+}
+
 /**
  * Concatenates namedDataSet into element, returning a new element.
  */
 export function addRows(element, namedDataSet) {
   const name = namedDataSet.get("hasName") ? namedDataSet.get("name") : null
-  const newRows = namedDataSet.get("data")
+  const maxRows = namedDataSet.get("maxRows")
+  const newRows = trimDataFrame(namedDataSet.get("data"), maxRows)
   const namedDataSets = getNamedDataSets(element)
 
   const [existingDatasetIndex, existingDataSet] = getNamedDataSet(
@@ -420,7 +472,7 @@ export function addRows(element, namedDataSet) {
     if (existingDataSet) {
       dataframeToModify = existingDataSet.get("data")
     } else {
-      return pushNamedDataSet(element, namedDataSet)
+      return pushNamedDataSet(element, namedDataSet.set("data", newRows))
     }
   } else {
     const existingDataFrame = getDataFrame(element)
@@ -438,20 +490,18 @@ export function addRows(element, namedDataSet) {
     dataframeToModify = dataframeToModify.set("style", fromJS({ cols: [] }))
   }
 
-  const newDataFrame = dataframeToModify
-    .update("index", index => concatIndex(index, newRows.get("index")))
-    .updateIn(["data", "cols"], cols => {
-      return cols.zipWith(
-        (col1, col2) => concatAnyArray(col1, col2),
-        newRows.getIn(["data", "cols"])
-      )
-    })
-    .updateIn(["style", "cols"], style_cols => {
-      return style_cols.zipWith(
-        (col1, col2) => concatCellStyleArray(col1, col2),
-        newRows.getIn(["style", "cols"])
-      )
-    })
+  const newDataFrame = trimDataFrame(
+    dataframeToModify
+      .update("index", index => concatIndex(index, newRows.get("index")))
+      .updateIn(["data", "cols"], cols => {
+        return cols.zipWith(
+          (col1, col2) => concatAnyArray(col1, col2),
+          newRows.getIn(["data", "cols"])
+        )
+      })
+      .update("style", style => concatTableStyle(style, newRows.get("style"))),
+    maxRows
+  )
 
   if (existingDataSet) {
     return setDataFrameInNamedDataSet(
@@ -464,6 +514,96 @@ export function addRows(element, namedDataSet) {
   }
 }
 
+/**
+ * Drops all but the last maxRows rows of the dataframe, if maxRows is
+ * nonzero, and returns the result.
+ */
+function trimDataFrame(df, maxRows) {
+  if (!maxRows || !df.get("index") || indexLen(df.get("index")) <= maxRows) {
+    return df
+  }
+
+  return df
+    .update("index", index => trimIndex(index, maxRows))
+    .updateIn(["data", "cols"], cols =>
+      cols.map(col => trimAnyArray(col, maxRows))
+    )
+    .update("style", style => trimTableStyle(style, maxRows))
+}
+
+/**
+ * Drops all but the last maxRows rows of the TableStyle, along with the
+ * unique styles that the remaining cells don't refer to.
+ */
+function trimTableStyle(tableStyle, maxRows) {
+  if (!isDictionaryEncoded(tableStyle)) {
+    return tableStyle.update("cols", cols =>
+      cols.map(col => col.update("styles", styles => styles.takeLast(maxRows)))
+    )
+  }
+
+  const [uniqueStyles, indexLists] = compactUniqueValues(
+    tableStyle.get("uniqueStyles"),
+    tableStyle
+      .get("styleIndices")
+      .map(indices => indices.get("data").takeLast(maxRows))
+  )
+  return tableStyle
+    .set("uniqueStyles", uniqueStyles)
+    .update("styleIndices", styleIndices =>
+      styleIndices.zipWith(
+        (indices, data) => indices.set("data", data),
+        indexLists
+      )
+    )
+}
+
+/**
+ * Drops all but the last maxRows elements of the index.
+ */
+function trimIndex(index, maxRows) {
+  const trimData = idx =>
+    idx.updateIn(["data", "data"], data => data.takeLast(maxRows))
+  return updateOneOf(index, "type", {
+    plainIndex: idx => idx.update("data", data => trimAnyArray(data, maxRows)),
+    rangeIndex: idx =>
+      idx.set("start", Math.max(idx.get("start"), idx.get("stop") - maxRows)),
+    multiIndex: idx =>
+      idx.update("labels", labels =>
+        labels.map(label =>
+          label.update("data", data => data.takeLast(maxRows))
+        )
+      ),
+    int_64Index: trimData,
+    float_64Index: trimData,
+    datetimeIndex: trimData,
+    timedeltaIndex: trimData,
+  })
+}
+
+/**
+ * Drops all but the last maxRows elements of the anyArray.
+ */
+function trimAnyArray(anyArray, maxRows) {
+  const type = anyArray.get("type")
+  if (!type) {
+    return anyArray
+  }
+  if (type === "stringDictionary") {
+    // Also drop the values that the remaining codes don't refer to.
+    return anyArray.update(type, dictionary => {
+      const [values, [codes]] = compactUniqueValues(
+        dictionary.getIn(["values", "data"]),
+        [dictionary.getIn(["codes", "data"]).takeLast(maxRows)]
+      )
+      return dictionary
+        .setIn(["values", "data"], values)
+        .setIn(["codes", "data"], codes)
+    })
+  }
+  return anyArray.updateIn([type, "data"], data => data.takeLast(maxRows))
+}
+
 /**
  * Concatenates the indices and returns a new index.
  */
@@ -518,6 +658,37 @@ function concatAnyArray(anyArray1, anyArray2) {
 
   const type1 = anyArray1.get("type")
   const type2 = anyArray2.get("type")
+  if (type1 === "stringDictionary" && type2 === "stringDictionary") {
+    // Merge the dictionaries by value, and remap anyArray2's codes.
+    const dictionary2 = anyArray2.get(type2)
+    const [values, newCodes] = mergeUniqueValues(
+      anyArray1.getIn([type1, "values", "data"]),
+      dictionary2.getIn(["values", "data"])
+    )
+    return anyArray1.update(type1, dictionary =>
+      dictionary
+        .setIn(["values", "data"], values)
+        .updateIn(["codes", "data"], codes =>
+          codes.concat(
+            dictionary2.getIn(["codes", "data"]).map(code => newCodes.get(code))
+          )
+        )
+    )
+  }
+  if (type1 === "stringDictionary" || type2 === "stringDictionary") {
+    // Mixed encodings of strings are concatenated as plain strings.
+    return concatAnyArray(
+      decodeStringDictionary(anyArray1),
+      decodeStringDictionary(anyArray2)
+    )
+  }
+  if (isFloatType(type1) && isFloatType(type2) && type1 !== type2) {
+    // Floats with different precisions. The result has double precision.
+    const doubles = anyArray1
+      .get(type1)
+      .update("data", data => data.concat(anyArray2.getIn([type2, "data"])))
+    return anyArray1.set("type", "doubles").set("doubles", doubles)
+  }
   if (type1 !== type2) {
     throw new Error(`Cannot concatenate ${type1} and ${type2}.`)
   }
@@ -527,6 +698,131 @@ function concatAnyArray(anyArray1, anyArray2) {
   )
 }
 
+/**
+ * Merges two lists of unique values, so that each value appears once.
+ * Returns the merged list, and the list of the indices in it of values2.
+ */
+function mergeUniqueValues(values1, values2) {
+  const indexByValue = ImmutableMap().asMutable()
+  values1.forEach((value, index) => {
+    indexByValue.set(value, index)
+  })
+
+  const merged = values1.asMutable()
+  const indices2 = values2.map(value => {
+    if (!indexByValue.has(value)) {
+      indexByValue.set(value, merged.size)
+      merged.push(value)
+    }
+    return indexByValue.get(value)
+  })
+  return [merged.asImmutable(), indices2]
+}
+
+/**
+ * Drops the values that none of the lists of indices refer to. Returns the
+ * remaining values, and the lists of indices remapped to them.
+ */
+function compactUniqueValues(values, indexLists) {
+  const newIndexByIndex = new Map()
+  const newValues = []
+  const newIndexLists = indexLists.map(indices =>
+    indices.map(index => {
+      if (!newIndexByIndex.has(index)) {
+        newIndexByIndex.set(index, newValues.length)
+        newValues.push(values.get(index))
+      }
+      return newIndexByIndex.get(index)
+    })
+  )
+  return [List(newValues), newIndexLists]
+}
+
+function isFloatType(type) {
+  return type === "doubles" || type === "floats"
+}
+
+/**
+ * If the anyArray holds a StringDictionaryArray, returns an equivalent
+ * anyArray that holds a StringArray. Otherwise, returns it unchanged.
+ */
+function decodeStringDictionary(anyArray) {
+  if (anyArray.get("type") !== "stringDictionary") {
+    return anyArray
+  }
+  const dictionary = anyArray.get("stringDictionary")
+  const values = dictionary.getIn(["values", "data"])
+  const strings = dictionary.get("values").set(
+    "data",
+    dictionary.getIn(["codes", "data"]).map(code => values.get(code))
+  )
+  return anyArray.set("type", "strings").set("strings", strings)
+}
+
+/**
+ * Concatenates the cell styles of both TableStyles, returning the result.
+ */
+function concatTableStyle(tableStyle1, tableStyle2) {
+  // Special case if the left style is empty.
+  if (
+    !isDictionaryEncoded(tableStyle1) &&
+    tableStyle1.get("cols").size === 0
+  ) {
+    return tableStyle2
+  }
+
+  if (
+    !isDictionaryEncoded(tableStyle1) ||
+    !isDictionaryEncoded(tableStyle2)
+  ) {
+    // If either isn't dictionary-encoded, neither is the result.
+    return fromJS({ cols: [] }).set(
+      "cols",
+      getCellStyleArrays(tableStyle1).zipWith(
+        (col1, col2) => concatCellStyleArray(col1, col2),
+        getCellStyleArrays(tableStyle2)
+      )
+    )
+  }
+
+  // Merge the unique styles by value, and remap the right style's indices.
+  const [uniqueStyles, newIndices] = mergeUniqueValues(
+    tableStyle1.get("uniqueStyles"),
+    tableStyle2.get("uniqueStyles")
+  )
+  return tableStyle1
+    .set("uniqueStyles", uniqueStyles)
+    .update("styleIndices", styleIndices =>
+      styleIndices.zipWith(
+        (indices1, indices2) =>
+          indices1.update("data", data =>
+            data.concat(
+              indices2.get("data").map(index => newIndices.get(index))
+            )
+          ),
+        tableStyle2.get("styleIndices")
+      )
+    )
+}
+
+/**
+ * Returns a CellStyleArray for each column of a TableStyle.
+ */
+function getCellStyleArrays(tableStyle) {
+  if (!isDictionaryEncoded(tableStyle)) {
+    return tableStyle.get("cols")
+  }
+  const uniqueStyles = tableStyle.get("uniqueStyles")
+  return tableStyle
+    .get("styleIndices")
+    .map(indices =>
+      fromJS({}).set(
+        "styles",
+        indices.get("data").map(index => uniqueStyles.get(index))
+      )
+    )
+}
+
 /**
  * Concatenates both CellStyleArrays, returning the result
  */
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import threading
+import uuid
+
+import base58
+import numpy as np
+
+from streamlit import config
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# How many rows of a DataFrame we measure to estimate its size.
+_SIZE_SAMPLE_ROWS = 1000
+
+
+class DataFrameStore(object):
+    """Retains the DataFrames of st.dataframe elements that are sent to the
+    browser in windows, so that the browser can fetch the rest of their rows
+    and columns from the server's /dataframe endpoint.
+
+    It also answers the browser's sort and filter queries on those
+    DataFrames (see get_rows), and caches the order in which each sorted
+    column puts the rows, since sorting is the slow part.
+
+    The total size of the retained DataFrames, their cached sort orders and
+    their last query's rows is bounded by server.maxRetainedDataFrameSize. Once it's exceeded, the
+    least recently used DataFrames are dropped, and the browser can no longer
+    fetch their windows.
+
+    This class is thread safe.
+    """
+
+    _singleton = None
+
+    @classmethod
+    def get_current(cls):
+        """Return the singleton instance."""
+        if cls._singleton is None:
+            DataFrameStore()
+
+        return DataFrameStore._singleton
+
+    def __init__(self):
+        if DataFrameStore._singleton is not None:
+            raise RuntimeError(
+                "DataFrameStore already initialized. Use .get_current() instead"
+            )
+
+        DataFrameStore._singleton = self
+
+        self._lock = threading.Lock()
+
+        # Map: ID -> _RetainedDataFrame, in least recently used order.
+        self._data_frames = collections.OrderedDict()
+        self._num_bytes = 0
+
+    def add(self, df):
+        """Retain a DataFrame.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            The DataFrame, which mustn't be modified afterwards.
+
+        Returns
+        -------
+        str | None
+            The ID with which to get the DataFrame, which is hard to guess.
+            None if the DataFrame is larger than
+            server.maxRetainedDataFrameSize, so it wasn't retained.
+
+        """
+        max_bytes = config.get_option("server.maxRetainedDataFrameSize") * 1e6
+        num_bytes = _estimate_num_bytes(df)
+        if num_bytes > max_bytes:
+            return None
+
+        data_frame_id = str(base58.b58encode(uuid.uuid4().bytes).decode("utf-8"))
+
+        with self._lock:
+            entry = _RetainedDataFrame(df)
+            self._data_frames[data_frame_id] = entry
+            self._add_bytes(entry, num_bytes, max_bytes)
+
+        return data_frame_id
+
+    def get(self, data_frame_id):
+        """Return a retained DataFrame, or None if there's none with the
+        given ID."""
+        with self._lock:
+            entry = self._get_entry(data_frame_id)
+            return None if entry is None else entry.df
+
+    def get_rows(
+        self,
+        data_frame_id,
+        sort_column=None,
+        ascending=True,
+        filter_text=None,
+        filter_column=None,
+    ):
+        """Return a retained DataFrame and the positions of the rows that a
+        query selects, in the order it puts them in.
+
+        Parameters
+        ----------
+        data_frame_id : str
+        sort_column : int or None
+            The position of the column to sort the rows by, or None to keep
+            them in the DataFrame's order.
+        ascending : bool
+            Whether to sort in ascending order. If False and sort_column is
+            None, the rows are in the reverse of the DataFrame's order.
+        filter_text : str or None
+            If set, only the rows with a cell whose string contains it,
+            ignoring case, are selected.
+        filter_column : int or None
+            If set, only the cells in the column at this position are
+            matched against filter_text.
+
+        Returns
+        -------
+        (pandas.DataFrame, numpy.ndarray | None) | None
+            The DataFrame, and the positions of the selected rows, or None if
+            the query selects all rows in the DataFrame's order. None if
+            there's no DataFrame with the given ID.
+
+        Raises
+        ------
+        IndexError
+            If sort_column or filter_column is out of range.
+
+        """
+        with self._lock:
+            entry = self._get_entry(data_frame_id)
+            if entry is None:
+                return None
+            df = entry.df
+            sort_order = entry.sort_orders.get(sort_column)
+            query = (sort_column, ascending, filter_text, filter_column)
+            if entry.last_query is not None and entry.last_query[0] == query:
+                return df, entry.last_query[1]
+
+        num_columns = len(df.columns)
+        for column in (sort_column, filter_column):
+            if column is not None and not 0 <= column < num_columns:
+                raise IndexError("Column %s out of range" % column)
+
+        max_bytes = config.get_option("server.maxRetainedDataFrameSize") * 1e6
+
+        # Sorting and filtering run without the lock. They're slow, and
+        # DataFrameWindowHandler calls this from several threads, which
+        # shouldn't have to wait for each other's queries.
+        if sort_column is not None and sort_order is None:
+            sort_order = _sort_order(df.iloc[:, sort_column])
+            with self._lock:
+                if sort_column in entry.sort_orders:
+                    # Another thread sorted by the same column meanwhile.
+                    sort_order = entry.sort_orders[sort_column]
+                elif self._data_frames.get(data_frame_id) is entry:
+                    entry.sort_orders[sort_column] = sort_order
+                    self._add_bytes(entry, sort_order.nbytes, max_bytes)
+
+        if sort_order is not None:
+            rows = sort_order if ascending else sort_order[::-1]
+        elif not ascending:
+            rows = np.arange(len(df) - 1, -1, -1)
+        else:
+            rows = None
+
+        if filter_text:
+            mask = _filter_mask(df, filter_text, filter_column)
+            rows = np.flatnonzero(mask) if rows is None else rows[mask[rows]]
+
+        with self._lock:
+            if self._data_frames.get(data_frame_id) is entry:
+                num_bytes = _rows_num_bytes(rows, sort_order)
+                entry.last_query = (query, rows)
+                self._add_bytes(
+                    entry, num_bytes - entry.last_query_num_bytes, max_bytes
+                )
+                entry.last_query_num_bytes = num_bytes
+
+        return df, rows
+
+    def remove(self, data_frame_id):
+        """Stop retaining a DataFrame. No-op if there's none with the given
+        ID."""
+        with self._lock:
+            entry = self._data_frames.pop(data_frame_id, None)
+            if entry is not None:
+                self._num_bytes -= entry.num_bytes
+
+    def _get_entry(self, data_frame_id):
+        """Return a _RetainedDataFrame and move it to the end of the LRU
+        order, or return None. The lock must be held."""
+        entry = self._data_frames.pop(data_frame_id, None)
+        if entry is not None:
+            self._data_frames[data_frame_id] = entry
+        return entry
+
+    def _add_bytes(self, entry, num_bytes, max_bytes):
+        """Count num_bytes more towards entry's size, and evict the least
+        recently used DataFrames if the store is full. The lock must be
+        held."""
+        entry.num_bytes += num_bytes
+        self._num_bytes += num_bytes
+        while self._num_bytes > max_bytes:
+            evicted_id, evicted = self._data_frames.popitem(last=False)
+            self._num_bytes -= evicted.num_bytes
+            LOGGER.debug("Evicted retained DataFrame %s", evicted_id)
+
+
+class _RetainedDataFrame(object):
+    """A DataFrame in the DataFrameStore, and what's cached about it."""
+
+    def __init__(self, df):
+        self.df = df
+        # Size of the DataFrame, sort_orders and last_query, in bytes.
+        self.num_bytes = 0
+        # Map: column position -> positions of the rows, sorted by the
+        # column in ascending order.
+        self.sort_orders = {}
+        # (query, rows) of the last get_rows call, since the browser fetches
+        # many windows of the same query.
+        self.last_query = None
+        # Size of last_query's rows, in bytes, unless they're in sort_orders.
+        self.last_query_num_bytes = 0
+
+
+def _estimate_num_bytes(df):
+    """Return about how many bytes a DataFrame takes, with its index.
+
+    Unlike pandas' shallow memory usage, this counts the values of object
+    columns, like strings. Their deep memory usage is slow to compute for
+    large DataFrames, though, so we measure it on a random sample of rows
+    and extrapolate.
+    """
+    num_rows = len(df)
+    if num_rows <= _SIZE_SAMPLE_ROWS:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    # Don't use the global random state, which the script may have seeded.
+    positions = np.random.RandomState().randint(num_rows, size=_SIZE_SAMPLE_ROWS)
+    sample = df.iloc[positions]
+    sample_values_bytes = (
+        sample.memory_usage(index=True, deep=True).sum()
+        - sample.memory_usage(index=True, deep=False).sum()
+    )
+    num_bytes = df.memory_usage(index=True, deep=False).sum()
+    return int(num_bytes + sample_values_bytes * num_rows / _SIZE_SAMPLE_ROWS)
+
+
+def _rows_num_bytes(rows, sort_order):
+    """Return the size of the rows that get_rows returns, in bytes, not
+    counting the sort order that they may be a view of."""
+    if rows is None:
+        return 0
+    if sort_order is not None and (rows is sort_order or rows.base is sort_order):
+        return 0
+    return rows.nbytes
+
+
+def _sort_order(column):
+    """Return the positions of a pandas.Series' values, sorted in ascending
+    order with missing values, like NaN and None, last. Equal values keep
+    their order."""
+    values = np.asarray(column)
+    missing = column.isna().values
+    if not missing.any():
+        return _argsort(values)
+
+    present = np.flatnonzero(~missing)
+    sorted_present = present[_argsort(values[present])]
+    return np.concatenate([sorted_present, np.flatnonzero(missing)])
+
+
+def _argsort(values):
+    """Like np.argsort, with a stable sort that also works on object arrays
+    whose values can't be compared with each other."""
+    try:
+        return np.argsort(values, kind="mergesort")
+    except TypeError:
+        # Like strings and numbers. Sort them as strings.
+        return np.argsort(values.astype(str), kind="mergesort")
+
+
+def _filter_mask(df, filter_text, filter_column):
+    """Return a boolean array of whether each row of df has a non-missing
+    cell whose string contains filter_text, ignoring case."""
+    if filter_column is None:
+        columns = range(len(df.columns))
+    else:
+        columns = [filter_column]
+
+    mask = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        values = df.iloc[:, column]
+        matches = values.astype(str).str.contains(filter_text, case=False, regex=False)
+        mask |= (matches & values.notna()).values
+    return mask
@@ -31,12 +31,15 @@ from datetime import date
 from datetime import time
 
 from streamlit import caching
+from streamlit import element_memo
+from streamlit.DataFrameStore import DataFrameStore
 from streamlit import metrics
 from streamlit.proto import Balloons_pb2
 from streamlit.proto import BlockPath_pb2
 from streamlit.proto import ForwardMsg_pb2
 from streamlit.proto import Text_pb2
 from streamlit import get_report_ctx
+from streamlit.ReportThread import streamlit_call
 
 # setup logging
 from streamlit.logger import get_logger
@@ -49,6 +52,22 @@ MAX_DELTA_BYTES = 14 * 1024 * 1024  # 14MB
 # input dataframes.
 DELTAS_TYPES_THAT_MELT_DATAFRAMES = ("line_chart", "area_chart", "bar_chart")
 
+# List of Streamlit commands whose DataFrames may be marshalled as Arrow. See
+# global.dataFrameSerialization.
+DELTA_TYPES_THAT_ALLOW_ARROW = ("dataframe", "table")
+
+# List of Streamlit commands whose DataFrames may be marshalled with single
+# precision floats. See global.chartDataPrecision.
+DELTA_TYPES_THAT_ALLOW_SINGLE_PRECISION = (
+    "line_chart",
+    "area_chart",
+    "bar_chart",
+    "vega_lite_chart",
+    "altair_chart",
+    "map",
+    "deck_gl_chart",
+)
+
 
 def _wraps_with_cleaned_sig(wrapped, num_args_to_remove):
     """Simplify the function signature by removing arguments from it.
@@ -81,6 +100,22 @@ def _remove_self_from_sig(method):
     return wrapped_method
 
 
+def _with_streamlit_call(method):
+    """Run a DeltaGenerator method in a ReportThread.streamlit_call context,
+    so interrupt() can't stop the script halfway through it.
+
+    This is a function decorator. Methods wrapped by _with_element already
+    run in that context.
+    """
+
+    @functools.wraps(method)
+    def wrapped_method(*args, **kwargs):
+        with streamlit_call():
+            return method(*args, **kwargs)
+
+    return wrapped_method
+
+
 def _with_element(method):
     """Wrap function and pass a NewElement proto to be filled.
 
@@ -104,21 +139,28 @@ def _with_element(method):
 
     @_wraps_with_cleaned_sig(method, 2)  # Remove self and element from sig.
     def wrapped_method(dg, *args, **kwargs):
-        # Warn if we're called from within an @st.cache function
-        caching.maybe_show_cached_st_function_warning(dg)
-
-        delta_type = method.__name__
-        last_index = -1
-
-        if delta_type in DELTAS_TYPES_THAT_MELT_DATAFRAMES and len(args) > 0:
-            data = args[0]
-            if isinstance(data, pd.DataFrame):
-                last_index = data.index[-1] if data.index.size > 0 else 0
-
-        def marshall_element(element):
-            return method(dg, element, *args, **kwargs)
-
-        return dg._enqueue_new_element_delta(marshall_element, delta_type, last_index)
+        # Don't let interrupt() stop the script halfway through this.
+        with streamlit_call():
+            # Warn if we're called from within an @st.cache function
+            caching.maybe_show_cached_st_function_warning(dg)
+
+            delta_type = method.__name__
+            last_index = -1
+
+            if delta_type in DELTAS_TYPES_THAT_MELT_DATAFRAMES and len(args) > 0:
+                data = args[0]
+                if isinstance(data, pd.DataFrame):
+                    last_index = data.index[-1] if data.index.size > 0 else 0
+
+            def marshall_element(element):
+                return method(dg, element, *args, **kwargs)
+
+            return dg._enqueue_new_element_delta(
+                marshall_element,
+                delta_type,
+                last_index,
+                memo_key=element_memo.get_key(delta_type, args, kwargs),
+            )
 
     return wrapped_method
 
@@ -237,6 +279,11 @@ class DeltaGenerator(object):
         self._container = container
         self._path = path
 
+        # (ID in the DataFrameStore, width, height) of the DataFrame this
+        # element shows, if st.dataframe sent it in windows. See
+        # data_frame_proto.retain_for_windows.
+        self._data_frame_window = None
+
     def __getattr__(self, name):
         import streamlit as st
 
@@ -279,6 +326,7 @@ class DeltaGenerator(object):
         last_index=None,
         elementWidth=None,
         elementHeight=None,
+        memo_key=None,
     ):
         """Create NewElement delta, fill it, and enqueue it.
 
@@ -290,6 +338,9 @@ class DeltaGenerator(object):
             Desired width for the element
         elementHeight : int or None
             Desired height for the element
+        memo_key : str or None
+            Key under which the marshalled element is memoized, or None if
+            it's not memoizable. See element_memo.
 
         Returns
         -------
@@ -313,7 +364,14 @@ class DeltaGenerator(object):
         rv = None
         if marshall_element:
             msg = ForwardMsg_pb2.ForwardMsg()
-            rv = marshall_element(msg.delta.new_element)
+            memoized = element_memo.get(memo_key) if memo_key is not None else None
+            if memoized is not None:
+                element_bytes, msg.hash = memoized
+                msg.delta.new_element.ParseFromString(element_bytes)
+            else:
+                rv = marshall_element(msg.delta.new_element)
+                if memo_key is not None and rv is None:
+                    element_memo.put(memo_key, msg)
             msg.metadata.parent_block.container = self._container
             msg.metadata.parent_block.path[:] = self._path
             msg.metadata.delta_id = self._id
@@ -359,24 +417,25 @@ class DeltaGenerator(object):
         if self._enqueue is None:
             return self
 
-        msg = ForwardMsg_pb2.ForwardMsg()
-        msg.delta.new_block = True
-        msg.metadata.parent_block.container = self._container
-        msg.metadata.parent_block.path[:] = self._path
-        msg.metadata.delta_id = self._id
+        with streamlit_call():
+            msg = ForwardMsg_pb2.ForwardMsg()
+            msg.delta.new_block = True
+            msg.metadata.parent_block.container = self._container
+            msg.metadata.parent_block.path[:] = self._path
+            msg.metadata.delta_id = self._id
 
-        new_block_dg = DeltaGenerator(
-            enqueue=self._enqueue,
-            id=0,
-            is_root=True,
-            container=self._container,
-            path=self._path + (self._id,),
-        )
+            new_block_dg = DeltaGenerator(
+                enqueue=self._enqueue,
+                id=0,
+                is_root=True,
+                container=self._container,
+                path=self._path + (self._id,),
+            )
 
-        self._enqueue(msg)
-        self._id += 1
+            self._enqueue(msg)
+            self._id += 1
 
-        return new_block_dg
+            return new_block_dg
 
     @_with_element
     def balloons(self, element):
@@ -730,6 +789,7 @@ class DeltaGenerator(object):
         element.exception.stack_trace.extend(stack_trace)
 
     @_remove_self_from_sig
+    @_with_streamlit_call
     def dataframe(self, data=None, width=None, height=None):
         """Display a dataframe as an interactive table.
 
@@ -781,12 +841,41 @@ class DeltaGenerator(object):
         """
         import streamlit.elements.data_frame_proto as data_frame_proto
 
+        if self._data_frame_window is not None:
+            # This element's DataFrame is being replaced.
+            DataFrameStore.get_current().remove(self._data_frame_window[0])
+            self._data_frame_window = None
+
+        window_id = None
+        if self._enqueue is not None:
+            window_id = data_frame_proto.retain_for_windows(data)
+
         def set_data_frame(delta):
-            data_frame_proto.marshall_data_frame(data, delta.data_frame)
+            if window_id is None:
+                data_frame_proto.marshall_data_frame(
+                    data, delta.data_frame, allow_arrow=True
+                )
+            else:
+                data_frame_proto.marshall_first_window(
+                    data, window_id, delta.data_frame
+                )
 
-        return self._enqueue_new_element_delta(
-            set_data_frame, "dataframe", elementWidth=width, elementHeight=height
+        dg = self._enqueue_new_element_delta(
+            set_data_frame,
+            "dataframe",
+            elementWidth=width,
+            elementHeight=height,
+            # Elements sent in windows aren't memoized, since the DataFrame
+            # that their windows come from may no longer be retained.
+            memo_key=(
+                element_memo.get_key("dataframe", (data,), {})
+                if window_id is None
+                else None
+            ),
         )
+        if window_id is not None and not dg._is_root:
+            dg._data_frame_window = (window_id, width, height)
+        return dg
 
     @_with_element
     def line_chart(self, element, data=None, width=0, height=0):
@@ -2149,9 +2238,10 @@ class DeltaGenerator(object):
         """
         import streamlit.elements.data_frame_proto as data_frame_proto
 
-        data_frame_proto.marshall_data_frame(data, element.table)
+        data_frame_proto.marshall_data_frame(data, element.table, allow_arrow=True)
 
-    def add_rows(self, data=None, **kwargs):
+    @_with_streamlit_call
+    def add_rows(self, data=None, max_rows=None, **kwargs):
         """Concatenate a dataframe to the bottom of the current one.
 
         Parameters
@@ -2160,6 +2250,12 @@ class DeltaGenerator(object):
         or None
             Table to concat. Optional.
 
+        max_rows : int or None
+            If set, only the last max_rows rows are kept, and older rows are
+            dropped, both in Streamlit and in the browser. Use this to keep
+            the memory used by a chart that's updated forever constant.
+            Optional.
+
         **kwargs : pandas.DataFrame, numpy.ndarray, Iterable, dict, or None
             The named dataset to concat. Optional. You can only pass in 1
             dataset (including the one in the data parameter).
@@ -2202,12 +2298,19 @@ class DeltaGenerator(object):
         ... }),
         >>> my_chart.add_rows(some_fancy_name=df2)  # <-- name used as keyword
 
+        To show a live chart that only keeps the last 1000 rows:
+
+        >>> my_chart.add_rows(df2, max_rows=1000)
+
         """
         if self._enqueue is None:
             return self
 
         assert not self._is_root, "Only existing elements can add_rows."
 
+        if max_rows is not None and max_rows < 1:
+            raise ValueError("max_rows must be at least 1.")
+
         import streamlit.elements.data_frame_proto as data_frame_proto
         import pandas as pd
 
@@ -2224,6 +2327,11 @@ class DeltaGenerator(object):
                 "Method requires exactly one dataset"
             )
 
+        if self._data_frame_window is not None:
+            if name:
+                raise ValueError("Dataset names not supported for st.data_frame")
+            return self._add_rows_to_data_frame_window(data, max_rows)
+
         # For some delta types we have to reshape the data structure
         # otherwise the input data and the actual data used
         # by vega_lite will be different and it will throw an error.
@@ -2239,14 +2347,19 @@ class DeltaGenerator(object):
             old_stop = _get_pandas_index_attr(data, 'stop')
 
             if old_step is None or old_stop is None:
-                raise AttributeError("'RangeIndex' object has no attribute "
-                                     "'step'")
+                raise AttributeError("'RangeIndex' object has no attribute 'step'")
 
             start = self._last_index + old_step
             stop = self._last_index + old_step + old_stop
 
             data.index = pd.RangeIndex(start=start, stop=stop, step=old_step)
-            data = pd.melt(data.reset_index(), id_vars=["index"])
+
+            # Melting turns each row into one row per column. Those stay
+            # together, so every series keeps the same max_rows rows.
+            if max_rows is not None:
+                max_rows *= len(data.columns)
+
+            data = data_frame_proto.melt_data_frame(data)
 
             self._last_index = stop
 
@@ -2255,16 +2368,47 @@ class DeltaGenerator(object):
         msg.metadata.parent_block.path[:] = self._path
         msg.metadata.delta_id = self._id
 
-        data_frame_proto.marshall_data_frame(data, msg.delta.add_rows.data)
+        data_frame_proto.marshall_data_frame(
+            data,
+            msg.delta.add_rows.data,
+            allow_arrow=self._delta_type in DELTA_TYPES_THAT_ALLOW_ARROW,
+            allow_single_precision=(
+                self._delta_type in DELTA_TYPES_THAT_ALLOW_SINGLE_PRECISION
+            ),
+        )
 
         if name:
             msg.delta.add_rows.name = name
             msg.delta.add_rows.has_name = True
 
+        if max_rows is not None:
+            msg.delta.add_rows.max_rows = max_rows
+
         self._enqueue(msg)
 
         return self
 
+    def _add_rows_to_data_frame_window(self, data, max_rows):
+        """Add rows to a DataFrame that was sent in windows, by sending its
+        first window again.
+
+        The browser only has the windows it fetched, so it can't append
+        rows itself.
+        """
+        import streamlit.elements.data_frame_proto as data_frame_proto
+
+        window_id, width, height = self._data_frame_window
+        df = DataFrameStore.get_current().get(window_id)
+        if df is None:
+            raise RuntimeError(
+                "Cannot add rows to a DataFrame that's no longer retained. "
+                "Increase server.maxRetainedDataFrameSize to retain more "
+                "DataFrames."
+            )
+
+        df = data_frame_proto.concat_data_frames(df, data, max_rows or 0)
+        return self.dataframe(df, width, height)
+
 
 def _clean_text(text):
     return textwrap.dedent(str(text)).strip()
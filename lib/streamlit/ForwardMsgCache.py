@@ -14,14 +14,22 @@
 # limitations under the License.
 
 import hashlib
+import os
+import re
+import tempfile
 from weakref import WeakKeyDictionary
 
 from streamlit import config
+from streamlit.ReportQueue import get_delta_key
 from streamlit.logger import get_logger
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
 LOGGER = get_logger(__name__)
 
+# Hashes are MD5 hex digests. Anything else can't be a valid hash (and
+# mustn't be used as a file name).
+_HASH_REGEX = re.compile(r"^[0-9a-f]{32}$")
+
 
 def populate_hash_if_needed(msg):
     """Computes and assigns the unique hash for a ForwardMsg.
@@ -81,6 +89,66 @@ def create_reference_msg(msg):
     return ref_msg
 
 
+class SentElementTracker(object):
+    """Tracks the elements sent to one browser in the current and the
+    previous report run, so that unchanged elements needn't be resent.
+
+    An element is unchanged if the same position (container, parent block
+    path and delta ID) got a new_element delta with the same hash in the
+    previous run. The browser remembers all elements it received in its
+    current and previous run, so it can look them up by hash.
+
+    This class is *not* thread safe. It's intended to only be accessed by
+    the server thread.
+    """
+
+    def __init__(self):
+        # Map: delta key -> hash of the new_element ForwardMsg sent there,
+        # or None if its element was sent some other way.
+        self._previous = {}
+        self._current = {}
+
+    def process(self, msg):
+        """Record a message that's about to be sent to the browser.
+
+        Parameters
+        ----------
+        msg : ForwardMsg
+
+        Returns
+        -------
+        ForwardMsg
+            The message to send: msg itself, or an unchanged_element delta
+            that refers to it.
+
+        """
+        msg_type = msg.WhichOneof("type")
+        if msg_type == "new_report":
+            self._previous = self._current
+            self._current = {}
+            return msg
+
+        if msg_type != "delta":
+            return msg
+
+        key = get_delta_key(msg)
+        if msg.delta.WhichOneof("type") != "new_element":
+            # add_rows and new_block deltas change the element in place.
+            self._current[key] = None
+            return msg
+
+        msg_hash = populate_hash_if_needed(msg)
+        is_unchanged = key not in self._current and self._previous.get(key) == msg_hash
+        self._current[key] = msg_hash
+        if not is_unchanged:
+            return msg
+
+        unchanged_msg = ForwardMsg()
+        unchanged_msg.delta.unchanged_element = msg_hash
+        unchanged_msg.metadata.CopyFrom(msg.metadata)
+        return unchanged_msg
+
+
 class ForwardMsgCache(object):
     """A cache of ForwardMsgs.
 
@@ -92,6 +160,15 @@ class ForwardMsgCache(object):
     This cache is *not* thread safe. It's intended to only be accessed by
     the server thread.
 
+    When the server runs in several worker processes, the cache can be given
+    a directory that all workers share. Cached messages are also written
+    there, so that a worker can serve messages that were cached by another
+    worker (a browser's /message requests may not reach the worker its
+    WebSocket is connected to). Each cache writes its messages into its own
+    subdirectory, hard-linking the files that other caches already wrote,
+    and deletes them when it evicts their entries. So a message stays on
+    disk as long as any cache holds it.
+
     """
 
     class Entry(object):
@@ -147,8 +224,22 @@ class ForwardMsgCache(object):
             """
             return len(self._session_report_run_counts) > 0
 
-    def __init__(self):
+    def __init__(self, shared_dir=None):
+        """Initialize a ForwardMsgCache.
+
+        Parameters
+        ----------
+        shared_dir : str or None
+            A directory shared with the caches in other server processes.
+            If None, the cache is only held in memory.
+
+        """
         self._entries = {}  # Map: hash -> Entry
+        self._shared_dir = shared_dir
+        # The subdirectory of shared_dir that this cache writes to.
+        self._own_dir = None
+        if shared_dir is not None:
+            self._own_dir = tempfile.mkdtemp(dir=shared_dir)
 
     def add_message(self, msg, session, report_run_count):
         """Add a ForwardMsg to the cache.
@@ -170,8 +261,39 @@ class ForwardMsgCache(object):
         if entry is None:
             entry = ForwardMsgCache.Entry(msg)
             self._entries[msg.hash] = entry
+            if self._shared_dir is not None:
+                self._write_shared_message(msg)
         entry.add_session_ref(session, report_run_count)
 
+    def add_session_refs(self, hashes, session, report_run_count):
+        """Record that a session has the messages with the given hashes.
+
+        This is used when a client tells us which messages it already has
+        cached (e.g. from a previous visit), so that we can send it
+        references to those messages rather than the messages themselves.
+        Hashes that aren't in the cache are ignored.
+
+        Parameters
+        ----------
+        hashes : iterable of string
+        session : ReportSession
+        report_run_count : int
+            The number of times the session's report has run
+
+        Returns
+        -------
+        int
+            The number of hashes that were found in the cache.
+
+        """
+        num_found = 0
+        for msg_hash in hashes:
+            entry = self._entries.get(msg_hash, None)
+            if entry is not None:
+                entry.add_session_ref(session, report_run_count)
+                num_found += 1
+        return num_found
+
     def get_message(self, hash):
         """Return the message with the given ID if it exists in the cache.
 
@@ -186,7 +308,11 @@ class ForwardMsgCache(object):
 
         """
         entry = self._entries.get(hash, None)
-        return entry.msg if entry else None
+        if entry is not None:
+            return entry.msg
+        if self._shared_dir is not None:
+            return self._read_shared_message(hash)
+        return None
 
     def has_message_reference(self, msg, session, report_run_count):
         """Return True if a session has a reference to a message.
@@ -246,7 +372,70 @@ class ForwardMsgCache(object):
                     # The entry has no more references. Remove it from
                     # the cache completely.
                     del self._entries[msg_hash]
+                    if self._shared_dir is not None:
+                        self._remove_shared_message(msg_hash)
 
     def clear(self):
         """Remove all entries from the cache"""
+        if self._shared_dir is not None:
+            for msg_hash in self._entries:
+                self._remove_shared_message(msg_hash)
         self._entries.clear()
+
+    def _get_shared_dirs(self):
+        """Return the subdirectories of the shared directory, one per
+        cache, starting with this cache's."""
+        try:
+            names = os.listdir(self._shared_dir)
+        except OSError:
+            names = []
+        dirs = [os.path.join(self._shared_dir, name) for name in names]
+        return [self._own_dir] + [d for d in dirs if d != self._own_dir]
+
+    def _write_shared_message(self, msg):
+        path = os.path.join(self._own_dir, msg.hash)
+        if os.path.exists(path):
+            return
+
+        # Share the file if another cache already wrote the message. The
+        # link fails if that cache deleted it meanwhile.
+        for shared_dir in self._get_shared_dirs()[1:]:
+            try:
+                os.link(os.path.join(shared_dir, msg.hash), path)
+                return
+            except OSError:
+                pass
+
+        # Write to a temp file and rename it, so that other processes never
+        # read a partially-written message.
+        temp_path = "%s.tmp" % path
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(msg.SerializeToString())
+            os.rename(temp_path, path)
+        except (IOError, OSError) as e:
+            LOGGER.warning("Failed to write shared message [hash=%s]: %s", msg.hash, e)
+
+    def _read_shared_message(self, hash):
+        if not _HASH_REGEX.match(hash):
+            return None
+
+        for shared_dir in self._get_shared_dirs():
+            try:
+                with open(os.path.join(shared_dir, hash), "rb") as f:
+                    msg_str = f.read()
+            except (IOError, OSError):
+                continue
+
+            msg = ForwardMsg()
+            msg.ParseFromString(msg_str)
+            return msg
+
+        return None
+
+    def _remove_shared_message(self, hash):
+        try:
+            os.remove(os.path.join(self._own_dir, hash))
+        except OSError:
+            # It was never written.
+            pass
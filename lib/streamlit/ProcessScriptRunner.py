@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs scripts in a pool of worker processes, when runner.numProcesses > 0.
+
+The server process talks to each worker over a multiprocessing Pipe. It
+sends commands as tuples:
+
+- ("run", script_path, command_line, widget_states, rerun_widget_state)
+- ("stop",)
+
+And the worker answers with:
+
+- ("msg", serialized ForwardMsg)
+- ("event", ScriptRunnerEvent value, compile exception or None)
+- ("done", serialized final WidgetStates)
+
+Protobufs are sent serialized, since they can't be pickled.
+
+Workers are forked from the server process, so they share its config and
+sys.path. That's not possible on Windows, where runner.numProcesses is
+ignored.
+"""
+
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
+
+import tornado.ioloop
+from blinker import Signal
+
+from streamlit import config
+from streamlit.DeltaGenerator import DeltaGenerator
+from streamlit.Report import Report
+from streamlit.ScriptRequestQueue import RerunData
+from streamlit.ScriptRequestQueue import ScriptRequest
+from streamlit.ScriptRequestQueue import ScriptRequestQueue
+from streamlit.ScriptRunScheduler import ScriptRunScheduler
+from streamlit.ScriptRunner import ScriptRunner
+from streamlit.ScriptRunner import ScriptRunnerEvent
+from streamlit.logger import get_logger
+from streamlit.proto.BlockPath_pb2 import BlockPath
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.Widget_pb2 import WidgetStates
+from streamlit.watcher.LocalSourcesWatcher import _file_is_in_folder
+
+LOGGER = get_logger(__name__)
+
+# How often we check for new ScriptRequests while a worker is running our
+# script, or while we wait for a free worker.
+POLL_INTERVAL_SECS = 0.05
+
+
+def use_worker_processes():
+    """True if scripts should run in worker processes."""
+    return config.get_option("runner.numProcesses") > 0 and sys.platform != "win32"
+
+
+class ProcessScriptRunner(object):
+    """A ScriptRunner that executes its script in a worker process.
+
+    It has the same interface as ScriptRunner, and processes its
+    ScriptRequestQueue the same way: on its own thread, until the queue is
+    empty. Each RERUN runs in whichever worker process is free. STOP,
+    RERUN and SHUTDOWN requests that arrive during a run stop the script in
+    the worker at its next Streamlit call; the request is then handled here.
+    """
+
+    def __init__(self, report, main_dg, sidebar_dg, widget_states, request_queue):
+        """Initialize the ProcessScriptRunner.
+
+        (The ProcessScriptRunner won't start until start() is called.)
+
+        Parameters
+        ----------
+        report : Report
+            The ReportSession's report. Messages from the worker are
+            enqueued into it.
+
+        main_dg : DeltaGenerator
+            Unused. The worker process has its own DeltaGenerators.
+
+        sidebar_dg : DeltaGenerator
+            Unused. The worker process has its own DeltaGenerators.
+
+        widget_states : streamlit.proto.Widget_pb2.WidgetStates
+            The ReportSession's current widget states
+
+        request_queue : ScriptRequestQueue
+            The queue that the ReportSession is publishing ScriptRequests to.
+
+        """
+        self._report = report
+        self._widget_states = widget_states
+        self._request_queue = request_queue
+
+        self.on_event = Signal(
+            doc="""Emitted when a ScriptRunnerEvent occurs.
+
+            See ScriptRunner.on_event.
+            """
+        )
+
+        # Set to true when we process a SHUTDOWN request
+        self._shutdown_requested = False
+
+        # This is initialized in start()
+        self._request_thread = None
+
+    def start(self):
+        """Start a new thread to process the ScriptRequestQueue.
+
+        This must be called only once.
+
+        """
+        if self._request_thread is not None:
+            raise Exception("ProcessScriptRunner was already started")
+
+        self._request_thread = threading.Thread(
+            target=self._process_request_queue, name="ProcessScriptRunner.requestThread"
+        )
+        self._request_thread.start()
+
+    def maybe_handle_execution_control_request(self):
+        # Execution control happens in the worker process.
+        pass
+
+    def interrupt(self):
+        # Our request thread notices new requests by itself, and tells the
+        # worker to stop.
+        pass
+
+    def _process_request_queue(self):
+        LOGGER.debug("Beginning request thread")
+
+        while not self._shutdown_requested and self._request_queue.has_request:
+            request, data = self._request_queue.dequeue()
+            if request == ScriptRequest.STOP:
+                LOGGER.debug("Ignoring STOP request while not running")
+            elif request == ScriptRequest.SHUTDOWN:
+                LOGGER.debug("Shutting down")
+                self._shutdown_requested = True
+            elif request == ScriptRequest.RERUN:
+                self._run_script(data)
+            else:
+                raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
+
+        self.on_event.send(
+            ScriptRunnerEvent.SHUTDOWN, widget_states=self._widget_states
+        )
+
+    def _has_pending_request(self):
+        return self._request_queue.has_request
+
+    def _run_script(self, rerun_data):
+        scheduler = ScriptRunScheduler.get_current()
+        if not scheduler.acquire(
+            interactive=rerun_data.widget_state is not None,
+            is_cancelled=self._has_pending_request,
+        ):
+            LOGGER.debug("Script run superseded while waiting for a slot")
+            return
+
+        try:
+            pool = ScriptWorkerPool.get_current()
+            worker = pool.acquire(is_cancelled=self._has_pending_request)
+            if worker is None:
+                LOGGER.debug("Script run superseded while waiting for a worker")
+                return
+
+            try:
+                self._run_script_in_worker(worker, rerun_data)
+            finally:
+                pool.release(worker)
+        finally:
+            scheduler.release()
+
+    def _run_script_in_worker(self, worker, rerun_data):
+        rerun_widget_state = (
+            rerun_data.widget_state.SerializeToString()
+            if rerun_data.widget_state is not None
+            else None
+        )
+        worker.send(
+            "run",
+            self._report.script_path,
+            self._report.command_line,
+            self._widget_states.SerializeToString(),
+            rerun_widget_state,
+        )
+
+        stop_sent = False
+        while True:
+            if not stop_sent and self._has_pending_request():
+                # Leave the request in the queue. We'll process it once the
+                # worker is done.
+                worker.send("stop")
+                stop_sent = True
+
+            try:
+                if not worker.conn.poll(POLL_INTERVAL_SECS):
+                    continue
+                reply = worker.conn.recv()
+            except (EOFError, IOError):
+                LOGGER.error("Script worker process exited unexpectedly")
+                self.on_event.send(
+                    ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                    exception=RuntimeError(
+                        "The process running this script exited unexpectedly."
+                    ),
+                )
+                return
+
+            kind = reply[0]
+            if kind == "msg":
+                msg = ForwardMsg()
+                msg.ParseFromString(reply[1])
+                self._report.enqueue(msg)
+            elif kind == "event":
+                event = ScriptRunnerEvent(reply[1])
+                if event == ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR:
+                    self.on_event.send(event, exception=reply[2])
+                else:
+                    self.on_event.send(event)
+            elif kind == "done":
+                self._widget_states = WidgetStates()
+                self._widget_states.ParseFromString(reply[1])
+                return
+            else:
+                raise RuntimeError("Unrecognized worker reply: %s" % kind)
+
+
+class ScriptWorkerPool(object):
+    """The pool of worker processes that ProcessScriptRunners run in.
+
+    This class is thread safe.
+    """
+
+    _singleton = None
+    _singleton_lock = threading.Lock()
+
+    @classmethod
+    def get_current(cls):
+        """Return the singleton instance, creating it if needed.
+
+        The first call forks the worker processes, so it should happen on
+        the main thread before any script threads exist. See bootstrap.run.
+        """
+        with cls._singleton_lock:
+            if cls._singleton is None:
+                ScriptWorkerPool()
+
+        return ScriptWorkerPool._singleton
+
+    def __init__(self):
+        if ScriptWorkerPool._singleton is not None:
+            raise RuntimeError(
+                "ScriptWorkerPool already initialized. Use .get_current() instead"
+            )
+
+        ScriptWorkerPool._singleton = self
+
+        # Workers that die are replaced on this IOLoop's thread. See
+        # release().
+        self._ioloop = tornado.ioloop.IOLoop.current()
+        self._cond = threading.Condition()
+        num_workers = max(1, config.get_option("runner.numProcesses"))
+        self._idle_workers = [_ScriptWorker() for _ in range(num_workers)]
+
+        LOGGER.debug("Started %s script worker processes", num_workers)
+
+    def acquire(self, is_cancelled=None):
+        """Wait for a free worker, and take it.
+
+        Parameters
+        ----------
+        is_cancelled : callable | None
+            Called periodically while waiting. If it returns True, we stop
+            waiting.
+
+        Returns
+        -------
+        _ScriptWorker | None
+            The worker, which must be returned with release(). None if
+            we were cancelled.
+
+        """
+        with self._cond:
+            while len(self._idle_workers) == 0:
+                if is_cancelled is not None and is_cancelled():
+                    return None
+                self._cond.wait(POLL_INTERVAL_SECS)
+            return self._idle_workers.pop()
+
+    def release(self, worker):
+        """Return a worker taken with acquire()."""
+        if not worker.is_alive():
+            # Replace workers that crashed, e.g. because the script called
+            # os._exit(). We're on a request thread, and forking here could
+            # copy a lock that another thread holds into the new worker, so
+            # the main thread forks the replacement.
+            LOGGER.warning("Replacing dead script worker process")
+            self._ioloop.add_callback(self._add_new_worker)
+            return
+
+        self._add_idle_worker(worker)
+
+    def _add_new_worker(self):
+        self._add_idle_worker(_ScriptWorker())
+
+    def _add_idle_worker(self, worker):
+        with self._cond:
+            self._idle_workers.append(worker)
+            self._cond.notify()
+
+
+class _ScriptWorker(object):
+    """The server process's end of a worker process."""
+
+    def __init__(self):
+        # Spawned workers wouldn't share the server's config and sys.path,
+        # so always fork, even where "spawn" is the default start method
+        # (e.g. macOS since Python 3.8). Python 2 always forks.
+        if hasattr(multiprocessing, "get_context"):
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing
+
+        self.conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_worker_main, args=(child_conn,), name="ScriptWorker"
+        )
+        # Worker processes are killed when the server exits.
+        self._process.daemon = True
+        self._process.start()
+        child_conn.close()
+
+    def send(self, *args):
+        self.conn.send(args)
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+
+def _worker_main(conn):
+    """Run scripts for the server process, until our Pipe is closed.
+
+    This is the entry point of each worker process.
+    """
+    # The server process handles Ctrl-C, and terminates us when it exits.
+    # Undo the server's signal handlers, which we inherited when forked.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # We may have been forked while the server process's scheduler was in
+    # use. Runs are already scheduled there, so start from a fresh one. Its
+    # lock may have been held by a thread that we didn't inherit, too.
+    ScriptRunScheduler._singleton = None
+    ScriptRunScheduler._singleton_lock = threading.Lock()
+
+    # Replies are sent from the script thread, and from any other threads
+    # the script enqueues messages from.
+    send_lock = threading.Lock()
+
+    def send(*args):
+        with send_lock:
+            conn.send(args)
+
+    request_queue = None
+    scriptrunner = None
+    last_run_time = time.time()
+    while True:
+        try:
+            command = conn.recv()
+        except EOFError:
+            return
+
+        if command[0] == "run":
+            run_time = time.time()
+            _drop_edited_modules(os.path.dirname(command[1]), last_run_time)
+            last_run_time = run_time
+
+            request_queue = ScriptRequestQueue()
+            scriptrunner = _start_worker_run(send, request_queue, *command[1:])
+        elif command[0] == "stop":
+            if request_queue is not None:
+                request_queue.enqueue(ScriptRequest.STOP)
+                scriptrunner.interrupt()
+        else:
+            LOGGER.error("Unrecognized worker command: %s", command[0])
+
+
+def _drop_edited_modules(script_folder, since):
+    """Remove the script's local modules that were edited after `since`
+    from sys.modules, so that the script imports them again.
+
+    In the server process, LocalSourcesWatcher does this. It can't see the
+    modules that workers import, so each worker checks its own before every
+    run.
+    """
+    for name, module in list(sys.modules.items()):
+        filepath = getattr(module, "__file__", None)
+        if filepath is None:
+            continue
+
+        filepath = os.path.abspath(filepath)
+        if not _file_is_in_folder(filepath, script_folder):
+            continue
+
+        if filepath.endswith(".pyc"):
+            # Python 2 points at the compiled file.
+            filepath = filepath[:-1]
+
+        try:
+            is_edited = os.path.getmtime(filepath) >= since
+        except OSError:
+            # The file was deleted or moved.
+            is_edited = True
+
+        if is_edited:
+            del sys.modules[name]
+
+
+def _start_worker_run(
+    send, request_queue, script_path, command_line, widget_states, rerun_widget_state
+):
+    """Start a ScriptRunner that runs the script once, and sends all its
+    messages and events to the server process.
+
+    Returns
+    -------
+    ScriptRunner
+
+    """
+
+    def enqueue(msg):
+        if not config.get_option("client.displayEnabled"):
+            return False
+
+        scriptrunner.maybe_handle_execution_control_request()
+        send("msg", msg.SerializeToString())
+        return True
+
+    def on_event(event, exception=None, widget_states=None):
+        if event == ScriptRunnerEvent.SHUTDOWN:
+            send("done", widget_states.SerializeToString())
+        else:
+            send("event", event.value, _make_picklable(exception))
+
+    states = WidgetStates()
+    states.ParseFromString(widget_states)
+
+    if rerun_widget_state is not None:
+        rerun_states = WidgetStates()
+        rerun_states.ParseFromString(rerun_widget_state)
+    else:
+        rerun_states = None
+
+    request_queue.enqueue(ScriptRequest.RERUN, RerunData(rerun_states))
+
+    scriptrunner = ScriptRunner(
+        report=Report(script_path, command_line, headless=True),
+        main_dg=DeltaGenerator(enqueue=enqueue, container=BlockPath.MAIN),
+        sidebar_dg=DeltaGenerator(enqueue=enqueue, container=BlockPath.SIDEBAR),
+        widget_states=states,
+        request_queue=request_queue,
+    )
+    scriptrunner.on_event.connect(on_event, weak=False)
+    scriptrunner.start()
+    return scriptrunner
+
+
+def _make_picklable(exception):
+    """Return the exception, or a stand-in if it can't be pickled."""
+    if exception is None:
+        return None
+
+    try:
+        pickle.dumps(exception)
+        return exception
+    except Exception:
+        return RuntimeError("%s: %s" % (type(exception).__name__, exception))
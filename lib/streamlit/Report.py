@@ -17,10 +17,13 @@ import base58
 import copy
 import json
 import os
+import threading
+import time
 import uuid
 
 from streamlit import config
 from streamlit.ReportQueue import ReportQueue
+from streamlit.ReportQueue import get_delta_key
 from streamlit import util
 
 from streamlit.logger import get_logger
@@ -31,9 +34,8 @@ LOGGER = get_logger(__name__)
 class Report(object):
     """
     Contains parameters related to running a report, and also houses
-    the two ReportQueues (master_queue and browser_queue) that are used
-    to deliver messages to a connected browser, and to serialize the
-    running report.
+    the ReportQueue that is used to deliver messages to a connected
+    browser, and to serialize the running report.
     """
 
     @classmethod
@@ -53,7 +55,7 @@ class Report(object):
         port = _get_browser_address_bar_port()
         return "http://%(host_ip)s:%(port)s" % {"host_ip": host_ip, "port": port}
 
-    def __init__(self, script_path, command_line):
+    def __init__(self, script_path, command_line, headless=False):
         """Constructor.
 
         Parameters
@@ -64,6 +66,11 @@ class Report(object):
         command_line : string
             Command line as input by the user
 
+        headless : bool
+            True if no browser is connected to this report, so its browser
+            queue is never flushed. Its messages can still be delivered via
+            mirrors; see add_mirror.
+
         """
         basename = os.path.basename(script_path)
 
@@ -71,15 +78,27 @@ class Report(object):
         self.script_folder = os.path.dirname(self.script_path)
         self.name = os.path.splitext(basename)[0]
 
-        # The master queue contains all messages that comprise the report.
-        # If the user chooses to share a saved version of the report,
-        # we serialize the contents of the master queue.
-        self._master_queue = ReportQueue()
+        # The queue contains all messages that comprise the report. If the
+        # user chooses to share a saved version of the report, we serialize
+        # its contents. It also tracks which messages haven't yet been
+        # delivered to the browser. Periodically, the server flushes those
+        # and delivers them to the browser.
+        self._queue = ReportQueue(
+            track_unsent=not headless,
+            max_bytes=config.get_option("server.maxReportSize"),
+        )
+
+        # Map: delta key -> time at which a delta with that key was last
+        # flushed to the browser. Used to throttle element updates.
+        self._delta_flush_times = {}
 
-        # The browser queue contains messages that haven't yet been
-        # delivered to the browser. Periodically, the server flushes
-        # this queue and delivers its contents to the browser.
-        self._browser_queue = ReportQueue()
+        self._headless = headless
+
+        # Reports that receive a copy of all of this report's messages.
+        # Guarded by _mirrors_lock, since messages are enqueued on the
+        # script thread.
+        self._mirrors = []
+        self._mirrors_lock = threading.Lock()
 
         self.report_id = None
         self.generate_new_id()
@@ -87,29 +106,70 @@ class Report(object):
         self.command_line = command_line
 
     def get_debug(self):
-        return {"master queue": self._master_queue.get_debug()}
+        return {"queue": self._queue.get_debug()}
 
     def enqueue(self, msg):
-        self._master_queue.enqueue(msg)
-        self._browser_queue.enqueue(msg)
+        with self._mirrors_lock:
+            self._queue.enqueue(msg)
+            for mirror in self._mirrors:
+                mirror.enqueue(msg)
 
     def clear(self):
-        # Master_queue retains its initial message; browser_queue is
-        # completely cleared.
-        initial_msg = self._master_queue.get_initial_msg()
-        self._master_queue.clear()
-        if initial_msg:
-            self._master_queue.enqueue(initial_msg)
+        with self._mirrors_lock:
+            self._clear()
+            for mirror in self._mirrors:
+                mirror.clear()
+
+    def _clear(self):
+        # The queue retains its initial message, but nothing is left to be
+        # delivered to the browser.
+        self._queue.clear(retain_initial_msg=True)
+        self._delta_flush_times = {}
+
+    def add_mirror(self, report):
+        """Mirror this report's messages into another report.
+
+        The other report's queue is replaced with a replay of this report's
+        queue, and from then on it receives every message enqueued
+        into this report, until remove_mirror is called.
+
+        Parameters
+        ----------
+        report : Report
+
+        """
+        with self._mirrors_lock:
+            report._queue.clear()
+            report._delta_flush_times = {}
+            for msg in self._queue:
+                report.enqueue(msg)
+            self._mirrors.append(report)
 
-        self._browser_queue.clear()
+    def remove_mirror(self, report):
+        """Stop mirroring this report's messages into another report.
+
+        Parameters
+        ----------
+        report : Report
+
+        """
+        with self._mirrors_lock:
+            if report in self._mirrors:
+                self._mirrors.remove(report)
 
     def flush_browser_queue(self):
-        """Clears our browser queue and returns the messages it contained.
+        """Returns the messages that haven't been delivered to the browser.
 
         The Server calls this periodically to deliver new messages
         to the browser connected to this report.
 
-        This doesn't affect the master_queue.
+        If server.maxElementUpdateRate is set, an element that was already
+        flushed within the last 1/maxElementUpdateRate seconds is held back
+        in the queue, where further updates to it get composed, and is
+        delivered in a later flush.
+
+        The messages stay in the queue, so the report can still be
+        serialized or replayed in full.
 
         Returns
         -------
@@ -118,7 +178,27 @@ class Report(object):
             be delivered to the browser.
 
         """
-        return self._browser_queue.flush()
+        max_rate = config.get_option("server.maxElementUpdateRate")
+        if not max_rate:
+            return self._queue.flush_unsent()
+
+        now = time.time()
+        min_interval = 1.0 / max_rate
+        flush_times = self._delta_flush_times
+
+        def should_hold(msg):
+            # Never hold back blocks, since their children may be
+            # delivered before them.
+            if msg.delta.WhichOneof("type") == "new_block":
+                return False
+            last_flush_time = flush_times.get(get_delta_key(msg))
+            return last_flush_time is not None and now - last_flush_time < min_interval
+
+        msgs = self._queue.flush_unsent(should_hold)
+        for msg in msgs:
+            if msg.HasField("delta"):
+                flush_times[get_delta_key(msg)] = now
+        return msgs
 
     def generate_new_id(self):
         """Randomly generate an ID representing this report's execution."""
@@ -163,9 +243,7 @@ class Report(object):
         LOGGER.debug("Serializing final report")
 
         messages = [
-            copy.deepcopy(msg)
-            for msg in self._master_queue
-            if _should_save_report_msg(msg)
+            copy.deepcopy(msg) for msg in self._queue if _should_save_report_msg(msg)
         ]
 
         first_delta_index = 0
@@ -18,6 +18,7 @@ A queue of ForwardMsg associated with a particular report.
 Whenever possible, message deltas are combined.
 """
 
+import collections
 import copy
 import threading
 
@@ -27,13 +28,40 @@ from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
 
+# Queues are compacted whenever their length doubles, but not before they
+# hold this many messages.
+MIN_COMPACTION_LEN = 100
+
+# When a queue goes over its max_bytes, old deltas are dropped until it's
+# down to this fraction of max_bytes, so that it isn't compacted again
+# right away.
+COMPACTION_TARGET_RATIO = 0.75
+
+# Elements that add_rows can be called on.
+_ADD_ROWS_ELEMENT_TYPES = frozenset(
+    ["chart", "data_frame", "deck_gl_chart", "table", "vega_lite_chart"]
+)
+
 
 class ReportQueue(object):
     """Thread-safe queue that smartly accumulates the report's messages."""
 
-    def __init__(self):
-        """Constructor."""
+    def __init__(self, track_unsent=False, max_bytes=0):
+        """Constructor.
+
+        Parameters
+        ----------
+        track_unsent : bool
+            If True, the queue also keeps track of which of its messages
+            haven't been sent to the browser yet. See flush_unsent().
+        max_bytes : int
+            If nonzero, the oldest elements are dropped from the queue when
+            its messages take up more than this many bytes. See compact().
+
+        """
         self._lock = threading.Lock()
+        self._track_unsent = track_unsent
+        self._max_bytes = max_bytes
 
         with self._lock:
             self._queue = []
@@ -42,24 +70,47 @@ class ReportQueue(object):
             # where delta_path = (container, parent block path as a string)
             self._delta_index_map = dict()
 
+            # Map: _queue index -> list of add_rows messages that haven't
+            # been composed into the message at that index yet. Composing
+            # copies the whole DataFrame, so we only do it once, when the
+            # message is read.
+            self._pending_add_rows = dict()
+
+            # Map: _queue index -> number of rows in _pending_add_rows[index]
+            self._pending_num_rows = dict()
+
+            # Map: _queue index -> None if the message at that index hasn't
+            # been sent at all, or the list of add_rows messages that were
+            # composed into it since it was sent. Ordered the way the
+            # messages must be sent. Only used if track_unsent is True.
+            self._unsent = collections.OrderedDict()
+
+            self._reset_compaction_state()
+
     def get_debug(self):
         from google.protobuf.json_format import MessageToDict
 
-        return {
-            "queue": [MessageToDict(m) for m in self._queue],
-            "ids": list(self._delta_index_map.keys()),
-        }
+        with self._lock:
+            self._compose_pending_add_rows()
+            return {
+                "queue": [MessageToDict(m) for m in self._queue],
+                "ids": list(self._delta_index_map.keys()),
+            }
 
     def __iter__(self):
-        return iter(self._queue)
+        with self._lock:
+            self._compose_pending_add_rows()
+            return iter(list(self._queue))
 
     def is_empty(self):
         return len(self._queue) == 0
 
     def get_initial_msg(self):
-        if len(self._queue) > 0:
-            return self._queue[0]
-        return None
+        with self._lock:
+            if len(self._queue) > 0:
+                self._compose_pending_add_rows(0)
+                return self._queue[0]
+            return None
 
     def enqueue(self, msg):
         """Add message into queue, possibly composing it with another message.
@@ -69,57 +120,453 @@ class ReportQueue(object):
         msg : ForwardMsg
         """
         with self._lock:
-            # Optimize only if it's a delta message
-            if not msg.HasField("delta"):
-                self._queue.append(msg)
-            else:
-                # Deltas are uniquely identified by the combination of their
-                # container and ID.
-                delta_path = (
-                    msg.metadata.parent_block.container,
-                    tuple(msg.metadata.parent_block.path),
-                )
-                delta_key = (delta_path, msg.metadata.delta_id)
-
-                if delta_key in self._delta_index_map:
-                    # Combine the previous message into the new message.
-                    index = self._delta_index_map[delta_key]
-                    old_msg = self._queue[index]
-                    composed_delta = compose_deltas(old_msg.delta, msg.delta)
-                    new_msg = ForwardMsg()
-                    new_msg.delta.CopyFrom(composed_delta)
-                    new_msg.metadata.CopyFrom(msg.metadata)
-                    self._queue[index] = new_msg
-                else:
-                    # Append this message to the queue, and store its index
-                    # for future combining.
-                    self._delta_index_map[delta_key] = len(self._queue)
-                    self._queue.append(msg)
+            self._enqueue(msg)
+
+            if self._max_bytes:
+                # An overestimate, since composed messages are counted in
+                # full. It's corrected on compaction.
+                self._num_bytes += msg.ByteSize()
+
+            if len(self._queue) >= self._compact_at_len or (
+                self._max_bytes and self._num_bytes > self._compact_at_bytes
+            ):
+                self._compact()
+
+    def _enqueue(self, msg):
+        # Optimize only if it's a delta message
+        if not msg.HasField("delta"):
+            self._append(msg)
+            return
+
+        delta_key = get_delta_key(msg)
+        index = self._delta_index_map.get(delta_key)
+
+        if index is None:
+            # Append this message to the queue, and store its index
+            # for future combining.
+            self._delta_index_map[delta_key] = len(self._queue)
+            self._append(msg)
+            return
+
+        is_add_rows = msg.delta.WhichOneof("type") == "add_rows"
+        if not is_add_rows:
+            # The new message replaces the old one entirely.
+            self._pending_add_rows.pop(index, None)
+            self._pending_num_rows.pop(index, None)
+
+        if not is_add_rows or not self._defer_add_rows(index, msg):
+            # Combine the previous message into the new message.
+            self._compose_pending_add_rows(index)
+            old_msg = self._queue[index]
+            composed_delta = compose_deltas(old_msg.delta, msg.delta)
+            new_msg = ForwardMsg()
+            new_msg.delta.CopyFrom(composed_delta)
+            new_msg.metadata.CopyFrom(msg.metadata)
+            self._queue[index] = new_msg
+
+        self._mark_unsent(index, msg if is_add_rows else None)
+
+    def _append(self, msg):
+        if self._track_unsent:
+            self._unsent[len(self._queue)] = None
+        self._queue.append(msg)
+
+    def _mark_unsent(self, index, add_rows_msg=None):
+        """Record that the message at an index changed since it was sent.
+
+        Parameters
+        ----------
+        index : int
+            The _queue index of the message.
+        add_rows_msg : ForwardMsg | None
+            If the message changed because this add_rows message was
+            composed into it, only these rows need to be sent. Otherwise,
+            the whole message does.
+
+        """
+        if not self._track_unsent:
+            return
+
+        if index not in self._unsent:
+            self._unsent[index] = None if add_rows_msg is None else [add_rows_msg]
+            return
+
+        sent_add_rows = self._unsent[index]
+        if sent_add_rows is None:
+            # The whole message will be sent anyway.
+            return
+        if add_rows_msg is None:
+            # This keeps the message's place in the send order.
+            self._unsent[index] = None
+        else:
+            sent_add_rows.append(add_rows_msg)
+
+    def _defer_add_rows(self, index, msg):
+        """Append an add_rows message to the pending ones for an index.
+
+        Returns False, without deferring it, if the message might not
+        compose cleanly. It's then composed right away, so that errors are
+        raised to the caller, just like they would be without deferral.
+        """
+        import streamlit.elements.data_frame_proto as data_frame_proto
+
+        if not data_frame_proto.can_append_rows(
+            self._queue[index].delta, msg.delta, name=msg.delta.add_rows.name
+        ):
+            return False
+
+        self._pending_add_rows.setdefault(index, []).append(msg)
+        num_rows = self._pending_num_rows.get(index, 0)
+        num_rows += data_frame_proto.get_num_rows(msg.delta.add_rows.data)
+        self._pending_num_rows[index] = num_rows
+
+        # Rows beyond the add_rows window will be dropped anyway, so don't
+        # let them pile up. Otherwise, a queue that's rarely read in full
+        # would grow forever.
+        max_rows = msg.delta.add_rows.max_rows
+        if max_rows and num_rows > max_rows:
+            self._compose_pending_add_rows(index)
+
+        return True
+
+    def _compose_pending_add_rows(self, index=None):
+        """Compose pending add_rows messages into the message they apply to.
+
+        Parameters
+        ----------
+        index : int | None
+            The _queue index of the message. If None, all pending add_rows
+            messages are composed.
+
+        """
+        if index is None:
+            indices = list(self._pending_add_rows.keys())
+        else:
+            indices = [index]
+
+        for index in indices:
+            pending = self._pending_add_rows.pop(index, None)
+            self._pending_num_rows.pop(index, None)
+            if pending is None:
+                continue
+
+            self._queue[index] = _compose_add_rows(self._queue[index], pending)
 
     def clone(self):
         """Return the elements of this ReportQueue as a collections.deque."""
-        r = ReportQueue()
+        r = ReportQueue(track_unsent=self._track_unsent, max_bytes=self._max_bytes)
 
         with self._lock:
             r._queue = list(self._queue)
             r._delta_index_map = dict(self._delta_index_map)
+            r._pending_add_rows = dict(
+                (index, list(pending))
+                for index, pending in self._pending_add_rows.items()
+            )
+            r._pending_num_rows = dict(self._pending_num_rows)
+            r._unsent = collections.OrderedDict(
+                (index, None if sent_add_rows is None else list(sent_add_rows))
+                for index, sent_add_rows in self._unsent.items()
+            )
 
         return r
 
     def _clear(self):
         self._queue = []
         self._delta_index_map = dict()
+        self._pending_add_rows = dict()
+        self._pending_num_rows = dict()
+        self._unsent = collections.OrderedDict()
+        self._reset_compaction_state()
+
+    def _reset_compaction_state(self):
+        self._num_bytes = 0
+        self._compact_at_len = MIN_COMPACTION_LEN
+        self._compact_at_bytes = self._max_bytes
+
+    def compact(self):
+        """Drop messages that no longer affect the report.
+
+        This is done automatically as messages are enqueued, so that the
+        queue's memory stays bounded, even for scripts that run forever.
+
+        - Deltas whose parent block was replaced by another element are
+          dropped, along with their own children.
+        - If the queue was created with max_bytes, the oldest elements are
+          dropped until the queue fits. The report then no longer
+          contains them when it's saved or replayed. Blocks, and elements
+          that support add_rows, are kept.
+
+        Messages that haven't been sent to the browser, and non-delta
+        messages, are never dropped.
+        """
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        self._compose_pending_add_rows()
+
+        keep = self._get_live_messages(self._queue)
+
+        num_bytes = 0
+        if self._max_bytes:
+            sizes = [msg.ByteSize() if k else 0 for msg, k in zip(self._queue, keep)]
+            num_bytes = sum(sizes)
+
+            target_bytes = self._max_bytes * COMPACTION_TARGET_RATIO
+            for index, msg in enumerate(self._queue):
+                if num_bytes <= target_bytes:
+                    break
+                if keep[index] and self._is_droppable_to_save_space(index, msg):
+                    keep[index] = False
+                    num_bytes -= sizes[index]
+
+            if num_bytes > self._max_bytes:
+                LOGGER.debug(
+                    "Report queue is over its %s byte limit: %s bytes",
+                    self._max_bytes,
+                    num_bytes,
+                )
+
+        new_indices = {}
+        queue = []
+        for index, msg in enumerate(self._queue):
+            if keep[index]:
+                new_indices[index] = len(queue)
+                queue.append(msg)
+
+        if len(queue) < len(self._queue):
+            LOGGER.debug(
+                "Compacted report queue from %s to %s messages",
+                len(self._queue),
+                len(queue),
+            )
+
+        self._queue = queue
+        self._delta_index_map = dict(
+            (get_delta_key(msg), index)
+            for index, msg in enumerate(queue)
+            if msg.HasField("delta")
+        )
+        self._unsent = collections.OrderedDict(
+            (new_indices[index], sent_add_rows)
+            for index, sent_add_rows in self._unsent.items()
+        )
+
+        self._num_bytes = num_bytes
+        self._compact_at_len = max(MIN_COMPACTION_LEN, 2 * len(queue))
+        if num_bytes <= self._max_bytes:
+            self._compact_at_bytes = self._max_bytes
+        else:
+            # We couldn't drop enough. Don't try again until it's worth it.
+            self._compact_at_bytes = 2 * num_bytes
+
+    def _is_droppable(self, index, msg):
+        return msg.HasField("delta") and index not in self._unsent
+
+    def _is_droppable_to_save_space(self, index, msg):
+        # Blocks are kept, since dropping them would drop their children.
+        # And elements that support add_rows are kept, since rows added to
+        # them later would have nothing to be added to.
+        return (
+            self._is_droppable(index, msg)
+            and msg.delta.WhichOneof("type") == "new_element"
+            and msg.delta.new_element.WhichOneof("type") not in _ADD_ROWS_ELEMENT_TYPES
+        )
+
+    def _get_live_messages(self, queue):
+        """Return a list of booleans that say which messages to keep.
+
+        Deltas are dropped if their parent block isn't a block anymore.
+        Blocks always come before their children in the queue.
+        """
+        keep = [True] * len(queue)
+        live_blocks = set()
+        for index, msg in enumerate(queue):
+            if not msg.HasField("delta"):
+                continue
+
+            container = msg.metadata.parent_block.container
+            path = tuple(msg.metadata.parent_block.path)
+            if len(path) > 0:
+                parent_key = ((container, path[:-1]), path[-1])
+                if parent_key not in live_blocks and self._is_droppable(index, msg):
+                    keep[index] = False
+                    continue
+
+            if msg.delta.WhichOneof("type") == "new_block":
+                live_blocks.add(get_delta_key(msg))
+
+        return keep
+
+    def clear(self, retain_initial_msg=False):
+        """Clear this queue.
+
+        Parameters
+        ----------
+        retain_initial_msg : bool
+            If True, the first message stays in the queue. It's considered
+            sent, whether or not it was.
 
-    def clear(self):
-        """Clear this queue."""
+        """
         with self._lock:
+            initial_msg = None
+            if retain_initial_msg and len(self._queue) > 0:
+                self._compose_pending_add_rows(0)
+                initial_msg = self._queue[0]
+
             self._clear()
 
-    def flush(self):
+            if initial_msg is not None:
+                if initial_msg.HasField("delta"):
+                    self._delta_index_map[get_delta_key(initial_msg)] = 0
+                self._queue.append(initial_msg)
+
+    def flush(self, should_hold=None):
+        """Clear the queue and return the messages it contained.
+
+        Parameters
+        ----------
+        should_hold : callable | None
+            If set, this is called with each delta message in the queue.
+            Deltas for which it returns True are held back: they stay in the
+            queue, where later deltas with the same key will be composed
+            into them. To preserve ordering, non-delta messages that come
+            after a held-back delta are held back too, along with
+            everything that follows them.
+
+        Returns
+        -------
+        list[ForwardMsg]
+            The messages that were removed from the queue.
+
+        """
         with self._lock:
-            queue = self._queue
-            self._clear()
-        return queue
+            self._compose_pending_add_rows()
+
+            if should_hold is None:
+                queue = self._queue
+                self._clear()
+                return queue
+
+            flushed = []
+            held = []
+            for index, msg in enumerate(self._queue):
+                if not msg.HasField("delta"):
+                    if len(held) > 0:
+                        held.extend(self._queue[index:])
+                        break
+                    flushed.append(msg)
+                elif should_hold(msg):
+                    held.append(msg)
+                else:
+                    flushed.append(msg)
+
+            self._queue = held
+            self._delta_index_map = dict(
+                (get_delta_key(msg), index)
+                for index, msg in enumerate(held)
+                if msg.HasField("delta")
+            )
+
+        return flushed
+
+    def flush_unsent(self, should_hold=None):
+        """Return the messages that haven't been sent yet, and consider
+        them sent.
+
+        Unlike flush(), this leaves the queue intact, so it can still be
+        replayed in full. Messages that changed since they were sent are
+        returned again: just the new rows for add_rows, or else the whole
+        message.
+
+        This only returns messages if the queue was created with
+        track_unsent=True.
+
+        Parameters
+        ----------
+        should_hold : callable | None
+            If set, this is called with each unsent delta message. See
+            flush(). Held-back messages stay unsent.
+
+        Returns
+        -------
+        list[ForwardMsg]
+
+        """
+        with self._lock:
+            flushed = []
+            held = collections.OrderedDict()
+            unsent = list(self._unsent.items())
+
+            for position, (index, sent_add_rows) in enumerate(unsent):
+                msg = self._get_unsent_msg(index, sent_add_rows)
+                if not msg.HasField("delta"):
+                    if len(held) > 0:
+                        held.update(unsent[position:])
+                        break
+                    flushed.append(msg)
+                elif should_hold is not None and should_hold(msg):
+                    held[index] = sent_add_rows
+                else:
+                    flushed.append(msg)
+
+            self._unsent = held
+
+        return flushed
+
+    def _get_unsent_msg(self, index, sent_add_rows):
+        if sent_add_rows is None:
+            self._compose_pending_add_rows(index)
+            return self._queue[index]
+
+        if len(sent_add_rows) > 1:
+            # Compose them once, in case the message is held back again.
+            sent_add_rows[:] = [_compose_add_rows(sent_add_rows[0], sent_add_rows[1:])]
+        return sent_add_rows[0]
+
+
+def _compose_add_rows(msg, add_rows_msgs):
+    """Return a new message with add_rows messages composed into msg."""
+    import streamlit.elements.data_frame_proto as data_frame_proto
+
+    # A single copy of the old delta, to which we add all the rows.
+    composed_delta = copy.deepcopy(msg.delta)
+    for add_rows_msg in add_rows_msgs:
+        data_frame_proto.add_rows(
+            composed_delta,
+            add_rows_msg.delta,
+            name=add_rows_msg.delta.add_rows.name,
+            max_rows=add_rows_msg.delta.add_rows.max_rows,
+        )
+
+    new_msg = ForwardMsg()
+    new_msg.delta.CopyFrom(composed_delta)
+    new_msg.metadata.CopyFrom(add_rows_msgs[-1].metadata)
+    return new_msg
+
+
+def get_delta_key(msg):
+    """Return the key that uniquely identifies a delta message's element.
+
+    Deltas are uniquely identified by the combination of their container,
+    parent block path and ID.
+
+    Parameters
+    ----------
+    msg : ForwardMsg
+        A ForwardMsg whose type is "delta".
+
+    Returns
+    -------
+    tuple
+
+    """
+    delta_path = (
+        msg.metadata.parent_block.container,
+        tuple(msg.metadata.parent_block.path),
+    )
+    return (delta_path, msg.metadata.delta_id)
 
 
 def compose_deltas(old_delta, new_delta):
@@ -145,7 +592,10 @@ def compose_deltas(old_delta, new_delta):
         # mutated.
         composed_delta = copy.deepcopy(old_delta)
         data_frame_proto.add_rows(
-            composed_delta, new_delta, name=new_delta.add_rows.name
+            composed_delta,
+            new_delta,
+            name=new_delta.add_rows.name,
+            max_rows=new_delta.add_rows.max_rows,
         )
         return composed_delta
 
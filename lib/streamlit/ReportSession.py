@@ -26,12 +26,17 @@ from streamlit import caching
 from streamlit import config
 from streamlit import util
 from streamlit.DeltaGenerator import DeltaGenerator
+from streamlit.ProcessScriptRunner import ProcessScriptRunner
+from streamlit.ProcessScriptRunner import use_worker_processes
 from streamlit.Report import Report
 from streamlit.ScriptRequestQueue import RerunData
 from streamlit.ScriptRequestQueue import ScriptRequest
 from streamlit.ScriptRequestQueue import ScriptRequestQueue
 from streamlit.ScriptRunner import ScriptRunner
 from streamlit.ScriptRunner import ScriptRunnerEvent
+from streamlit.SharedReportRun import SharedReportRun
+from streamlit.SharedReportRun import get_widget_states_key
+from streamlit.SharedReportRun import has_trigger_value
 from streamlit.credentials import Credentials
 from streamlit.logger import get_logger
 from streamlit.proto.BlockPath_pb2 import BlockPath
@@ -62,7 +67,7 @@ class ReportSession(object):
 
     _next_id = 0
 
-    def __init__(self, ioloop, script_path, command_line):
+    def __init__(self, ioloop, script_path, command_line, headless=False):
         """Initialize the ReportSession.
 
         Parameters
@@ -76,13 +81,17 @@ class ReportSession(object):
         command_line : str
             Command line as input by the user.
 
+        headless : bool
+            True if no browser will ever be connected to this session. This
+            is the case for sessions that run a SharedReportRun.
+
         """
         # Each ReportSession gets a unique ID
         self.id = ReportSession._next_id
         ReportSession._next_id += 1
 
         self._ioloop = ioloop
-        self._report = Report(script_path, command_line)
+        self._report = Report(script_path, command_line, headless)
 
         self._state = ReportSessionState.REPORT_NOT_RUNNING
 
@@ -106,6 +115,14 @@ class ReportSession(object):
 
         self._scriptrunner = None
 
+        # The SharedReportRun we're subscribed to, if server.shareScriptRuns
+        # is set.
+        self._shared_run = None
+
+        # The widget states of the SharedReportRun we'll subscribe to once
+        # our ScriptRunner has shut down.
+        self._pending_shared_widget_states = None
+
         LOGGER.debug("ReportSession initialized (id=%s)", self.id)
 
     def flush_browser_queue(self):
@@ -140,6 +157,8 @@ class ReportSession(object):
 
             self._state = ReportSessionState.SHUTDOWN_REQUESTED
             self._local_sources_watcher.close()
+            self._unsubscribe_from_shared_run()
+            self._pending_shared_widget_states = None
 
     def enqueue(self, msg):
         """Enqueues a new ForwardMsg to our browser queue.
@@ -213,6 +232,10 @@ class ReportSession(object):
 
     def _on_source_file_changed(self):
         """One of our source files changed. Schedule a rerun if appropriate."""
+        if self._shared_run is not None:
+            # The shared run's own session handles this.
+            return
+
         if self._run_on_save:
             self.request_rerun()
         else:
@@ -303,6 +326,14 @@ class ReportSession(object):
             def on_shutdown():
                 self._widget_states = widget_states
                 self._scriptrunner = None
+
+                if self._pending_shared_widget_states is not None:
+                    # The shared run supersedes any requests that our
+                    # ScriptRunner didn't get to.
+                    self._script_request_queue = ScriptRequestQueue()
+                    self._subscribe_to_shared_run(self._pending_shared_widget_states)
+                    return
+
                 # Because a new ScriptEvent could have been enqueued while the
                 # scriptrunner was shutting down, we check to see if we should
                 # create a new one. (Otherwise, a newly-enqueued ScriptEvent
@@ -428,10 +459,109 @@ class ReportSession(object):
                 LOGGER.debug("Skipping rerun since the preheated run is the same")
                 return
 
+        if not is_preheat and config.get_option("server.shareScriptRuns"):
+            self._handle_shared_rerun_request(widget_state)
+            return
+
         self.request_rerun(widget_state)
 
+    def _handle_shared_rerun_request(self, widget_state):
+        """Handle a rerun request by subscribing to a SharedReportRun.
+
+        Parameters
+        ----------
+        widget_state : WidgetStates | None
+            See handle_rerun_script_request.
+
+        """
+        if widget_state is None:
+            # Only this viewer asked for the rerun, so it doesn't rerun the
+            # shared run of the other subscribers.
+            self._run_locally()
+            self.request_rerun()
+            return
+
+        if has_trigger_value(widget_state):
+            LOGGER.debug("Not sharing run with triggered widgets (id=%s)", self.id)
+            self._run_locally()
+            self.request_rerun(widget_state)
+            return
+
+        key = get_widget_states_key(widget_state)
+        if (self._shared_run is not None and self._shared_run.key == key) or (
+            self._pending_shared_widget_states is not None
+            and get_widget_states_key(self._pending_shared_widget_states) == key
+        ):
+            # We're already subscribed to a run with these widget states.
+            return
+
+        self._unsubscribe_from_shared_run()
+        if self._scriptrunner is not None:
+            # Our ScriptRunner enqueues into the Report that the shared run
+            # will be mirrored into. Subscribe once it has shut down, so
+            # that their messages don't interleave.
+            self._pending_shared_widget_states = widget_state
+            self._enqueue_script_request(ScriptRequest.SHUTDOWN)
+            return
+
+        self._subscribe_to_shared_run(widget_state)
+
+    def _subscribe_to_shared_run(self, widget_state):
+        self._pending_shared_widget_states = None
+        self._widget_states = widget_state
+        self._shared_run = SharedReportRun.subscribe(
+            self, widget_state, self._create_shared_runner
+        )
+
+    def _run_locally(self):
+        """Stop sharing runs, so that the next run is our own."""
+        self._unsubscribe_from_shared_run()
+        self._pending_shared_widget_states = None
+
+    def _create_shared_runner(self):
+        return ReportSession(
+            ioloop=self._ioloop,
+            script_path=self._report.script_path,
+            command_line=self._report.command_line,
+            headless=True,
+        )
+
+    def _unsubscribe_from_shared_run(self):
+        if self._shared_run is not None:
+            self._shared_run.unsubscribe(self)
+            self._shared_run = None
+
+    def add_mirror(self, session):
+        """Mirror this session's report into another session's report.
+
+        Parameters
+        ----------
+        session : ReportSession
+
+        """
+        self._report.add_mirror(session._report)
+
+    def remove_mirror(self, session):
+        """Stop mirroring this session's report into another session's report.
+
+        Parameters
+        ----------
+        session : ReportSession
+
+        """
+        self._report.remove_mirror(session._report)
+
     def handle_stop_script_request(self):
         """Tells the ScriptRunner to stop running its report."""
+        if self._shared_run is not None:
+            # Stop mirroring the shared run, which goes on for its other
+            # subscribers.
+            self._run_locally()
+            self._enqueue_report_finished_message(ForwardMsg.FINISHED_SUCCESSFULLY)
+            self._enqueue_session_state_changed_message()
+            return
+
+        self._pending_shared_widget_states = None
         self._enqueue_script_request(ScriptRequest.STOP)
 
     def handle_clear_cache_request(self):
@@ -460,6 +590,13 @@ class ReportSession(object):
         self._run_on_save = new_value
         self._enqueue_session_state_changed_message()
 
+        if self._shared_run is not None:
+            # The shared run uses its own run_on_save flag, and our
+            # LocalSourcesWatcher doesn't know the modules that the script
+            # imports yet. Run the script here from now on.
+            self._run_locally()
+            self.request_rerun()
+
     def _enqueue_script_request(self, request, data=None):
         """Enqueue a ScriptEvent into our ScriptEventQueue.
 
@@ -480,6 +617,11 @@ class ReportSession(object):
             return
 
         self._script_request_queue.enqueue(request, data)
+
+        # Stop the running script, if any, so it handles the request.
+        if self._scriptrunner is not None:
+            self._scriptrunner.interrupt()
+
         self._maybe_create_scriptrunner()
 
     def _maybe_create_scriptrunner(self):
@@ -500,7 +642,12 @@ class ReportSession(object):
             return
 
         # Create the ScriptRunner, attach event handlers, and start it
-        self._scriptrunner = ScriptRunner(
+        if use_worker_processes():
+            scriptrunner_class = ProcessScriptRunner
+        else:
+            scriptrunner_class = ScriptRunner
+
+        self._scriptrunner = scriptrunner_class(
             report=self._report,
             main_dg=self._main_dg,
             sidebar_dg=self._sidebar_dg,
@@ -15,6 +15,7 @@
 
 import threading
 from collections import namedtuple
+from contextlib import contextmanager
 
 from streamlit.logger import get_logger
 
@@ -38,10 +39,22 @@ REPORT_CONTEXT_ATTR_NAME = "streamlit_report_ctx"
 class ReportThread(threading.Thread):
     """Extends threading.Thread with a ReportContext member"""
 
-    def __init__(self, main_dg, sidebar_dg, widgets, target=None, name=None):
+    def __init__(
+        self,
+        main_dg,
+        sidebar_dg,
+        widgets,
+        target=None,
+        name=None,
+        streamlit_call_ctx=None,
+    ):
         super(ReportThread, self).__init__(target=target, name=name)
         self.streamlit_report_ctx = ReportContext(main_dg, sidebar_dg, widgets)
 
+        # A function that returns a context for Streamlit code called by the
+        # script, or None. See streamlit_call().
+        self.streamlit_call_ctx = streamlit_call_ctx
+
 
 def add_report_ctx(thread):
     """Adds the current ReportContext to a newly-created thread.
@@ -85,5 +98,23 @@ def get_report_ctx():
     return ctx
 
 
+@contextmanager
+def streamlit_call():
+    """A context for Streamlit code that the user's script calls, like
+    creating and enqueuing an element.
+
+    The script isn't interrupted asynchronously while it's inside this
+    context, so the interruption can't leave Streamlit in a bad state.
+
+    """
+    thread = threading.current_thread()
+    streamlit_call_ctx = getattr(thread, "streamlit_call_ctx", None)
+    if streamlit_call_ctx is None:
+        yield
+    else:
+        with streamlit_call_ctx():
+            yield
+
+
 # Avoid circular dependencies in Python 2
 import streamlit
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Limits how many scripts run at once, across all ReportSessions."""
+
+import heapq
+import itertools
+import threading
+import time
+
+from streamlit import config
+from streamlit import metrics
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# How often a waiting script thread checks whether its run was cancelled.
+CANCEL_CHECK_INTERVAL_SECS = 0.1
+
+# Priorities for waiting runs. Lower values run first.
+INTERACTIVE_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+
+
+class ScriptRunScheduler(object):
+    """Hands out a limited number of run slots to ScriptRunners.
+
+    Every ScriptRunner acquires a slot before running its script, and
+    releases it afterwards. When runner.maxConcurrentRuns slots are taken,
+    runs wait in a queue. Interactive runs (i.e. reruns with new widget
+    values) are served before background ones (e.g. preheating and reruns
+    on file changes), and runs of the same priority are served in the order
+    they arrived. Since each ReportSession has at most one ScriptRunner,
+    this is also fair across sessions.
+
+    This class is thread safe.
+    """
+
+    _singleton = None
+    _singleton_lock = threading.Lock()
+
+    @classmethod
+    def get_current(cls):
+        """Return the singleton instance, creating it if needed.
+
+        This is called from the script threads of sessions that may start at
+        the same time.
+        """
+        with cls._singleton_lock:
+            if cls._singleton is None:
+                ScriptRunScheduler()
+
+        return ScriptRunScheduler._singleton
+
+    def __init__(self):
+        if ScriptRunScheduler._singleton is not None:
+            raise RuntimeError(
+                "ScriptRunScheduler already initialized. Use .get_current() instead"
+            )
+
+        ScriptRunScheduler._singleton = self
+
+        self._cond = threading.Condition()
+        self._num_running = 0
+
+        # Heap of (priority, sequence number) tickets for waiting runs.
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    def acquire(self, interactive, is_cancelled=None):
+        """Wait until the calling thread may run a script.
+
+        Parameters
+        ----------
+        interactive : bool
+            True if the run was caused by a user interacting with a widget.
+        is_cancelled : callable | None
+            Called periodically while waiting. If it returns True, we stop
+            waiting and the slot is not acquired.
+
+        Returns
+        -------
+        bool
+            True if a slot was acquired, and must be released with
+            release(). False if the run was cancelled while waiting.
+
+        """
+        priority = INTERACTIVE_PRIORITY if interactive else BACKGROUND_PRIORITY
+        ticket = (priority, next(self._sequence))
+        start_time = time.time()
+
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            metrics.Client.get("streamlit_script_runs_waiting").inc()
+            try:
+                while not self._can_run(ticket):
+                    if is_cancelled is not None and is_cancelled():
+                        return False
+                    self._cond.wait(CANCEL_CHECK_INTERVAL_SECS)
+                self._num_running += 1
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                metrics.Client.get("streamlit_script_runs_waiting").dec()
+                # The next waiting run may be able to go now.
+                self._cond.notify_all()
+
+        wait_secs = time.time() - start_time
+        metrics.Client.get("streamlit_script_run_queue_wait_seconds").observe(wait_secs)
+        LOGGER.debug("Acquired run slot after waiting %.3fs", wait_secs)
+        return True
+
+    def release(self):
+        """Release a slot acquired with acquire()."""
+        with self._cond:
+            self._num_running -= 1
+            self._cond.notify_all()
+
+    def _can_run(self, ticket):
+        if self._waiting[0] != ticket:
+            return False
+        max_runs = config.get_option("runner.maxConcurrentRuns")
+        return max_runs <= 0 or self._num_running < max_runs
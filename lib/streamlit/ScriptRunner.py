@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ctypes
 import sys
 import threading
 from contextlib import contextmanager
@@ -21,9 +22,10 @@ from enum import Enum
 from blinker import Signal
 
 from streamlit import config
-from streamlit import magic
+from streamlit import script_cache
 from streamlit.ReportThread import ReportThread
 from streamlit.ScriptRequestQueue import ScriptRequest
+from streamlit.ScriptRunScheduler import ScriptRunScheduler
 from streamlit.logger import get_logger
 from streamlit.widgets import Widgets
 
@@ -104,8 +106,20 @@ class ScriptRunner(object):
         self._shutdown_requested = False
 
         # Set to true while we're executing. Used by
-        # maybe_handle_execution_control_request.
+        # maybe_handle_execution_control_request and interrupt.
         self._execing = False
+        self._execing_lock = threading.Lock()
+
+        # Used by interrupt(), and also guarded by _execing_lock:
+        # - How many Streamlit calls the script thread is inside of. See
+        #   _streamlit_call.
+        # - Whether we raised an exception in the script thread that it may
+        #   not have seen yet.
+        # - Whether we didn't interrupt the script because it was inside a
+        #   Streamlit call, so it must handle its requests when it returns.
+        self._streamlit_call_depth = 0
+        self._async_exc_pending = False
+        self._interrupt_deferred = False
 
         # This is initialized in start()
         self._script_thread = None
@@ -125,6 +139,7 @@ class ScriptRunner(object):
             widgets=self._widgets,
             target=self._process_request_queue,
             name="ScriptRunner.scriptThread",
+            streamlit_call_ctx=self._streamlit_call,
         )
         self._script_thread.start()
 
@@ -175,6 +190,11 @@ class ScriptRunner(object):
             # enqueues a new ForwardEvent
             return
 
+        if self._async_exc_pending:
+            # The script is about to stop anyway. Leave the request in the
+            # queue for the request loop.
+            return
+
         # Pop the next request from our queue.
         request, data = self._request_queue.dequeue()
         if request is None:
@@ -191,6 +211,73 @@ class ScriptRunner(object):
         else:
             raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
 
+    def interrupt(self):
+        """Stop the running script as soon as possible, so that the next
+        request in the ScriptRequestQueue gets handled.
+
+        If runner.asyncInterrupt is set, we raise a StopException in the
+        script thread right away, so even scripts that don't call Streamlit
+        for a while stop promptly. We only do this while the thread is
+        running the user's code: if it's inside a Streamlit call, the
+        request is handled when the call returns. Otherwise, the request is
+        handled at the script's next Streamlit call.
+
+        This is called on the main thread.
+
+        """
+        if not config.get_option("runner.asyncInterrupt"):
+            return
+
+        if self._is_in_script_thread():
+            return
+
+        with self._execing_lock:
+            if not self._execing or self._async_exc_pending:
+                return
+
+            if self._streamlit_call_depth > 0:
+                self._interrupt_deferred = True
+                return
+
+            if _raise_async_exception(self._script_thread, StopException):
+                self._async_exc_pending = True
+
+    @contextmanager
+    def _streamlit_call(self):
+        """A context for Streamlit code that runs in the script thread on
+        behalf of the user's script. See ReportThread.streamlit_call.
+
+        interrupt() doesn't raise exceptions inside this context, because
+        they could leave Streamlit's state half-updated.
+        """
+        try:
+            with self._execing_lock:
+                if self._async_exc_pending:
+                    # The script hasn't seen our exception yet. Take it back,
+                    # and handle the request once this call returns instead.
+                    _cancel_async_exception(self._script_thread)
+                    self._async_exc_pending = False
+                    self._interrupt_deferred = True
+                self._streamlit_call_depth += 1
+
+            yield
+        finally:
+            with self._execing_lock:
+                # The exception may have been raised before we counted this
+                # call. Then the depth was 0, since interrupt() doesn't raise
+                # inside Streamlit calls.
+                self._streamlit_call_depth = max(0, self._streamlit_call_depth - 1)
+
+        with self._execing_lock:
+            handle_requests = (
+                self._streamlit_call_depth == 0 and self._interrupt_deferred
+            )
+            if handle_requests:
+                self._interrupt_deferred = False
+
+        if handle_requests:
+            self.maybe_handle_execution_control_request()
+
     def _install_tracer(self):
         """Install function that runs before each line of the script."""
 
@@ -209,16 +296,30 @@ class ScriptRunner(object):
         Used by maybe_handle_execution_control_request to ensure that
         we only handle requests while we're inside an exec() call
         """
-        if self._execing:
-            raise RuntimeError("Nested set_execing_flag call")
-        self._execing = True
+        with self._execing_lock:
+            if self._execing:
+                raise RuntimeError("Nested set_execing_flag call")
+            self._execing = True
+            self._streamlit_call_depth = 0
         try:
             yield
         finally:
-            self._execing = False
+            with self._execing_lock:
+                if self._async_exc_pending:
+                    # Don't let the exception escape the run.
+                    _cancel_async_exception(self._script_thread)
+                    self._async_exc_pending = False
+                self._interrupt_deferred = False
+                self._streamlit_call_depth = 0
+                self._execing = False
 
     def _run_script(self, rerun_data):
-        """Run our script.
+        """Run our script, and rerun it for as long as it's interrupted by
+        RerunExceptions.
+
+        Each run waits for a slot from the ScriptRunScheduler first. If a new
+        request comes in while we're waiting, the run is abandoned, and the
+        request gets processed instead.
 
         Parameters
         ----------
@@ -228,6 +329,39 @@ class ScriptRunner(object):
         """
         assert self._is_in_script_thread()
 
+        scheduler = ScriptRunScheduler.get_current()
+        while rerun_data is not None:
+            acquired = scheduler.acquire(
+                interactive=rerun_data.widget_state is not None,
+                is_cancelled=self._has_pending_request,
+            )
+            if not acquired:
+                LOGGER.debug("Script run superseded while waiting for a slot")
+                return
+
+            try:
+                rerun_data = self._run_script_once(rerun_data)
+            finally:
+                scheduler.release()
+
+    def _has_pending_request(self):
+        return self._shutdown_requested or self._request_queue.has_request
+
+    def _run_script_once(self, rerun_data):
+        """Run our script once.
+
+        Parameters
+        ----------
+        rerun_data: RerunData
+            The RerunData to use.
+
+        Returns
+        -------
+        RerunData | None
+            If the run was interrupted by a RerunException, the RerunData to
+            rerun the script with.
+
+        """
         LOGGER.debug("Running script %s", rerun_data)
 
         # Reset delta generator so it starts from index 0.
@@ -241,36 +375,14 @@ class ScriptRunner(object):
         # to the user via a modal dialog in the frontend, and won't result
         # in their previous report disappearing.
         try:
-            # Python 3 got rid of the native execfile() command, so we read
-            # the file, compile it, and exec() it. This implementation is
-            # compatible with both 2 and 3.
-            with open(self._report.script_path) as f:
-                filebody = f.read()
-
-            if config.get_option("runner.magicEnabled"):
-                filebody = magic.add_magic(filebody, self._report.script_path)
-
-            code = compile(
-                filebody,
-                # Pass in the file path so it can show up in exceptions.
-                self._report.script_path,
-                # We're compiling entire blocks of Python, so we need "exec"
-                # mode (as opposed to "eval" or "single").
-                mode="exec",
-                # Don't inherit any flags or "future" statements.
-                flags=0,
-                dont_inherit=1,
-                # Parameter not supported in Python2:
-                # optimize=-1,
-            )
-
+            code = script_cache.get_code(self._report.script_path)
         except BaseException as e:
             # We got a compile error. Send an error event and bail immediately.
             LOGGER.debug("Fatal script error: %s" % e)
             self.on_event.send(
                 ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR, exception=e
             )
-            return
+            return None
 
         # If we get here, we've successfully compiled our script. The next step
         # is to run it. Errors thrown during execution will be shown to the
@@ -328,8 +440,7 @@ class ScriptRunner(object):
         # script without meaning to.
         _log_if_error(_clean_problem_modules)
 
-        if rerun_with_data is not None:
-            self._run_script(rerun_with_data)
+        return rerun_with_data
 
 
 class ScriptControlException(BaseException):
@@ -389,6 +500,39 @@ def _new_module(name):
     return imp.new_module(name)
 
 
+def _raise_async_exception(thread, exception_type):
+    """Raise an exception in another thread, the next time it runs Python
+    code.
+
+    Returns
+    -------
+    bool
+        True if the exception was set. This is False on Python
+        implementations that don't support it, or if the thread has exited.
+
+    """
+    if not hasattr(ctypes, "pythonapi") or thread.ident is None:
+        return False
+
+    # The thread ID is an unsigned long since Python 3.7.
+    thread_id_type = ctypes.c_ulong if sys.version_info >= (3, 7) else ctypes.c_long
+    num_threads = ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        thread_id_type(thread.ident), ctypes.py_object(exception_type)
+    )
+    if num_threads > 1:
+        # This should never happen. Undo it.
+        _cancel_async_exception(thread)
+        return False
+    return num_threads == 1
+
+
+def _cancel_async_exception(thread):
+    """Cancel an exception set by _raise_async_exception, if the thread
+    hasn't raised it yet."""
+    thread_id_type = ctypes.c_ulong if sys.version_info >= (3, 7) else ctypes.c_long
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id_type(thread.ident), None)
+
+
 # Code modified from IPython (BSD license)
 # Source: https://github.com/ipython/ipython/blob/master/IPython/utils/syspathcontext.py#L42
 class modified_sys_path(object):
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Script runs that are shared by ReportSessions with the same widget states.
+
+See the server.shareScriptRuns config option.
+"""
+
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+def get_widget_states_key(widget_states):
+    """Return a hashable key that identifies a set of widget values.
+
+    Parameters
+    ----------
+    widget_states : WidgetStates
+
+    Returns
+    -------
+    tuple
+
+    """
+    return tuple(sorted(w.SerializeToString() for w in widget_states.widgets))
+
+
+def has_trigger_value(widget_states):
+    """True if any widget in the given WidgetStates was triggered.
+
+    Triggers are one-off actions by a single user (e.g. a button click), so
+    runs that contain them aren't shared.
+
+    Parameters
+    ----------
+    widget_states : WidgetStates
+
+    Returns
+    -------
+    bool
+
+    """
+    return any(
+        w.WhichOneof("value") == "trigger_value" and w.trigger_value
+        for w in widget_states.widgets
+    )
+
+
+class SharedReportRun(object):
+    """A script run shared by all the ReportSessions subscribed to it.
+
+    The script is run by a headless ReportSession, the "runner". Everything
+    the runner enqueues is mirrored into the reports of the subscribed
+    sessions, and sessions that subscribe after the run has started get a
+    replay of its messages so far. When the last session unsubscribes, the
+    runner is shut down.
+
+    SharedReportRuns are only accessed from the main thread.
+    """
+
+    # Map: widget states key -> SharedReportRun
+    _runs = {}
+
+    @classmethod
+    def subscribe(cls, session, widget_states, create_runner):
+        """Subscribe a session to the run for the given widget states.
+
+        If there's no such run yet, one is created and started.
+
+        Parameters
+        ----------
+        session : ReportSession
+        widget_states : WidgetStates
+        create_runner : callable
+            Called with no arguments to create the headless ReportSession
+            that runs the script, if there's no run to subscribe to yet.
+
+        Returns
+        -------
+        SharedReportRun
+
+        """
+        key = get_widget_states_key(widget_states)
+        run = cls._runs.get(key)
+        if run is None:
+            LOGGER.debug("Starting shared run (%s widgets)", len(key))
+            run = SharedReportRun(key, create_runner())
+            cls._runs[key] = run
+            run.request_rerun(widget_states)
+
+        run._runner.add_mirror(session)
+        run._subscribers.add(session)
+        LOGGER.debug("%s sessions share this run", len(run._subscribers))
+        return run
+
+    def __init__(self, key, runner):
+        """Constructor. Use SharedReportRun.subscribe instead.
+
+        Parameters
+        ----------
+        key : tuple
+            The widget states key of this run.
+        runner : ReportSession
+            The headless session that runs the script.
+
+        """
+        self._key = key
+        self._runner = runner
+        self._subscribers = set()
+
+    @property
+    def key(self):
+        return self._key
+
+    def request_rerun(self, widget_states=None):
+        """Rerun the script for all subscribers."""
+        self._runner.request_rerun(widget_states)
+
+    def unsubscribe(self, session):
+        """Stop mirroring the run into a session.
+
+        Parameters
+        ----------
+        session : ReportSession
+
+        """
+        self._subscribers.discard(session)
+        self._runner.remove_mirror(session)
+
+        if len(self._subscribers) == 0:
+            LOGGER.debug("Shutting down shared run")
+            self._runner.shutdown()
+            if SharedReportRun._runs.get(self._key) is self:
+                del SharedReportRun._runs[self._key]
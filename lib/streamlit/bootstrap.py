@@ -13,18 +13,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
 import os
+import shutil
 import signal
 import sys
+import tempfile
 
 import click
 import tornado.ioloop
 
 from streamlit import config
 from streamlit import util
+from streamlit.ProcessScriptRunner import ScriptWorkerPool
+from streamlit.ProcessScriptRunner import use_worker_processes
 from streamlit.Report import Report
 from streamlit.logger import get_logger
 from streamlit.server.Server import Server
+from streamlit.server.Server import bind_sockets
 
 LOGGER = get_logger(__name__)
 
@@ -50,6 +56,68 @@ def _set_up_signal_handler():
         signal.signal(signal.SIGQUIT, signal_handler)
 
 
+def _fork_workers(num_workers, sockets):
+    """Fork the worker processes for server.numWorkers.
+
+    Returns in each worker process, with the worker's index. The parent
+    process forwards termination signals to the workers and waits for them
+    to exit, then exits itself without returning.
+
+    Parameters
+    ----------
+    num_workers : int
+    sockets : list of socket.socket
+        The server's bound sockets, which the workers inherit.
+
+    Returns
+    -------
+    (int, str)
+        The worker's index, and a temp directory that the workers share their
+        cached messages in.
+
+    """
+    message_cache_dir = tempfile.mkdtemp(prefix="streamlit-message-cache-")
+
+    worker_pids = set()
+    for worker_index in range(num_workers):
+        pid = os.fork()
+        if pid == 0:
+            return worker_index, message_cache_dir
+        worker_pids.add(pid)
+
+    LOGGER.debug("Forked %s workers: %s", num_workers, worker_pids)
+
+    # Only the workers accept connections.
+    for sock in sockets:
+        sock.close()
+
+    def signal_handler(signal_number, stack_frame):
+        for pid in worker_pids:
+            try:
+                os.kill(pid, signal_number)
+            except OSError:
+                # The worker has already exited.
+                pass
+
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGQUIT, signal_handler)
+
+    while worker_pids:
+        try:
+            pid, status = os.wait()
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            raise
+        worker_pids.discard(pid)
+        if status != 0:
+            LOGGER.error("Worker %s exited with status %s", pid, status)
+
+    shutil.rmtree(message_cache_dir, ignore_errors=True)
+    sys.exit(0)
+
+
 def _fix_sys_path(script_path):
     """Add the script's folder to the sys path.
 
@@ -170,16 +238,38 @@ def run(script_path, command_line, args):
     _fix_matplotlib_crash()
     _fix_sys_argv(script_path, args)
 
+    worker_index = 0
+    message_cache_dir = None
+    sockets = None
+    num_workers = config.get_option("server.numWorkers")
+    if num_workers > 1:
+        if sys.platform == "win32":
+            LOGGER.warning("server.numWorkers is not supported on Windows")
+        else:
+            # Bind the port once, so that the workers share its sockets and
+            # a port that another app holds is detected. Forking must
+            # happen before the ioloop is created.
+            sockets = bind_sockets()
+            worker_index, message_cache_dir = _fork_workers(num_workers, sockets)
+
+    if use_worker_processes():
+        # Fork the script worker processes now, on the main thread, before
+        # the preheated session starts the first script thread.
+        ScriptWorkerPool.get_current()
+    elif config.get_option("runner.numProcesses") > 0:
+        LOGGER.warning("runner.numProcesses is not supported on Windows")
+
     # Install a signal handler that will shut down the ioloop
     # and close all our threads
     _set_up_signal_handler()
 
     ioloop = tornado.ioloop.IOLoop.current()
 
-    # Create and start the server.
-    server = Server(ioloop, script_path, command_line)
+    # Create and start the server. Only the first worker prints the URL
+    # and opens the browser.
+    server = Server(ioloop, script_path, command_line, message_cache_dir, sockets)
     server.add_preheated_report_session()
-    server.start(_on_server_start)
+    server.start(_on_server_start if worker_index == 0 else None)
 
     # Start the ioloop. This function will not return until the
     # server is shut down.
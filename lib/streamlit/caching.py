@@ -35,6 +35,7 @@ from streamlit import config, util
 from streamlit.compatibility import setup_2_3_shims
 from streamlit.hashing import CodeHasher, Context, get_hash
 from streamlit.logger import get_logger
+from streamlit.ReportThread import streamlit_call
 
 setup_2_3_shims(globals())
 
@@ -369,15 +370,18 @@ def _read_from_cache(key, persisted, ignore_hash, func_or_code, message_opts):
 
         if persisted:
             value, args_mutated = _read_from_disk_cache(key)
-            _write_to_mem_cache(key, value, ignore_hash, args_mutated)
+            with streamlit_call():
+                _write_to_mem_cache(key, value, ignore_hash, args_mutated)
             return value, args_mutated
         raise e
 
 
 def _write_to_cache(key, value, persist, ignore_hash, args_mutated):
-    _write_to_mem_cache(key, value, ignore_hash, args_mutated)
-    if persist:
-        _write_to_disk_cache(key, value, args_mutated)
+    # Don't let interrupt() stop the script halfway through a write.
+    with streamlit_call():
+        _write_to_mem_cache(key, value, ignore_hash, args_mutated)
+        if persist:
+            _write_to_disk_cache(key, value, args_mutated)
 
 
 def cache(
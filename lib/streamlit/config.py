@@ -294,6 +294,35 @@ _create_option(
 )
 
 
+_create_option(
+    "global.dataFrameSerialization",
+    description="""
+        How st.dataframe and st.table send their data to the browser.
+
+        Should be set to one of these values:
+        - "legacy" : as a DataFrame protobuf.
+        - "arrow" : as an Apache Arrow IPC stream. Faster for large
+          DataFrames, but requires pyarrow. Styled DataFrames and
+          DataFrames with a MultiIndex are still sent as protobufs.
+        """,
+    default_val="legacy",
+)
+
+_create_option(
+    "global.chartDataPrecision",
+    description="""
+        The precision of the floats that charts and maps send to the browser.
+
+        Should be set to one of these values:
+        - "double" : 64-bit floats.
+        - "single" : 32-bit floats, which take half the bandwidth and
+          browser memory, and are precise to about 7 significant digits.
+          Tables and DataFrames are always sent with double precision.
+        """,
+    default_val="double",
+)
+
+
 # Config Section: Client #
 
 _create_section("client", "Settings for scripts that use Streamlit.")
@@ -333,6 +362,52 @@ _create_option(
     default_val=False,
 )
 
+_create_option(
+    "runner.asyncInterrupt",
+    description="""
+        Stop a running script right away when it's rerun or stopped, by
+        raising an exception in its thread. Otherwise, the script only stops
+        at its next Streamlit command. Unlike installTracer, this doesn't
+        slow down your script. The exception can interrupt your script's own
+        cleanup code, like a finally block.
+        """,
+    default_val=False,
+)
+
+_create_option(
+    "runner.maxConcurrentRuns",
+    description="""
+        Maximum number of scripts that run at the same time, across all
+        sessions. Further runs wait in a queue, where reruns caused by
+        widget interactions go before other runs. Set to 0 for no limit.
+        """,
+    default_val=0,
+)
+
+_create_option(
+    "runner.numProcesses",
+    description="""
+        Number of worker processes that scripts are executed in. When this
+        is 0, scripts run on threads inside the server process. Otherwise,
+        CPU-heavy scripts can't slow down the server or each other, but
+        each run waits for a free worker process, and editing a module that
+        the script imports doesn't trigger a rerun (the next run still
+        picks up the edit). Not supported on Windows.
+        """,
+    default_val=0,
+)
+
+_create_option(
+    "runner.maxElementMemoSize",
+    description="""
+        Max size, in megabytes, of the memo of marshalled charts and
+        dataframes. When a rerun displays the same data again, the memoized
+        element is reused instead of being marshalled again. Set to 0 to
+        disable the memo.
+        """,
+    default_val=0,
+)
+
 _create_option(
     "runner.fixMatplotlib",
     description="""
@@ -415,6 +490,148 @@ def _server_enable_cors():
     return True
 
 
+_create_option(
+    "server.websocketCompression",
+    description="""Enables permessage-deflate compression on the WebSocket
+        connection to the browser. This reduces bandwidth for text-heavy
+        elements (e.g. Vega-Lite, Plotly and Bokeh specs) at the cost of some
+        server CPU.""",
+    default_val=False,
+)
+
+_create_option(
+    "server.websocketCompressionLevel",
+    description="""zlib compression level used for WebSocket messages, from 1
+        (fastest) to 9 (smallest). Only applies when
+        server.websocketCompression is True.""",
+    default_val=6,
+)
+
+_create_option(
+    "server.websocketCompressionMemLevel",
+    description="""zlib memory level used for WebSocket messages, from 1
+        (least memory) to 9 (fastest). Only applies when
+        server.websocketCompression is True.""",
+    default_val=8,
+)
+
+_create_option(
+    "server.websocketCompressionMinSize",
+    description="""WebSocket messages smaller than this many bytes are sent
+        uncompressed, since compressing them costs more than it saves. Only
+        applies when server.websocketCompression is True, and with Tornado
+        5.""",
+    default_val=1024,
+)
+
+_create_option(
+    "server.maxElementUpdateRate",
+    description="""Maximum number of times per second that a single element
+        is sent to the browser. Updates that arrive faster than this are
+        held back and superseded by newer ones, but the final state of an
+        element is always delivered. Set to 0 to send every update.""",
+    default_val=60,
+)
+
+_create_option(
+    "server.maxOutboundBytes",
+    description="""Maximum number of bytes that may be written to a single
+        browser's WebSocket without having been delivered yet. While a
+        browser is over this limit, the server stops sending it new messages
+        and instead coalesces pending deltas, dropping superseded ones.""",
+    visibility="hidden",
+    default_val=100 * 1e6,
+)  # 100MB
+
+_create_option(
+    "server.maxReportSize",
+    description="""Maximum number of bytes of messages that the server keeps
+        for each report, to replay it to browsers and to save it. When a
+        report that runs for a long time goes over this limit, its oldest
+        elements are dropped from the server's copy. Browsers that are
+        already showing them aren't affected. Set to 0 for no limit.""",
+    visibility="hidden",
+    default_val=100 * 1e6,
+)  # 100MB
+
+_create_option(
+    "server.dataFrameWindowRows",
+    description="""When nonzero, st.dataframe only sends the browser the
+        first this many rows of larger DataFrames, and the browser fetches
+        the other rows in windows of this size as they're scrolled into
+        view. The server retains the DataFrames for that; see
+        server.maxRetainedDataFrameSize. Styled DataFrames are always sent
+        in full, as are all DataFrames when runner.numProcesses or
+        server.numWorkers is set. Saved reports only hold the first window
+        of DataFrames sent in windows.""",
+    default_val=0,
+)
+
+_create_option(
+    "server.dataFrameWindowColumns",
+    description="""Number of columns in each window of a DataFrame sent in
+        windows. See server.dataFrameWindowRows.""",
+    default_val=50,
+)
+
+_create_option(
+    "server.maxRetainedDataFrameSize",
+    description="""Maximum size, in megabytes, of the DataFrames that the
+        server retains so that the browser can fetch their windows. See
+        server.dataFrameWindowRows. Once it's exceeded, the least recently
+        used DataFrames are dropped, and the browser can no longer scroll
+        past their first window. Larger DataFrames are sent in full.""",
+    default_val=500,
+)
+
+_create_option(
+    "server.slowClientTimeout",
+    description="""Disconnect browsers that stay over server.maxOutboundBytes
+        for longer than this many seconds.""",
+    visibility="hidden",
+    default_val=60,
+)
+
+_create_option(
+    "server.numPreheatedSessions",
+    description="""Number of sessions that run the script at startup, with
+        default widget values, so that the first browsers to connect get an
+        instant first render. Set to 0 to only run the script once a browser
+        connects.""",
+    default_val=1,
+)
+
+_create_option(
+    "server.refillPreheatedSessions",
+    description="""If true, preheated sessions are refilled in the
+        background as browsers claim them, so that later browsers get an
+        instant first render too. Preheated sessions then expire after a
+        minute, so that no browser is shown output that is out of date.""",
+    default_val=False,
+)
+
+_create_option(
+    "server.shareScriptRuns",
+    description="""Browsers whose widgets have the same values share a single
+        run of the script instead of each running it separately. Browsers
+        that connect while a shared run is in progress, or after it has
+        finished, are sent what it has output so far. Widget values
+        changed, and reruns or stops requested, by one browser only affect
+        that browser.""",
+    default_val=False,
+)
+
+_create_option(
+    "server.numWorkers",
+    description="""Number of server processes to run. When greater than 1,
+        the server forks this many worker processes that share the port via
+        SO_REUSEPORT, so browser sessions are spread across CPU cores. Each
+        browser stays connected to a single worker. Not supported on
+        Windows.""",
+    default_val=1,
+)
+
+
 # Config Section: Browser #
 
 _create_section("browser", "Configuration of browser front-end.")
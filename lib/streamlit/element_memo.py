@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memoizes marshalled elements, so reruns that display the same data don't
+marshall it again. Enabled by runner.maxElementMemoSize.
+"""
+
+# Python 2/3 compatibility
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import collections
+import hashlib
+import threading
+
+from streamlit import config
+from streamlit import util
+from streamlit.compatibility import setup_2_3_shims
+from streamlit.logger import get_logger
+
+setup_2_3_shims(globals())
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+LOGGER = get_logger(__name__)
+
+# Elements whose marshalling only depends on their arguments. Others are
+# left out because they read global state (e.g. pyplot, which draws and
+# then clears the current figure), are random (balloons), or are widgets.
+MEMOIZABLE_DELTA_TYPES = frozenset(
+    [
+        "altair_chart",
+        "area_chart",
+        "bar_chart",
+        "dataframe",
+        "deck_gl_chart",
+        "graphviz_chart",
+        "json",
+        "line_chart",
+        "plotly_chart",
+        "table",
+        "vega_lite_chart",
+    ]
+)
+
+
+class _NotMemoizable(Exception):
+    pass
+
+
+# Map: memo key -> (serialized Element, ForwardMsg hash), in LRU order.
+_memo = collections.OrderedDict()
+_memo_size = 0
+_memo_lock = threading.Lock()
+
+
+def get_key(delta_type, args, kwargs):
+    """Return the memo key for an element, or None if it's not memoizable.
+
+    Parameters
+    ----------
+    delta_type : str
+        The name of the DeltaGenerator method that creates the element.
+    args : tuple
+        The method's positional arguments.
+    kwargs : dict
+        The method's keyword arguments.
+
+    Returns
+    -------
+    str | None
+
+    """
+    if config.get_option("runner.maxElementMemoSize") <= 0:
+        return None
+    if delta_type not in MEMOIZABLE_DELTA_TYPES:
+        return None
+
+    hasher = hashlib.md5()
+    try:
+        _update_hash(hasher, delta_type)
+        _update_hash(hasher, args)
+        _update_hash(hasher, sorted(kwargs.items()))
+    except _NotMemoizable:
+        return None
+    return hasher.hexdigest()
+
+
+def get(key):
+    """Return the memoized (serialized Element, ForwardMsg hash) for a key,
+    or None."""
+    with _memo_lock:
+        entry = _memo.pop(key, None)
+        if entry is not None:
+            # Move it to the end of the LRU order.
+            _memo[key] = entry
+        return entry
+
+
+def put(key, msg):
+    """Memoize a ForwardMsg's element.
+
+    Parameters
+    ----------
+    key : str
+        The key returned by get_key.
+    msg : ForwardMsg
+        A new_element delta message that has no metadata yet. Its hash is
+        populated.
+
+    """
+    # Imported here to avoid a circular import.
+    from streamlit.ForwardMsgCache import populate_hash_if_needed
+
+    global _memo_size
+
+    max_size = config.get_option("runner.maxElementMemoSize") * 1e6
+    element_bytes = msg.delta.new_element.SerializeToString()
+    if len(element_bytes) > max_size:
+        return
+    entry = (element_bytes, populate_hash_if_needed(msg))
+
+    with _memo_lock:
+        old_entry = _memo.pop(key, None)
+        if old_entry is not None:
+            _memo_size -= len(old_entry[0])
+        _memo[key] = entry
+        _memo_size += len(element_bytes)
+
+        while _memo_size > max_size:
+            _, (evicted_bytes, _) = _memo.popitem(last=False)
+            _memo_size -= len(evicted_bytes)
+
+
+def clear():
+    """Drop all memoized elements."""
+    global _memo_size
+
+    with _memo_lock:
+        _memo.clear()
+        _memo_size = 0
+
+
+def _update_hash(hasher, obj):
+    """Hash an element input by value. Unlike streamlit.hashing, this never
+    samples large data, since a collision would show stale data.
+
+    Raises _NotMemoizable if the object can't be hashed.
+    """
+    hasher.update(type(obj).__name__.encode("utf-8") + b":")
+
+    if obj is None or isinstance(obj, (bool, int, float)):
+        hasher.update(repr(obj).encode("utf-8"))
+    elif isinstance(obj, bytes):
+        hasher.update(obj)
+    elif isinstance(obj, string_types):
+        hasher.update(obj.encode("utf-8"))
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(str(len(obj)).encode("utf-8"))
+        for item in obj:
+            _update_hash(hasher, item)
+    elif isinstance(obj, dict):
+        hasher.update(str(len(obj)).encode("utf-8"))
+        for item in obj.items():
+            _update_hash(hasher, item)
+    elif util.is_type(obj, "pandas.core.frame.DataFrame") or util.is_type(
+        obj, "pandas.core.series.Series"
+    ):
+        import pandas as pd
+
+        try:
+            values_hash = pd.util.hash_pandas_object(obj, index=True).values
+        except TypeError:
+            raise _NotMemoizable()
+        hasher.update(values_hash.tobytes())
+        # Column names, dtypes and index names aren't part of the values.
+        if util.is_type(obj, "pandas.core.frame.DataFrame"):
+            labels = (obj.columns, obj.dtypes)
+        else:
+            labels = (obj.name, obj.dtype)
+        hasher.update(repr(labels).encode("utf-8"))
+        hasher.update(repr(obj.index.names).encode("utf-8"))
+    elif util.is_type(obj, "numpy.ndarray"):
+        if obj.dtype.hasobject:
+            raise _NotMemoizable()
+        hasher.update(repr((obj.dtype.str, obj.shape)).encode("utf-8"))
+        hasher.update(obj.tobytes())
+    else:
+        # E.g. Altair and Plotly charts. Their pickles contain all their data.
+        try:
+            hasher.update(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            raise _NotMemoizable()
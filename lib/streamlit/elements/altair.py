@@ -20,6 +20,7 @@ from __future__ import absolute_import
 
 
 from streamlit.elements.data_frame_proto import convert_anything_to_df
+from streamlit.elements.data_frame_proto import melt_data_frame
 import streamlit.elements.vega_lite as vega_lite
 import altair as alt
 import pandas as pd
@@ -32,7 +33,7 @@ def generate_chart(chart_type, data):
     if not isinstance(data, pd.DataFrame):
         data = convert_anything_to_df(data)
 
-    data = pd.melt(data.reset_index(), id_vars=['index'])
+    data = melt_data_frame(data)
 
     chart = getattr(alt.Chart(data), 'mark_' + chart_type)().encode(
         alt.X('index', title=''),
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helper functions to marshall a pandas.DataFrame into the arrow_data field
+of a proto.DataFrame, which is used when global.dataFrameSerialization is
+"arrow".
+
+The field holds an Arrow IPC stream with one column per DataFrame column,
+named "col_0", "col_1", ..., followed by an "index" column unless the index
+is a RangeIndex. Each column holds the same values as the proto.AnyArray it
+replaces, e.g. datetimes are int64 nanoseconds since the epoch, in UTC.
+Categorical columns are dictionary-encoded strings.
+
+The schema's "streamlit" metadata key holds a JSON object describing what the
+Arrow types alone don't say:
+
+- "columns": the column labels, as strings.
+- "types": the AnyArray type of each column, e.g. "doubles" or "datetimes".
+- "index": the Index type, e.g. {"type": "datetime_index"}. Range indices
+  also have "start" and "stop", and plain indices have "data_type", the
+  AnyArray type of the index column.
+
+Requires pyarrow.
+"""
+
+# Python 2/3 compatibility
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+
+import tzlocal
+
+_METADATA_KEY = b"streamlit"
+_INDEX_COLUMN = "index"
+
+
+def can_marshall(df):
+    """Return True if a pandas.DataFrame can be marshalled into Arrow.
+
+    MultiIndices aren't supported.
+    """
+    import pandas as pd
+
+    return not isinstance(df.index, pd.MultiIndex) and not isinstance(
+        df.columns, pd.MultiIndex
+    )
+
+
+def marshall(df, proto_df):
+    """Marshall a pandas.DataFrame into proto_df.arrow_data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        A DataFrame for which can_marshall is True.
+
+    proto_df : proto.DataFrame
+        Output.
+
+    """
+    import pyarrow as pa
+
+    arrays = []
+    names = []
+    types = []
+    for col in range(len(df.columns)):
+        array, array_type = _to_arrow_array(df.iloc[:, col])
+        arrays.append(array)
+        names.append("col_%d" % col)
+        types.append(array_type)
+
+    index_array, index_metadata = _to_arrow_index(df.index)
+    if index_array is not None:
+        arrays.append(index_array)
+        names.append(_INDEX_COLUMN)
+
+    metadata = {
+        "columns": [str(label) for label in df.columns],
+        "types": types,
+        "index": index_metadata,
+    }
+    table = pa.Table.from_arrays(arrays, names=names)
+    _write_table(table, metadata, proto_df)
+
+
+def get_num_rows(proto_df):
+    """Return the number of rows in an Arrow-encoded proto.DataFrame."""
+    table, metadata = _read_table(proto_df)
+    return _num_rows(table, metadata)
+
+
+def get_num_columns(proto_df):
+    """Return the number of columns in an Arrow-encoded proto.DataFrame."""
+    _, metadata = _read_table(proto_df)
+    return len(metadata["types"])
+
+
+def add_rows(df1, df2, max_rows=0):
+    """Concat the rows of the Arrow-encoded proto.DataFrame df2 to df1.
+
+    Parameters
+    ----------
+    df1 : proto.DataFrame
+    df2 : proto.DataFrame
+    max_rows : int
+        If nonzero, only the last max_rows rows of the concatenated
+        DataFrame are kept.
+
+    """
+    import pyarrow as pa
+
+    table1, metadata1 = _read_table(df1)
+    table2, metadata2 = _read_table(df2)
+
+    if len(metadata1["types"]) != len(metadata2["types"]):
+        raise ValueError("Dataframes have incompatible shapes")
+    for type1, type2 in zip(metadata1["types"], metadata2["types"]):
+        _check_same_type(type1, type2)
+
+    index1 = metadata1["index"]
+    index2 = metadata2["index"]
+    _check_same_type(index1["type"], index2["type"])
+    if index1["type"] == "range_index":
+        index1["stop"] += index2["stop"] - index2["start"]
+    elif index1["type"] == "plain_index":
+        _check_same_type(index1["data_type"], index2["data_type"])
+
+    # Don't concat columns! add_rows should leave the dataframe with the same
+    # column labels as it had before.
+    table2 = table2.replace_schema_metadata(table1.schema.metadata)
+    try:
+        table = pa.concat_tables([table1, table2])
+    except pa.ArrowInvalid as e:
+        raise ValueError("Cannot concatenate DataFrames: %s" % e)
+    table = _unify_dictionaries(table)
+
+    if max_rows:
+        table, index1 = _trim_table(table, index1, max_rows)
+
+    metadata1["index"] = index1
+    _write_table(table, metadata1, df1)
+
+
+def trim(proto_df, max_rows):
+    """Drop all but the last max_rows rows of an Arrow-encoded
+    proto.DataFrame."""
+    table, metadata = _read_table(proto_df)
+    table, metadata["index"] = _trim_table(table, metadata["index"], max_rows)
+    _write_table(table, metadata, proto_df)
+
+
+def _check_same_type(type1, type2):
+    if type1 != type2:
+        raise ValueError(
+            "Cannot concatenate %(type1)s with %(type2)s."
+            % {"type1": type1, "type2": type2}
+        )
+
+
+def _num_rows(table, metadata):
+    index = metadata["index"]
+    if index["type"] == "range_index":
+        return index["stop"] - index["start"]
+    return table.num_rows
+
+
+def _trim_table(table, index_metadata, max_rows):
+    excess = table.num_rows - max_rows
+    if index_metadata["type"] == "range_index":
+        index_metadata = dict(index_metadata)
+        excess = index_metadata["stop"] - index_metadata["start"] - max_rows
+        index_metadata["start"] = max(
+            index_metadata["start"], index_metadata["stop"] - max_rows
+        )
+    if excess > 0:
+        table = table.slice(min(excess, table.num_rows))
+    return table, index_metadata
+
+
+def _unify_dictionaries(table):
+    """Re-encode dictionary columns whose chunks have different dictionaries.
+
+    An IPC stream only holds one dictionary per column.
+    """
+    import pyarrow as pa
+
+    for i, column in enumerate(table.columns):
+        if not pa.types.is_dictionary(column.type) or column.num_chunks < 2:
+            continue
+        strings = pa.concat_arrays(
+            [chunk.dictionary.take(chunk.indices) for chunk in column.chunks]
+        )
+        table = table.set_column(i, table.schema[i].name, strings.dictionary_encode())
+    return table
+
+
+def _write_table(table, metadata, proto_df):
+    import pyarrow as pa
+
+    table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata)})
+    sink = pa.BufferOutputStream()
+    writer = pa.RecordBatchStreamWriter(sink, table.schema)
+    writer.write_table(table)
+    writer.close()
+    proto_df.arrow_data = sink.getvalue().to_pybytes()
+
+
+def _read_table(proto_df):
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(pa.py_buffer(proto_df.arrow_data)).read_all()
+    metadata = json.loads(table.schema.metadata[_METADATA_KEY].decode("utf-8"))
+    return table, metadata
+
+
+def _to_arrow_index(pandas_index):
+    """Convert a pandas.Index into an Arrow array and the index's metadata.
+
+    The array is None for range indices.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if type(pandas_index) == pd.RangeIndex:
+        start = pandas_index.min()
+        stop = pandas_index.max()
+        if pd.isna(start) or pd.isna(stop):
+            start = stop = 0
+        else:
+            stop += 1
+        return None, {"type": "range_index", "start": int(start), "stop": int(stop)}
+
+    import pyarrow as pa
+
+    if type(pandas_index) == pd.Index:
+        array, array_type = _to_arrow_array(np.array(pandas_index))
+        return array, {"type": "plain_index", "data_type": array_type}
+    elif type(pandas_index) == pd.DatetimeIndex:
+        if pandas_index.tz is None:
+            current_zone = tzlocal.get_localzone()
+            pandas_index = pandas_index.tz_localize(current_zone)
+        index_type = "datetime_index"
+        values = pandas_index.astype(np.int64)
+    elif type(pandas_index) == pd.TimedeltaIndex:
+        index_type = "timedelta_index"
+        values = pandas_index.astype(np.int64)
+    elif type(pandas_index) == pd.Int64Index:
+        index_type = "int_64_index"
+        values = pandas_index
+    elif type(pandas_index) == pd.Float64Index:
+        return pa.array(np.asarray(pandas_index)), {"type": "float_64_index"}
+    else:
+        raise NotImplementedError("Can't handle %s yet." % type(pandas_index))
+
+    return pa.array(np.asarray(values), type=pa.int64()), {"type": index_type}
+
+
+def _to_arrow_array(pandas_array):
+    """Convert a 1D array into an Arrow array and its AnyArray type."""
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    if not hasattr(pandas_array, "dtype"):
+        pandas_array = np.array(pandas_array)
+
+    if len(pandas_array.shape) != 1:
+        raise ValueError("Array must be 1D.")
+
+    dtype = pandas_array.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categorical = pd.Categorical(pandas_array)
+        categories = [str(category) for category in categorical.categories]
+        codes = categorical.codes.astype(np.int32)
+        if (codes < 0).any():
+            # Missing values are shown as "nan", like in object columns.
+            codes[codes < 0] = len(categories)
+            categories.append(str(np.nan))
+        return (
+            pa.DictionaryArray.from_arrays(
+                pa.array(codes), pa.array(categories, type=pa.string())
+            ),
+            "strings",
+        )
+    elif issubclass(dtype.type, np.floating):
+        values = np.asarray(pandas_array, dtype=np.float64)
+        return pa.array(values, type=pa.float64()), "doubles"
+    elif issubclass(dtype.type, np.timedelta64):
+        values = np.asarray(pandas_array.astype(np.int64))
+        return pa.array(values, type=pa.int64()), "timedeltas"
+    elif issubclass(dtype.type, np.integer) or dtype == np.bool:
+        values = np.asarray(pandas_array)
+        if dtype != np.uint64:
+            # Unsigned int64s are cast by pyarrow, which rejects overflows.
+            values = values.astype(np.int64)
+        return pa.array(values, type=pa.int64()), "int64s"
+    elif dtype == np.object:
+        strings = pd.Series(pandas_array, copy=False).astype(str)
+        return pa.array(strings, type=pa.string()), "strings"
+    elif dtype.name.startswith("datetime64"):
+        if pandas_array.dt.tz is None:
+            current_zone = tzlocal.get_localzone()
+            pandas_array = pandas_array.dt.tz_localize(current_zone)
+        values = np.asarray(pandas_array.astype(np.int64))
+        return pa.array(values, type=pa.int64()), "datetimes"
+    else:
+        raise NotImplementedError("Dtype %s not understood." % dtype)
@@ -15,12 +15,15 @@
 
 """Helper functions to marshall a pandas.DataFrame into a proto.Dataframe."""
 
-import re
+import functools
 import tzlocal
 
 from collections import namedtuple
 
+from streamlit import config
 from streamlit import util
+from streamlit.DataFrameStore import DataFrameStore
+from streamlit.elements import arrow_data_frame
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
@@ -28,7 +31,9 @@ LOGGER = get_logger(__name__)
 CSSStyle = namedtuple("CSSStyle", ["property", "value"])
 
 
-def marshall_data_frame(data, proto_df):
+def marshall_data_frame(
+    data, proto_df, allow_arrow=False, allow_single_precision=False
+):
     """Convert a pandas.DataFrame into a proto.DataFrame.
 
     Parameters
@@ -38,16 +43,35 @@ def marshall_data_frame(data, proto_df):
 
     proto_df : proto.DataFrame
         Output. The protobuf for a Streamlit DataFrame proto.
+
+    allow_arrow : bool
+        If True and global.dataFrameSerialization is "arrow", the data is
+        marshalled as an Arrow IPC stream into proto_df.arrow_data, unless
+        it's styled or has a MultiIndex. Only elements whose frontend
+        component decodes Arrow should set this.
+
+    allow_single_precision : bool
+        If True and global.chartDataPrecision is "single", float columns are
+        marshalled as 32-bit floats. Only charts, whose data doesn't need to
+        be shown exactly, should set this.
     """
     df = convert_anything_to_df(data)
 
+    if allow_arrow and _should_marshall_arrow(data, df):
+        arrow_data_frame.marshall(df, proto_df)
+        return
+
     # Convert df into an iterable of columns (each of type Series).
     df_data = (df.iloc[:, col] for col in range(len(df.columns)))
 
     import numpy as np
     import pandas as pd
 
-    _marshall_table(df_data, proto_df.data)
+    single_precision = (
+        allow_single_precision
+        and config.get_option("global.chartDataPrecision") == "single"
+    )
+    _marshall_table(df_data, proto_df.data, single_precision)
     _marshall_index(df.columns, proto_df.columns)
     _marshall_index(df.index, proto_df.index)
 
@@ -55,6 +79,146 @@ def marshall_data_frame(data, proto_df):
     _marshall_styles(proto_df.style, df, styler)
 
 
+def _should_marshall_arrow(data, df):
+    if config.get_option("global.dataFrameSerialization") != "arrow":
+        return False
+
+    return not _is_pandas_styler(data) and arrow_data_frame.can_marshall(df)
+
+
+def retain_for_windows(data):
+    """Retain data in the DataFrameStore if it should be sent to the
+    browser in windows. See server.dataFrameWindowRows.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, numpy.ndarray, Iterable, dict, DataFrame, Styler, or None
+        Something that is or can be converted to a dataframe.
+
+    Returns
+    -------
+    str | None
+        The ID of the retained DataFrame, to pass to marshall_first_window.
+        None if data should be marshalled in full.
+
+    """
+    window_rows = config.get_option("server.dataFrameWindowRows")
+    if window_rows <= 0 or _is_pandas_styler(data):
+        return None
+
+    # The browser fetches windows from the process it's connected to, which
+    # doesn't have the DataFrames of scripts that run in worker processes,
+    # nor those of the other server processes.
+    if (
+        config.get_option("runner.numProcesses") > 0
+        or config.get_option("server.numWorkers") > 1
+    ):
+        return None
+
+    df = convert_anything_to_df(data)
+    window_columns = config.get_option("server.dataFrameWindowColumns")
+    if len(df) <= window_rows and len(df.columns) <= window_columns:
+        return None
+
+    # Copy it, since the script may modify it after displaying it.
+    return DataFrameStore.get_current().add(df.copy())
+
+
+def marshall_first_window(data, data_frame_id, proto_df):
+    """Marshall the first window of a DataFrame into a proto.DataFrame,
+    along with what the browser needs to fetch the other windows.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, numpy.ndarray, Iterable, dict, DataFrame, or None
+        The data that was passed to retain_for_windows.
+
+    data_frame_id : str
+        The ID returned by retain_for_windows.
+
+    proto_df : proto.DataFrame
+        Output.
+
+    """
+    df = convert_anything_to_df(data)
+    window_rows = config.get_option("server.dataFrameWindowRows")
+    window_columns = config.get_option("server.dataFrameWindowColumns")
+
+    marshall_data_frame(df.iloc[:window_rows, :window_columns], proto_df)
+    proto_df.window.id = data_frame_id
+    proto_df.window.num_rows = len(df)
+    _marshall_index(df.columns, proto_df.window.columns)
+    proto_df.window.window_rows = window_rows
+    proto_df.window.window_columns = window_columns
+
+
+def marshall_window(df, proto_df, row_start, row_end, columns, rows=None):
+    """Marshall a window of a retained DataFrame into a proto.DataFrame.
+
+    The window is cut down to at most server.dataFrameWindowRows rows and
+    server.dataFrameWindowColumns columns. Its window.num_rows is the number
+    of rows it's a window of.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    proto_df : proto.DataFrame
+        Output.
+    row_start : int
+    row_end : int
+        The window has the rows [row_start, row_end) of rows.
+    columns : list of int
+        The positions of the window's columns in df, in order.
+    rows : numpy.ndarray or None
+        The positions of the rows that the window is taken from, in order,
+        as returned by DataFrameStore.get_rows. None for all of df's rows.
+
+    """
+    row_end = min(row_end, row_start + config.get_option("server.dataFrameWindowRows"))
+    columns = columns[: config.get_option("server.dataFrameWindowColumns")]
+
+    if rows is None:
+        num_rows = len(df)
+        window_df = df.iloc[row_start:row_end, columns]
+    else:
+        num_rows = len(rows)
+        window_df = df.iloc[rows[row_start:row_end], columns]
+
+    marshall_data_frame(window_df, proto_df)
+    proto_df.window.num_rows = num_rows
+
+
+def concat_data_frames(df, data, max_rows=0):
+    """Return a pandas.DataFrame with the rows of data appended to df, like
+    add_rows does for proto.DataFrames.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    data : pandas.DataFrame, numpy.ndarray, Iterable, dict, DataFrame, or None
+    max_rows : int
+        If nonzero, only the last max_rows rows are kept.
+
+    """
+    import pandas as pd
+
+    new_rows = convert_anything_to_df(data)
+    if len(new_rows.columns) != len(df.columns):
+        raise ValueError("Dataframes have incompatible shapes")
+
+    # Like add_rows, keep df's column labels, and keep counting the rows of
+    # range indices.
+    new_rows = new_rows.set_axis(df.columns, axis=1, inplace=False)
+    if type(df.index) == pd.RangeIndex and type(new_rows.index) == pd.RangeIndex:
+        start = df.index[-1] + 1 if len(df) else 0
+        new_rows.index = pd.RangeIndex(start, start + len(new_rows))
+
+    df = pd.concat([df, new_rows])
+    if max_rows:
+        df = df.iloc[-max_rows:]
+    return df
+
+
 def convert_anything_to_df(df):
     """Try to convert different formats to a Pandas Dataframe.
 
@@ -83,6 +247,33 @@ def convert_anything_to_df(df):
     return pd.DataFrame(df)
 
 
+def melt_data_frame(df):
+    """Melt a DataFrame into the long format that line, area and bar charts
+    use: one row per cell, with "index", "variable" and "value" columns.
+
+    Unlike pandas.melt, the cells are ordered by row, so each row of df
+    becomes consecutive rows of the result. That way, the last
+    max_rows * len(df.columns) rows of a melted chart hold the last max_rows
+    rows of every series, however many add_rows chunks they came in.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    melted = pd.melt(df.reset_index(), id_vars=["index"])
+    num_rows, num_cols = df.shape
+    by_row = np.arange(num_rows * num_cols).reshape(num_cols, num_rows).T.ravel()
+    return melted.iloc[by_row].reset_index(drop=True)
+
+
 def _is_pandas_styler(obj):
     return util.is_type(obj, "pandas.io.formats.style.Styler")
 
@@ -90,6 +281,10 @@ def _is_pandas_styler(obj):
 def _marshall_styles(proto_table_style, df, styler=None):
     """Adds pandas.Styler styling data to a proto.DataFrame
 
+    The styles are dictionary-encoded: each distinct style is stored once in
+    proto_table_style.unique_styles, and each cell refers to its style by
+    index in proto_table_style.style_indices.
+
     Parameters
     ----------
     proto_table_style : proto.TableStyle
@@ -97,136 +292,162 @@ def _marshall_styles(proto_table_style, df, styler=None):
     styler : pandas.Styler holding styling data for the data frame, or
         None if there's no style data to marshall
     """
+    import numpy as np
+
+    nrows, ncols = df.shape
+
+    # Cells without style data refer to the empty style at index 0.
+    proto_table_style.unique_styles.add()
+    style_indices = np.zeros((nrows, ncols), dtype=np.int64)
 
     # NB: we're using protected members of Styler to get this data,
     # which is non-ideal and could break if Styler's interface changes.
 
     if styler is not None:
-        styler._compute()
-        translated_style = styler._translate()
-        css_styles = _get_css_styles(translated_style)
-        display_values = _get_custom_display_values(df, translated_style)
-    else:
-        # If we have no Styler, we just make an empty CellStyle for each cell
-        css_styles = {}
-        display_values = {}
+        _compute_styles(styler)
+        css_styles = _get_css_styles(styler)
+        display_values = _get_custom_display_values(df, styler)
+
+        cells = list(set(css_styles).union(display_values))
+        if cells:
+            # Map: (css, display value) -> index in unique_styles.
+            unique_styles = {}
+            cell_indices = [
+                unique_styles.setdefault(
+                    (css_styles.get(cell, ()), display_values.get(cell)),
+                    len(unique_styles) + 1,
+                )
+                for cell in cells
+            ]
+            rows, cols = zip(*cells)
+            style_indices[list(rows), list(cols)] = cell_indices
+
+            for css, display_value in sorted(unique_styles, key=unique_styles.get):
+                proto_cell_style = proto_table_style.unique_styles.add()
+                for declaration in css:
+                    proto_css = proto_cell_style.css.add()
+                    proto_css.property = declaration.property
+                    proto_css.value = declaration.value
+                if display_value is not None:
+                    proto_cell_style.display_value = display_value
+                    proto_cell_style.has_display_value = True
 
-    nrows, ncols = df.shape
     for col in range(ncols):
-        proto_col = proto_table_style.cols.add()
-        for row in range(nrows):
-            proto_cell_style = proto_col.styles.add()
+        _extend_packed_ints(
+            proto_table_style.style_indices.add(), style_indices[:, col]
+        )
 
-            for css in css_styles.get((row, col), []):
-                proto_css = proto_cell_style.css.add()
-                proto_css.property = css.property
-                proto_css.value = css.value
 
-            display_value = display_values.get((row, col), None)
-            if display_value is not None:
-                proto_cell_style.display_value = display_value
-                proto_cell_style.has_display_value = True
+def _compute_styles(styler):
+    """Run a pandas.Styler's styling functions, like Styler._compute.
 
+    Styler._update_ctx, which stores the CSS that each function returns in
+    styler.ctx, looks up every cell's position on its own, which takes
+    most of the time for large tables. It's replaced by
+    _update_styler_ctx while the functions run.
+    """
+    styler._update_ctx = functools.partial(_update_styler_ctx, styler)
+    try:
+        styler._compute()
+    finally:
+        del styler._update_ctx
 
-def _get_css_styles(translated_style):
-    """Parses pandas.Styler style dictionary into a
-    {(row, col): [CSSStyle]} dictionary
+
+def _update_styler_ctx(styler, attrs):
+    """Store the CSS in attrs, a DataFrame of CSS strings like
+    "color: red; font-weight: bold" indexed like a subset of styler.data,
+    in styler.ctx.
     """
-    # Create {(row, col): [CSSStyle]} from translated_style['cellstyle']
-    # translated_style['cellstyle'] has the shape:
-    # [
-    #   {
-    #       'props': [['color', ' black'], ['background-color', 'orange'], ['', '']],
-    #       'selector': 'row0_col0'
-    #   }
-    #   ...
-    # ]
-
-    cell_selector_regex = re.compile(r"row(\d+)_col(\d+)")
+    import numpy as np
+    import pandas as pd
+
+    rows = styler.index.get_indexer(attrs.index)
+    cols = styler.columns.get_indexer(attrs.columns)
+
+    # Split each distinct CSS string once.
+    codes, unique_css = pd.factorize(attrs.values.ravel())
+    declarations = [
+        [d for d in str(css).rstrip(";").split(";") if d.strip()] for css in unique_css
+    ]
+    has_declarations = np.array([bool(d) for d in declarations] + [False])
+
+    # Codes are -1 for missing values, which picks the last, False entry.
+    codes = codes.reshape(attrs.shape)
+    attr_rows, attr_cols = np.nonzero(has_declarations[codes])
+    for row, col, code in zip(
+        rows[attr_rows].tolist(),
+        cols[attr_cols].tolist(),
+        codes[attr_rows, attr_cols].tolist(),
+    ):
+        styler.ctx[(row, col)].extend(declarations[code])
+
+
+def _get_css_styles(styler):
+    """Parses a computed pandas.Styler's CSS into a
+    {(row, col): (CSSStyle, ...)} dictionary, without the cells that have
+    no CSS.
+    """
+    # styler.ctx maps (row, col) to a list of CSS declarations. They're
+    # strings like "color: red" in older versions of pandas, and
+    # ("color", "red") tuples in newer ones. Most cells share their CSS, so
+    # each distinct list of declarations is only parsed once.
+    parsed = {}
 
     css_styles = {}
-    for cell_style in translated_style["cellstyle"]:
-        cell_selector = cell_style["selector"]  # a string of the form 'row0_col0'
-        match = cell_selector_regex.match(cell_selector)
-        if not match:
-            raise RuntimeError(
-                'Failed to parse cellstyle selector "%s"' % cell_selector
-            )
-        row = int(match.group(1))
-        col = int(match.group(2))
-        css_declarations = []
-        props = cell_style["props"]
-        for prop in props:
-            if not isinstance(prop, list) or len(prop) != 2:
-                raise RuntimeError('Unexpected cellstyle props "%s"' % prop)
-            name = str(prop[0]).strip()
-            value = str(prop[1]).strip()
-            if name and value:
-                css_declarations.append(CSSStyle(property=name, value=value))
-
-        css_styles[(row, col)] = css_declarations
+    for cell, declarations in styler.ctx.items():
+        declarations = tuple(declarations)
+        css_declarations = parsed.get(declarations)
+        if css_declarations is None:
+            css_declarations = parsed[declarations] = _parse_css(declarations)
+        if css_declarations:
+            css_styles[cell] = css_declarations
 
     return css_styles
 
 
-def _get_custom_display_values(df, translated_style):
-    """Parses pandas.Styler style dictionary into a
-    {(row, col): display_value} dictionary for cells whose display format
-    has been customized.
-    """
-    # Create {(row, col): display_value} from translated_style['body']
-    # translated_style['body'] has the shape:
-    # [
-    #   [ // row
-    #     {  // cell or header
-    #       'id': 'level0_row0' (for row header) | 'row0_col0' (for cells)
-    #       'value': 1.329212
-    #       'display_value': '132.92%'
-    #       ...
-    #     }
-    #   ]
-    # ]
-
-    default_formatter = df.style._display_funcs[(0, 0)]
-
-    def has_custom_display_value(cell):
-        value = str(cell["value"])
-        display_value = str(cell["display_value"])
-        if value == display_value:
-            return False
+def _parse_css(declarations):
+    """Return a tuple of CSSStyles for the non-empty CSS declarations."""
+    css_declarations = []
+    for declaration in declarations:
+        if isinstance(declaration, tuple):
+            name, value = declaration
+        else:
+            name, _, value = str(declaration).partition(":")
+        name = str(name).strip()
+        value = str(value).strip()
+        if name and value:
+            css_declarations.append(CSSStyle(property=name, value=value))
+    return tuple(css_declarations)
 
-        # Pandas applies a default style to all float values, regardless
-        # of whether they have a user-specified display format. We test
-        # for that here.
-        return default_formatter(value) != display_value
 
-    cell_selector_regex = re.compile(r"row(\d+)_col(\d+)")
-    header_selector_regex = re.compile(r"level(\d+)_row(\d+)")
+def _get_custom_display_values(df, styler):
+    """Parses a pandas.Styler's formatters into a {(row, col): display_value}
+    dictionary for cells whose display format has been customized.
+    """
+    # styler._display_funcs is a defaultdict that maps (row, col) to the
+    # cell's formatter. Only cells that Styler.format was called on, or that
+    # were rendered before, are in it. Pandas applies a default formatter
+    # to all other cells, which the browser does itself.
+    default_formatter = styler._display_funcs.default_factory()
+
+    # Map: col -> [(row, formatter)], so each column's values are fetched
+    # once.
+    formatters_by_col = {}
+    for (row, col), formatter in styler._display_funcs.items():
+        if formatter != default_formatter:
+            formatters_by_col.setdefault(col, []).append((row, formatter))
 
     display_values = {}
-    for row in translated_style["body"]:
-        # row is a List[Dict], containing format data for each cell in the row,
-        # plus an extra first entry for the row header, which we skip
-        found_row_header = False
-        for cell in row:
-            cell_id = cell["id"]  # a string in the form 'row0_col0'
-            if header_selector_regex.match(cell_id):
-                if not found_row_header:
-                    # We don't care about processing row headers, but as
-                    # a sanity check, ensure we only see one per row
-                    found_row_header = True
-                    continue
-                else:
-                    raise RuntimeError('Found unexpected row header "%s"' % cell)
-            match = cell_selector_regex.match(cell_id)
-            if not match:
-                raise RuntimeError('Failed to parse cell selector "%s"' % cell_id)
-
+    for col, formatters in formatters_by_col.items():
+        values = df.iloc[:, col].values
+        for row, formatter in formatters:
+            value = values[row]
+            display_value = str(formatter(value))
             # Only store display values that differ from the cell's default
-            if has_custom_display_value(cell):
-                row = int(match.group(1))
-                col = int(match.group(2))
-                display_values[(row, col)] = str(cell["display_value"])
+            if display_value != str(value) and display_value != str(
+                default_formatter(value)
+            ):
+                display_values[(row, col)] = display_value
 
     return display_values
 
@@ -260,37 +481,45 @@ def _marshall_index(pandas_index, proto_index):
             # Deprecated in Pandas 0.24, do don't bother covering.
             index_codes = pandas_index.labels  # pragma: no cover
         for label in index_codes:
-            proto_index.multi_index.labels.add().data.extend(label)
+            _extend_packed_ints(proto_index.multi_index.labels.add(), label)
     elif type(pandas_index) == pd.DatetimeIndex:
         if pandas_index.tz is None:
             current_zone = tzlocal.get_localzone()
             pandas_index = pandas_index.tz_localize(current_zone)
-        proto_index.datetime_index.data.data.extend(pandas_index.astype(np.int64))
+        _extend_packed_ints(
+            proto_index.datetime_index.data, pandas_index.astype(np.int64)
+        )
     elif type(pandas_index) == pd.TimedeltaIndex:
-        proto_index.timedelta_index.data.data.extend(pandas_index.astype(np.int64))
+        _extend_packed_ints(
+            proto_index.timedelta_index.data, pandas_index.astype(np.int64)
+        )
     elif type(pandas_index) == pd.Int64Index:
-        proto_index.int_64_index.data.data.extend(pandas_index)
+        _extend_packed_ints(proto_index.int_64_index.data, pandas_index)
     elif type(pandas_index) == pd.Float64Index:
-        proto_index.float_64_index.data.data.extend(pandas_index)
+        _extend_packed_doubles(proto_index.float_64_index.data, pandas_index)
     else:
         raise NotImplementedError("Can't handle %s yet." % type(pandas_index))
 
 
-def _marshall_table(pandas_table, proto_table):
+def _marshall_table(pandas_table, proto_table, single_precision=False):
     """Convert a sequence of 1D arrays into proto.Table.
 
-    pandas_table - Sequence of 1D arrays which are AnyArray compatible (input).
-    proto_table  - proto.Table (output)
+    pandas_table     - Sequence of 1D arrays which are AnyArray compatible
+                       (input).
+    proto_table      - proto.Table (output)
+    single_precision - Whether to marshall floats as 32-bit floats (input)
     """
     for pandas_array in pandas_table:
-        _marshall_any_array(pandas_array, proto_table.cols.add())
+        _marshall_any_array(pandas_array, proto_table.cols.add(), single_precision)
 
 
-def _marshall_any_array(pandas_array, proto_array):
+def _marshall_any_array(pandas_array, proto_array, single_precision=False):
     """Convert a 1D numpy.Array into a proto.AnyArray.
 
-    pandas_array - 1D arrays which is AnyArray compatible (input).
-    proto_array  - proto.AnyArray (output)
+    pandas_array     - 1D arrays which is AnyArray compatible (input).
+    proto_array      - proto.AnyArray (output)
+    single_precision - Whether to marshall floats into proto_array.floats
+                       rather than proto_array.doubles (input)
     """
     import numpy as np
 
@@ -303,16 +532,22 @@ def _marshall_any_array(pandas_array, proto_array):
         raise ValueError("Array must be 1D.")
 
     # Perform type-conversion based on the array dtype.
-    if issubclass(pandas_array.dtype.type, np.floating):
-        proto_array.doubles.data.extend(pandas_array)
+    if pandas_array.dtype.name == "category":
+        _marshall_categorical(pandas_array, proto_array.string_dictionary)
+    elif issubclass(pandas_array.dtype.type, np.floating):
+        if single_precision:
+            _extend_packed_floats(proto_array.floats, pandas_array)
+        else:
+            _extend_packed_doubles(proto_array.doubles, pandas_array)
     elif issubclass(pandas_array.dtype.type, np.timedelta64):
-        proto_array.timedeltas.data.extend(pandas_array.astype(np.int64))
+        _extend_packed_ints(proto_array.timedeltas, pandas_array.astype(np.int64))
     elif issubclass(pandas_array.dtype.type, np.integer):
-        proto_array.int64s.data.extend(pandas_array)
+        _extend_packed_ints(proto_array.int64s, pandas_array)
     elif pandas_array.dtype == np.bool:
-        proto_array.int64s.data.extend(pandas_array)
+        _extend_packed_ints(proto_array.int64s, pandas_array)
     elif pandas_array.dtype == np.object:
-        proto_array.strings.data.extend(map(str, pandas_array))
+        if not _maybe_marshall_string_dictionary(pandas_array, proto_array):
+            proto_array.strings.data.extend(map(str, pandas_array))
     # Setting a timezone changes (dtype, dtype.type) from
     #   'datetime64[ns]', <class 'numpy.datetime64'>
     # to
@@ -322,12 +557,203 @@ def _marshall_any_array(pandas_array, proto_array):
         if pandas_array.dt.tz is None:
             current_zone = tzlocal.get_localzone()
             pandas_array = pandas_array.dt.tz_localize(current_zone)
-        proto_array.datetimes.data.extend(pandas_array.astype(np.int64))
+        _extend_packed_ints(proto_array.datetimes, pandas_array.astype(np.int64))
     else:
         raise NotImplementedError("Dtype %s not understood." % pandas_array.dtype)
 
 
-def add_rows(delta1, delta2, name=None):
+# Object columns of strings are dictionary-encoded if they have at most this
+# many distinct values per element.
+_MAX_STRING_DICTIONARY_RATIO = 0.5
+
+# Number of elements of large object columns whose distinct values are
+# counted first, to skip dictionary-encoding columns of mostly distinct
+# strings without hashing them all.
+_STRING_DICTIONARY_SAMPLE_SIZE = 10000
+
+
+def _marshall_categorical(pandas_array, proto_dictionary):
+    """Convert a 1D categorical array into a proto.StringDictionaryArray.
+
+    pandas_array     - 1D categorical array (input)
+    proto_dictionary - proto.StringDictionaryArray (output)
+    """
+    import numpy as np
+    import pandas as pd
+
+    categorical = pd.Categorical(pandas_array)
+    values = [str(category) for category in categorical.categories]
+    codes = categorical.codes.astype(np.int64)
+    if (codes < 0).any():
+        # Missing values are shown as "nan", like in object columns.
+        codes[codes < 0] = len(values)
+        values.append(str(np.nan))
+
+    proto_dictionary.values.data.extend(values)
+    _extend_packed_ints(proto_dictionary.codes, codes)
+
+
+def _maybe_marshall_string_dictionary(pandas_array, proto_array):
+    """Convert a 1D object array into a proto.StringDictionaryArray in
+    proto_array, if it holds strings and few distinct ones.
+
+    Only strings are dictionary-encoded, since other values that are equal,
+    like 1 and 1.0, can have different string representations.
+
+    Returns True if it did, False if proto_array wasn't modified.
+    """
+    import numpy as np
+    import pandas as pd
+
+    num_values = len(pandas_array)
+    if num_values < 2 or pd.api.types.infer_dtype(pandas_array, skipna=True) not in (
+        "string",
+        "empty",
+    ):
+        return False
+
+    objects = np.asarray(pandas_array, dtype=object)
+    if num_values > _STRING_DICTIONARY_SAMPLE_SIZE:
+        sample = objects[:: num_values // _STRING_DICTIONARY_SAMPLE_SIZE]
+        # A sample has more distinct values per element than the whole
+        # column, so only skip columns whose sample is nearly all distinct.
+        if len(pd.unique(sample)) > 0.9 * len(sample):
+            return False
+
+    codes, uniques = pd.factorize(objects)
+    values = [str(value) for value in uniques]
+
+    missing = codes < 0
+    if missing.any():
+        # None and NaN are shown as "None" and "nan", like in string arrays.
+        missing_codes, missing_values = pd.factorize(
+            np.array([str(value) for value in objects[missing]], dtype=object)
+        )
+        codes[missing] = missing_codes + len(values)
+        values.extend(missing_values)
+
+    if len(values) > num_values * _MAX_STRING_DICTIONARY_RATIO:
+        return False
+
+    proto_dictionary = proto_array.string_dictionary
+    proto_dictionary.values.data.extend(values)
+    _extend_packed_ints(proto_dictionary.codes, codes)
+    return True
+
+
+# The tag of the "data" field in DoubleArray, Int32Array and Int64Array:
+# field number 1, length-delimited wire type. Repeated numeric fields are
+# packed in proto3, so "data" is encoded as a single length-delimited blob.
+_PACKED_DATA_TAG = b"\x0a"
+
+# The smallest value that needs 2, 3, ..., 10 bytes as a varint. Lazily built,
+# since numpy is imported lazily.
+_VARINT_LIMITS = None
+
+
+def _extend_packed_doubles(proto_array, values):
+    """Append a numeric array to a proto.DoubleArray.
+
+    Instead of extending proto_array.data one element at a time, this
+    encodes the array's packed wire format (little-endian float64s)
+    straight from its buffer and merges it in.
+
+    proto_array - proto.DoubleArray (output)
+    values      - 1D array-like of numbers (input)
+    """
+    import numpy as np
+
+    payload = np.asarray(values).astype("<f8", copy=False).tobytes()
+    _merge_packed_data(proto_array, payload)
+
+
+def _extend_packed_floats(proto_array, values):
+    """Append a numeric array to a proto.SingleArray, like
+    _extend_packed_doubles but as little-endian float32s.
+
+    proto_array - proto.SingleArray (output)
+    values      - 1D array-like of numbers (input)
+    """
+    import numpy as np
+
+    payload = np.asarray(values).astype("<f4", copy=False).tobytes()
+    _merge_packed_data(proto_array, payload)
+
+
+def _extend_packed_ints(proto_array, values):
+    """Append an integer or bool array to a proto.Int32Array,
+    proto.Int64Array or, for non-negative values, proto.UInt32Array.
+
+    Like _extend_packed_doubles, but the wire format is a varint per element,
+    which is encoded with vectorized numpy operations.
+
+    proto_array - proto.Int32Array, proto.Int64Array or proto.UInt32Array
+                  (output)
+    values      - 1D array-like of integers or bools (input)
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    if values.dtype == np.uint64:
+        # Values above the int64 range can't be cast losslessly. Let the
+        # proto reject them, like it always has.
+        proto_array.data.extend(values)
+        return
+
+    payload = _encode_varints(values.astype(np.int64, copy=False))
+    _merge_packed_data(proto_array, payload)
+
+
+def _merge_packed_data(proto_array, payload):
+    """Merge a packed "data" field's payload into a proto array."""
+    if len(payload) == 0:
+        # Still mark the array as set, so e.g. AnyArray's type is known.
+        proto_array.SetInParent()
+        return
+    header = _PACKED_DATA_TAG + _encode_varints([len(payload)])
+    proto_array.MergeFromString(header + payload)
+
+
+def _encode_varints(values):
+    """Encode int64s as consecutive protobuf varints.
+
+    Negative numbers take 10 bytes, as they're encoded as their 64-bit
+    two's complement.
+
+    values - 1D array-like of int64s (input)
+
+    Returns bytes.
+    """
+    import numpy as np
+
+    global _VARINT_LIMITS
+    if _VARINT_LIMITS is None:
+        _VARINT_LIMITS = np.uint64(1) << np.arange(7, 64, 7, dtype=np.uint64)
+
+    values = np.asarray(values, dtype=np.int64).view(np.uint64)
+    if len(values) == 0:
+        return b""
+
+    # Each byte holds 7 bits of the value, least significant first, plus a
+    # high bit saying whether more bytes follow.
+    num_bytes = np.searchsorted(_VARINT_LIMITS, values, side="right") + 1
+    last_byte = num_bytes - 1
+    ends = np.cumsum(num_bytes)
+    starts = ends - num_bytes
+    encoded = np.empty(ends[-1], dtype=np.uint8)
+
+    # Go from the last byte to the first, so that values with fewer bytes,
+    # whose position is clamped to their last byte, get the right last byte
+    # written over the junk ones.
+    for i in range(num_bytes.max() - 1, -1, -1):
+        chunk = ((values >> np.uint64(7 * i)) & np.uint64(0x7F)).astype(np.uint8)
+        chunk |= (last_byte > i).astype(np.uint8) << 7
+        encoded[starts + np.minimum(i, last_byte)] = chunk
+
+    return encoded.tobytes()
+
+
+def add_rows(delta1, delta2, name=None, max_rows=0):
     """Concat the DataFrame in delta2 to the DataFrame in delta1.
 
     Parameters
@@ -335,15 +761,30 @@ def add_rows(delta1, delta2, name=None):
     delta1 : Delta
     delta2 : Delta
     name : str or None
+    max_rows : int
+        If nonzero, only the last max_rows rows of the concatenated
+        DataFrame are kept.
 
     """
     df1 = _get_data_frame(delta1, name)
     df2 = _get_data_frame(delta2, name)
 
-    if len(df1.data.cols) == 0:
-        if len(df2.data.cols) == 0:
+    if _is_empty(df1):
+        if _is_empty(df2):
             return
         df1.CopyFrom(df2)
+        if max_rows:
+            _trim_data_frame(df1, max_rows)
+        return
+
+    if df1.arrow_data or df2.arrow_data:
+        if not (df1.arrow_data and df2.arrow_data):
+            raise ValueError(
+                "Cannot add rows to a DataFrame marshalled as Arrow from one "
+                "that isn't, or vice versa. Styled DataFrames and "
+                "MultiIndices aren't marshalled as Arrow."
+            )
+        arrow_data_frame.add_rows(df1, df2, max_rows)
         return
 
     # Copy Data
@@ -360,8 +801,132 @@ def add_rows(delta1, delta2, name=None):
     # DON'T DO: _concat_index(df1.columns, df2.columns)
 
     # Copy styles
-    for (style_col1, style_col2) in zip(df1.style.cols, df2.style.cols):
-        _concat_cell_style_array(style_col1, style_col2)
+    _concat_table_style(df1.style, df2.style)
+
+    if max_rows:
+        _trim_data_frame(df1, max_rows)
+
+
+def get_num_rows(proto_df):
+    """Return the number of rows in a proto.DataFrame."""
+    if proto_df.arrow_data:
+        return arrow_data_frame.get_num_rows(proto_df)
+    return _index_len(proto_df.index) or 0
+
+
+def _is_empty(proto_df):
+    """Return True if a proto.DataFrame has no columns."""
+    if proto_df.arrow_data:
+        return arrow_data_frame.get_num_columns(proto_df) == 0
+    return len(proto_df.data.cols) == 0
+
+
+def can_append_rows(delta1, delta2, name=None):
+    """Return True if add_rows(delta1, delta2, name) would simply append
+    delta2's rows to the non-empty DataFrame in delta1.
+
+    When this holds, any number of such deltas can be added to delta1 one
+    after the other without raising, since appending rows doesn't change
+    delta1's column and index types.
+
+    Parameters
+    ----------
+    delta1 : Delta
+    delta2 : Delta
+    name : str or None
+
+    """
+    try:
+        df1 = _get_data_frame(delta1, name)
+        df2 = _get_data_frame(delta2, name)
+    except ValueError:
+        return False
+
+    if df1 is None or df2 is None:
+        return False
+
+    if len(df1.data.cols) == 0 or len(df1.data.cols) != len(df2.data.cols):
+        return False
+
+    for (col1, col2) in zip(df1.data.cols, df2.data.cols):
+        if not _can_append_any_array(col1, col2):
+            return False
+
+    index_type = df1.index.WhichOneof("type")
+    if index_type != df2.index.WhichOneof("type") or not _index_len(df1.index):
+        return False
+    if index_type == "plain_index":
+        return _can_append_any_array(
+            df1.index.plain_index.data, df2.index.plain_index.data
+        )
+    return index_type in (
+        "range_index",
+        "int_64_index",
+        "datetime_index",
+        "timedelta_index",
+    )
+
+
+def _can_append_any_array(any_array_1, any_array_2):
+    array_type = _get_value_type(any_array_1)
+    return (
+        array_type is not None
+        and array_type == _get_value_type(any_array_2)
+        and _any_array_len(any_array_1) > 0
+    )
+
+
+def _get_value_type(any_array):
+    """Return the type of an AnyArray, except that dictionary-encoded strings
+    are "strings" too, and single precision floats are "doubles"."""
+    array_type = any_array.WhichOneof("type")
+    return _VALUE_TYPES.get(array_type, array_type)
+
+
+_VALUE_TYPES = {"string_dictionary": "strings", "floats": "doubles"}
+
+
+def _trim_data_frame(proto_df, max_rows):
+    """Drop all but the last max_rows rows of a proto.DataFrame."""
+    if proto_df.arrow_data:
+        arrow_data_frame.trim(proto_df, max_rows)
+        return
+    for col in proto_df.data.cols:
+        _trim_any_array(col, max_rows)
+    _trim_index(proto_df.index, max_rows)
+    for style_col in proto_df.style.cols:
+        _trim_repeated(style_col.styles, max_rows)
+    for style_indices in proto_df.style.style_indices:
+        _trim_repeated(style_indices.data, max_rows)
+
+
+def _trim_index(index, max_rows):
+    index_type = index.WhichOneof("type")
+    if index_type == "plain_index":
+        _trim_any_array(index.plain_index.data, max_rows)
+    elif index_type == "range_index":
+        index.range_index.start = max(
+            index.range_index.start, index.range_index.stop - max_rows
+        )
+    elif index_type == "multi_index":
+        for labels in index.multi_index.labels:
+            _trim_repeated(labels.data, max_rows)
+    elif index_type is not None:
+        _trim_repeated(getattr(index, index_type).data.data, max_rows)
+
+
+def _trim_any_array(any_array, max_rows):
+    array_type = any_array.WhichOneof("type")
+    if array_type == "string_dictionary":
+        _trim_repeated(any_array.string_dictionary.codes.data, max_rows)
+    elif array_type is not None:
+        _trim_repeated(getattr(any_array, array_type).data, max_rows)
+
+
+def _trim_repeated(repeated, max_rows):
+    excess = len(repeated) - max_rows
+    if excess > 0:
+        del repeated[:excess]
 
 
 def _concat_index(index1, index2):
@@ -407,14 +972,119 @@ def _concat_any_array(any_array_1, any_array_2):
 
     type1 = any_array_1.WhichOneof("type")
     type2 = any_array_2.WhichOneof("type")
-    if type1 != type2:
+    if _get_value_type(any_array_1) != _get_value_type(any_array_2):
         raise ValueError(
             "Cannot concatenate %(type1)s with %(type2)s."
             % {"type1": type1, "type2": type2}
         )
+    if type1 == "string_dictionary" or type2 == "string_dictionary":
+        _concat_string_dictionary(any_array_1, any_array_2)
+        return
+    if type1 != type2:
+        # Floats with different precisions. The result has double precision.
+        if type1 == "floats":
+            floats = list(any_array_1.floats.data)
+            any_array_1.doubles.data.extend(floats)
+        any_array_1.doubles.data.extend(getattr(any_array_2, type2).data)
+        return
     getattr(any_array_1, type1).data.extend(getattr(any_array_2, type2).data)
 
 
+def _concat_string_dictionary(any_array_1, any_array_2):
+    """Concat the strings in any_array_2 into any_array_1, either of which
+    is dictionary-encoded. The result is dictionary-encoded."""
+    import numpy as np
+
+    if any_array_1.WhichOneof("type") == "strings":
+        # Dictionary-encode any_array_1 first. This replaces its strings.
+        strings = list(any_array_1.strings.data)
+        any_array_1.string_dictionary.codes.SetInParent()
+        _extend_string_dictionary(any_array_1.string_dictionary, strings)
+
+    dictionary = any_array_1.string_dictionary
+    if any_array_2.WhichOneof("type") == "strings":
+        _extend_string_dictionary(dictionary, any_array_2.strings.data)
+        return
+
+    # Map the codes of any_array_2's values to the codes of the same values
+    # in any_array_1, adding the values it doesn't have.
+    values2 = any_array_2.string_dictionary.values.data
+    new_codes = np.array(_get_string_codes(dictionary, values2), dtype=np.int64)
+    codes2 = np.asarray(any_array_2.string_dictionary.codes.data, dtype=np.int64)
+    _extend_packed_ints(dictionary.codes, new_codes[codes2])
+
+
+def _extend_string_dictionary(proto_dictionary, strings):
+    """Append strings to a proto.StringDictionaryArray."""
+    _extend_packed_ints(
+        proto_dictionary.codes, _get_string_codes(proto_dictionary, strings)
+    )
+
+
+def _get_string_codes(proto_dictionary, strings):
+    """Return the codes of strings in a proto.StringDictionaryArray, adding
+    the ones that aren't in its values."""
+    codes = {value: code for code, value in enumerate(proto_dictionary.values.data)}
+    new_values = []
+    result = []
+    for string in strings:
+        code = codes.get(string)
+        if code is None:
+            code = codes[string] = len(codes)
+            new_values.append(string)
+        result.append(code)
+    proto_dictionary.values.data.extend(new_values)
+    return result
+
+
+def _concat_table_style(table_style1, table_style2):
+    """Concat the cell styles in table_style2 into table_style1."""
+    if table_style1.cols or table_style2.cols:
+        # At least one of them isn't dictionary-encoded, so neither is the
+        # result.
+        _decode_table_style(table_style1)
+        _decode_table_style(table_style2)
+        for (style_col1, style_col2) in zip(table_style1.cols, table_style2.cols):
+            _concat_cell_style_array(style_col1, style_col2)
+        return
+
+    import numpy as np
+
+    # Map: serialized style -> index in table_style1.unique_styles, so the
+    # styles that both tables have are still only stored once.
+    unique_styles = {
+        cell_style.SerializeToString(): index
+        for index, cell_style in enumerate(table_style1.unique_styles)
+    }
+    new_indices = np.zeros(len(table_style2.unique_styles), dtype=np.int64)
+    for index, cell_style in enumerate(table_style2.unique_styles):
+        key = cell_style.SerializeToString()
+        if key not in unique_styles:
+            unique_styles[key] = len(table_style1.unique_styles)
+            table_style1.unique_styles.add().CopyFrom(cell_style)
+        new_indices[index] = unique_styles[key]
+
+    for (indices1, indices2) in zip(
+        table_style1.style_indices, table_style2.style_indices
+    ):
+        indices = np.asarray(indices2.data, dtype=np.int64)
+        _extend_packed_ints(indices1, new_indices[indices])
+
+
+def _decode_table_style(table_style):
+    """Replace the dictionary-encoded cell styles of a proto.TableStyle with
+    a CellStyleArray per column. No-op if they're not dictionary-encoded."""
+    if not table_style.style_indices:
+        return
+
+    for indices in table_style.style_indices:
+        table_style.cols.add().styles.extend(
+            table_style.unique_styles[index] for index in indices.data
+        )
+    del table_style.unique_styles[:]
+    del table_style.style_indices[:]
+
+
 def _concat_cell_style_array(style_array1, style_array2):
     """Concat elements from any_array_2 into any_array_1."""
     # Special case if array1 is empty
@@ -500,5 +1170,7 @@ def _index_len(index):
 def _any_array_len(any_array):
     """Return the length of an any_array."""
     array_type = any_array.WhichOneof("type")
+    if array_type == "string_dictionary":
+        return len(any_array.string_dictionary.codes.data)
     the_array = getattr(any_array, array_type).data
     return len(the_array)
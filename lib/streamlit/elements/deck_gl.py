@@ -76,7 +76,9 @@ def marshall(proto, spec=None, **kwargs):
         layer_proto.spec = json.dumps(fixed_layer)
         # TODO: If several layers use the same data frame, the data gets resent
         # for each layer. Need to improve this.
-        data_frame_proto.marshall_data_frame(data, layer_proto.data)
+        data_frame_proto.marshall_data_frame(
+            data, layer_proto.data, allow_single_precision=True
+        )
 
     del spec["layers"]
 
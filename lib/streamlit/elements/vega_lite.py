@@ -77,7 +77,9 @@ def marshall(proto, data=None, spec=None, width=0, **kwargs):
             dataset = proto.datasets.add()
             dataset.name = str(k)
             dataset.has_name = True
-            data_frame_proto.marshall_data_frame(v, dataset.data)
+            data_frame_proto.marshall_data_frame(
+                v, dataset.data, allow_single_precision=True
+            )
         del spec["datasets"]
 
     # Pull data out of spec dict when it's in a top-level 'data' key:
@@ -99,7 +101,9 @@ def marshall(proto, data=None, spec=None, width=0, **kwargs):
     proto.spec = json.dumps(spec)
 
     if data is not None:
-        data_frame_proto.marshall_data_frame(data, proto.data)
+        data_frame_proto.marshall_data_frame(
+            data, proto.data, allow_single_precision=True
+        )
 
 
 # See https://vega.github.io/vega-lite/docs/encoding.html
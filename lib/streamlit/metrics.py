@@ -38,6 +38,9 @@ class MockMetric(object):
     def set(self, *args, **kwargs):
         pass
 
+    def observe(self, *args, **kwargs):
+        pass
+
 
 class Client(object):
 
@@ -65,6 +68,11 @@ class Client(object):
         # yapf: disable
         self._raw_metrics  = [
             ('Counter', 'streamlit_enqueue_deltas_total', 'Total deltas enqueued', ['type']),
+            ('Gauge', 'streamlit_websocket_outbound_bytes', 'Bytes written to WebSockets but not yet delivered', []),
+            ('Counter', 'streamlit_deferred_flushes_total', 'Browser queue flushes deferred because a client was over its outbound budget', []),
+            ('Counter', 'streamlit_slow_clients_disconnected_total', 'Browsers disconnected for staying over their outbound budget', []),
+            ('Gauge', 'streamlit_script_runs_waiting', 'Script runs waiting for a run slot', []),
+            ('Histogram', 'streamlit_script_run_queue_wait_seconds', 'Time script runs spent waiting for a run slot', []),
         ]
         # yapf: enable
 
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Caches the compiled code of scripts, so reruns don't recompile them."""
+
+import hashlib
+import threading
+
+from streamlit import config
+from streamlit import magic
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Map: script_path -> (cache key, code object). The cache key covers
+# everything that compilation depends on: the script's contents, and
+# whether magic is enabled.
+_compiled_scripts = {}
+_compiled_scripts_lock = threading.Lock()
+
+
+def get_code(script_path):
+    """Return the compiled code of a script.
+
+    The script is still read on every call, so edits are picked up even if
+    no file watcher told us about them. But it's only parsed, transformed
+    by magic, and compiled if it changed.
+
+    Parameters
+    ----------
+    script_path : str
+        Path of the script.
+
+    Returns
+    -------
+    code
+        The code object, ready to be passed to exec().
+
+    Raises
+    ------
+    BaseException
+        Any error raised while reading or compiling the script. Errors are
+        not cached.
+
+    """
+    # Python 3 got rid of the native execfile() command, so we read
+    # the file, compile it, and exec() it. This implementation is
+    # compatible with both 2 and 3.
+    with open(script_path) as f:
+        filebody = f.read()
+
+    magic_enabled = config.get_option("runner.magicEnabled")
+    key = (_hash_contents(filebody), magic_enabled)
+
+    with _compiled_scripts_lock:
+        cached = _compiled_scripts.get(script_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    LOGGER.debug("Compiling %s", script_path)
+
+    if magic_enabled:
+        filebody = magic.add_magic(filebody, script_path)
+
+    code = compile(
+        filebody,
+        # Pass in the file path so it can show up in exceptions.
+        script_path,
+        # We're compiling entire blocks of Python, so we need "exec"
+        # mode (as opposed to "eval" or "single").
+        mode="exec",
+        # Don't inherit any flags or "future" statements.
+        flags=0,
+        dont_inherit=1,
+        # Parameter not supported in Python2:
+        # optimize=-1,
+    )
+
+    with _compiled_scripts_lock:
+        _compiled_scripts[script_path] = (key, code)
+
+    return code
+
+
+def invalidate(script_path):
+    """Drop a script's compiled code. Called when the script changes."""
+    with _compiled_scripts_lock:
+        _compiled_scripts.pop(script_path, None)
+
+
+def _hash_contents(filebody):
+    if not isinstance(filebody, bytes):
+        filebody = filebody.encode("utf-8")
+    return hashlib.md5(filebody).hexdigest()
@@ -13,36 +13,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import logging
 import threading
 import sys
 import errno
+import time
 from enum import Enum
 
 import tornado.concurrent
 import tornado.gen
+import tornado.httpserver
 import tornado.ioloop
+import tornado.netutil
 import tornado.web
 import tornado.websocket
 
 from streamlit import config
+from streamlit import metrics
 from streamlit import util
+from streamlit.DataFrameStore import DataFrameStore
 from streamlit.ForwardMsgCache import ForwardMsgCache
+from streamlit.ForwardMsgCache import SentElementTracker
 from streamlit.ForwardMsgCache import create_reference_msg
 from streamlit.ForwardMsgCache import populate_hash_if_needed
 from streamlit.ReportSession import ReportSession
 from streamlit.logger import get_logger
 from streamlit.proto.BackMsg_pb2 import BackMsg
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.routes import DataFrameWindowHandler
 from streamlit.server.routes import DebugHandler
 from streamlit.server.routes import HealthHandler
 from streamlit.server.routes import MessageCacheHandler
 from streamlit.server.routes import MetricsHandler
 from streamlit.server.routes import StaticFileHandler
+from streamlit.server.server_util import MESSAGE_CHUNK_SIZE
 from streamlit.server.server_util import MESSAGE_SIZE_LIMIT
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
 from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import serialize_msg_chunks
 
 LOGGER = get_logger(__name__)
 
@@ -55,14 +65,14 @@ TORNADO_SETTINGS = {
 }
 
 
-# Dictionary key used to mark the script execution context that starts
-# up before the first browser connects.
-PREHEATED_REPORT_SESSION = "PREHEATED_REPORT_SESSION"
-
 # When server.port is not available it will look for the next available port
 # up to MAX_PORT_SEARCH_RETRIES.
 MAX_PORT_SEARCH_RETRIES = 100
 
+# When server.refillPreheatedSessions is set, preheated sessions older than
+# this aren't given to browsers, since their output may be out of date.
+PREHEATED_SESSION_MAX_AGE_SECS = 60
+
 
 class SessionInfo(object):
     """Type stored in our _report_sessions dict.
@@ -82,6 +92,26 @@ class SessionInfo(object):
         self.session = session
         self.report_run_count = 0
 
+        # Bytes written to the session's websocket that haven't been
+        # delivered to the network yet.
+        self.outbound_bytes = 0
+
+        # IOLoop time at which outbound_bytes went over the
+        # server.maxOutboundBytes budget, or None if it's within budget.
+        self.over_budget_since = None
+
+        # Future for the in-progress chunked send of an oversized message,
+        # or None if no chunked send is in progress.
+        self.chunked_send_future = None
+
+        # Messages flushed from the browser queue that are waiting for a
+        # chunked send to finish before they can be sent.
+        self.unsent_msgs = []
+
+        # The elements sent to the browser in the current and the previous
+        # report run.
+        self.sent_elements = SentElementTracker()
+
 
 class State(Enum):
     INITIAL = "INITIAL"
@@ -108,9 +138,30 @@ def start_listening(app, call_count=0):
 
     """
 
+    _with_port_rotation(app.listen, call_count)
+
+
+def bind_sockets():
+    """Bind the sockets that the server listens on to the configured port,
+    trying the next ports if it's taken, like start_listening.
+
+    For server.numWorkers, whose worker processes inherit the sockets and
+    pass them to their Server.
+
+    Returns
+    -------
+    list of socket.socket
+
+    """
+    return _with_port_rotation(tornado.netutil.bind_sockets)
+
+
+def _with_port_rotation(listen, call_count=0):
+    """Call listen with the configured port, moving on to the next port
+    while it's already in use. Return listen's return value."""
     port = config.get_option("server.port")
     try:
-        app.listen(port)
+        return listen(port)
     except OSError as e:
         if e.errno == errno.EADDRINUSE:
             if call_count >= MAX_PORT_SEARCH_RETRIES:
@@ -132,7 +183,7 @@ def start_listening(app, call_count=0):
                     port += 1
 
                 config._set_option("server.port", port, "server initialization")
-                start_listening(app, call_count + 1)
+                return _with_port_rotation(listen, call_count + 1)
         else:
             raise
 
@@ -149,7 +200,9 @@ class Server(object):
 
         return Server._singleton
 
-    def __init__(self, ioloop, script_path, command_line):
+    def __init__(
+        self, ioloop, script_path, command_line, message_cache_dir=None, sockets=None
+    ):
         """Create the server. It won't be started yet.
 
         Parameters
@@ -157,6 +210,12 @@ class Server(object):
         ioloop : tornado.ioloop.IOLoop
         script_path : str
         command_line : str
+        message_cache_dir : str or None
+            A directory in which to share cached messages with the other
+            worker processes, when running with server.numWorkers > 1.
+        sockets : list of socket.socket or None
+            Bound sockets to listen on, shared with the other worker
+            processes (see bind_sockets). If None, the server binds its own.
 
         """
         if Server._singleton is not None:
@@ -173,10 +232,16 @@ class Server(object):
         # Mapping of WebSocket->SessionInfo.
         self._session_infos = {}
 
+        # (creation time, ReportSession) pairs of sessions that have run the
+        # script before any browser connected to them, waiting to be claimed
+        # by new browsers.
+        self._preheated_sessions = collections.deque()
+
         self._must_stop = threading.Event()
         self._state = None
         self._set_state(State.INITIAL)
-        self._message_cache = ForwardMsgCache()
+        self._message_cache = ForwardMsgCache(message_cache_dir)
+        self._sockets = sockets
 
     def start(self, on_started):
         """Start the server.
@@ -194,7 +259,13 @@ class Server(object):
         LOGGER.debug("Starting server...")
 
         app = self._create_app()
-        start_listening(app)
+        if self._sockets is not None:
+            # The kernel spreads incoming connections across the worker
+            # processes that accept on the shared sockets.
+            http_server = tornado.httpserver.HTTPServer(app)
+            http_server.add_sockets(self._sockets)
+        else:
+            start_listening(app)
 
         port = config.get_option("server.port")
 
@@ -223,6 +294,11 @@ class Server(object):
             (r"/debugz", DebugHandler, dict(server=self)),
             (r"/metrics", MetricsHandler),
             (r"/message", MessageCacheHandler, dict(cache=self._message_cache)),
+            (
+                r"/dataframe",
+                DataFrameWindowHandler,
+                dict(store=DataFrameStore.get_current()),
+            ),
         ]
 
         if config.get_option("global.developmentMode") and config.get_option(
@@ -282,16 +358,27 @@ class Server(object):
                 session_pairs = list(self._session_infos.items())
 
                 for ws, session_info in session_pairs:
-                    if ws is PREHEATED_REPORT_SESSION:
-                        continue
                     if ws is None:
                         continue
-                    msg_list = session_info.session.flush_browser_queue()
-                    for msg in msg_list:
+                    if self._is_sending_chunked_message(ws, session_info):
+                        continue
+                    if self._is_over_outbound_budget(ws, session_info):
+                        continue
+                    msg_list = (
+                        session_info.unsent_msgs
+                        + session_info.session.flush_browser_queue()
+                    )
+                    session_info.unsent_msgs = []
+                    for i, msg in enumerate(msg_list):
                         try:
                             self._send_message(ws, session_info, msg)
                         except tornado.websocket.WebSocketClosedError:
                             self._remove_browser_connection(ws)
+                        if session_info.chunked_send_future is not None:
+                            # Preserve message order: the rest of the list
+                            # waits until all chunks have been written.
+                            session_info.unsent_msgs = msg_list[i + 1 :]
+                            break
                         yield
                     yield
 
@@ -307,6 +394,9 @@ class Server(object):
         # Shut down all ReportSessions
         for session_info in list(self._session_infos.values()):
             session_info.session.shutdown()
+        while self._preheated_sessions:
+            _, session = self._preheated_sessions.popleft()
+            session.shutdown()
 
         self._set_state(State.STOPPED)
 
@@ -319,6 +409,9 @@ class Server(object):
         instead send a "reference" message that contains only the hash of the
         message.
 
+        Messages larger than MESSAGE_CHUNK_SIZE are sent in chunks, in the
+        background. See _send_chunked_message.
+
         Parameters
         ----------
         ws : _BrowserWebSocketHandler
@@ -329,27 +422,30 @@ class Server(object):
             The message to send to the client
 
         """
-        msg.metadata.cacheable = is_cacheable_msg(msg)
-        msg_to_send = msg
-        if msg.metadata.cacheable:
-            populate_hash_if_needed(msg)
-
-            if self._message_cache.has_message_reference(
-                msg, session_info.session, session_info.report_run_count
-            ):
-
-                # This session has probably cached this message. Send
-                # a reference instead.
-                LOGGER.debug("Sending cached message ref (hash=%s)" % msg.hash)
-                msg_to_send = create_reference_msg(msg)
-
-            # Cache the message so it can be referenced in the future.
-            # If the message is already cached, this will reset its
-            # age.
-            LOGGER.debug("Caching message (hash=%s)" % msg.hash)
-            self._message_cache.add_message(
-                msg, session_info.session, session_info.report_run_count
-            )
+        msg_to_send = session_info.sent_elements.process(msg)
+        if msg_to_send is not msg:
+            LOGGER.debug("Sending unchanged element (hash=%s)" % msg.hash)
+        else:
+            msg.metadata.cacheable = is_cacheable_msg(msg)
+            if msg.metadata.cacheable:
+                populate_hash_if_needed(msg)
+
+                if self._message_cache.has_message_reference(
+                    msg, session_info.session, session_info.report_run_count
+                ):
+
+                    # This session has probably cached this message. Send
+                    # a reference instead.
+                    LOGGER.debug("Sending cached message ref (hash=%s)" % msg.hash)
+                    msg_to_send = create_reference_msg(msg)
+
+                # Cache the message so it can be referenced in the future.
+                # If the message is already cached, this will reset its
+                # age.
+                LOGGER.debug("Caching message (hash=%s)" % msg.hash)
+                self._message_cache.add_message(
+                    msg, session_info.session, session_info.report_run_count
+                )
 
         # If this was a `report_finished` message, we increment the
         # report_run_count for this session, and update the cache
@@ -369,7 +465,113 @@ class Server(object):
             )
 
         # Ship it off!
-        ws.write_message(serialize_forward_msg(msg_to_send), binary=True)
+        msg_str = serialize_forward_msg(msg_to_send)
+        if len(msg_str) > MESSAGE_CHUNK_SIZE:
+            session_info.chunked_send_future = self._send_chunked_message(
+                ws, session_info, msg_to_send.hash, msg_str
+            )
+            return
+
+        write_future = ws.write_message(msg_str, binary=True)
+        _track_outbound_bytes(session_info, len(msg_str), write_future)
+
+    @tornado.gen.coroutine
+    def _send_chunked_message(self, ws, session_info, msg_hash, msg_str):
+        """Send an oversized serialized message to a client in chunks.
+
+        Each chunk is only written once the previous one has been flushed to
+        the network, so a huge message never sits in the socket's write
+        buffer all at once, and other sessions get served in between.
+
+        Parameters
+        ----------
+        ws : _BrowserWebSocketHandler
+        session_info : SessionInfo
+        msg_hash : str
+            The hash of the message. The client uses it to reassemble the
+            message from its chunks.
+        msg_str : str
+            The serialized message.
+
+        """
+        LOGGER.debug(
+            "Sending message in chunks (hash=%s, size=%s)", msg_hash, len(msg_str)
+        )
+        for chunk_str in serialize_msg_chunks(msg_hash, msg_str, MESSAGE_CHUNK_SIZE):
+            write_future = ws.write_message(chunk_str, binary=True)
+            _track_outbound_bytes(session_info, len(chunk_str), write_future)
+            yield write_future
+
+    def _is_sending_chunked_message(self, ws, session_info):
+        """True if a chunked send to this client is still in progress.
+
+        If the chunked send failed, the client is disconnected.
+
+        Parameters
+        ----------
+        ws : _BrowserWebSocketHandler
+        session_info : SessionInfo
+
+        Returns
+        -------
+        bool
+
+        """
+        future = session_info.chunked_send_future
+        if future is None:
+            return False
+        if not future.done():
+            return True
+
+        session_info.chunked_send_future = None
+        if future.exception() is not None:
+            LOGGER.debug("Chunked send failed: %s", future.exception())
+            self._remove_browser_connection(ws)
+            return True
+
+        return False
+
+    def _is_over_outbound_budget(self, ws, session_info):
+        """True if a client has too many undelivered bytes to be sent more.
+
+        While a client is over budget we don't flush its browser queue.
+        Instead, new messages accumulate in the session's ReportQueue, which
+        composes deltas that share an ID, so superseded deltas are dropped
+        rather than buffered. Clients that stay over budget for longer than
+        server.slowClientTimeout are disconnected.
+
+        Parameters
+        ----------
+        ws : _BrowserWebSocketHandler
+        session_info : SessionInfo
+
+        Returns
+        -------
+        bool
+
+        """
+        if session_info.outbound_bytes <= config.get_option("server.maxOutboundBytes"):
+            session_info.over_budget_since = None
+            return False
+
+        now = self._ioloop.time()
+        if session_info.over_budget_since is None:
+            session_info.over_budget_since = now
+
+        if now - session_info.over_budget_since > config.get_option(
+            "server.slowClientTimeout"
+        ):
+            LOGGER.warning(
+                "Disconnecting slow client (%s bytes undelivered)",
+                session_info.outbound_bytes,
+            )
+            metrics.Client.get("streamlit_slow_clients_disconnected_total").inc()
+            ws.close()
+            self._remove_browser_connection(ws)
+        else:
+            metrics.Client.get("streamlit_deferred_flushes_total").inc()
+
+        return True
 
     def stop(self):
         self._set_state(State.STOPPING)
@@ -385,20 +587,62 @@ class Server(object):
         self._ioloop.stop()
 
     def add_preheated_report_session(self):
-        """Register a fake browser with the server and run the script.
+        """Fill the pool of preheated ReportSessions.
 
-        This is used to start running the user's script even before the first
-        browser connects.
+        Preheated sessions run the user's script with the default widget
+        state before any browser connects, so that new browsers get an
+        instant first render. The pool holds server.numPreheatedSessions
+        sessions. If server.refillPreheatedSessions is set, this is called
+        again whenever a browser claims one.
         """
-        session = self._add_browser_connection(PREHEATED_REPORT_SESSION)
-        session.handle_rerun_script_request(is_preheat=True)
+        if self._must_stop.is_set():
+            return
+
+        num_sessions = config.get_option("server.numPreheatedSessions")
+        while len(self._preheated_sessions) < num_sessions:
+            session = ReportSession(
+                ioloop=self._ioloop,
+                script_path=self._script_path,
+                command_line=self._command_line,
+            )
+            session.handle_rerun_script_request(is_preheat=True)
+            self._preheated_sessions.append((time.time(), session))
+
+    def _claim_preheated_report_session(self):
+        """Take a session from the pool of preheated ReportSessions.
+
+        Returns
+        -------
+        ReportSession | None
+            The session, or None if there's none to claim.
+
+        """
+        if not self._preheated_sessions:
+            return None
+
+        if not config.get_option("server.refillPreheatedSessions"):
+            _, session = self._preheated_sessions.popleft()
+            return session
+
+        # Refill the pool after this connection has been handled.
+        self._ioloop.add_callback(self.add_preheated_report_session)
+
+        while self._preheated_sessions:
+            created_time, session = self._preheated_sessions.popleft()
+            if time.time() - created_time <= PREHEATED_SESSION_MAX_AGE_SECS:
+                return session
+
+            LOGGER.debug("Shutting down expired preheated session")
+            session.shutdown()
+
+        return None
 
     def _add_browser_connection(self, ws):
         """Register a connected browser with the server
 
         Parameters
         ----------
-        ws : _BrowserWebSocketHandler or PREHEATED_REPORT_CONTEXT
+        ws : _BrowserWebSocketHandler
             The newly-connected websocket handler
 
         Returns
@@ -409,11 +653,9 @@ class Server(object):
         """
         if ws not in self._session_infos:
 
-            if PREHEATED_REPORT_SESSION in self._session_infos:
-                assert len(self._session_infos) == 1
+            session = self._claim_preheated_report_session()
+            if session is not None:
                 LOGGER.debug("Reusing preheated context for ws %s", ws)
-                session = self._session_infos[PREHEATED_REPORT_SESSION].session
-                del self._session_infos[PREHEATED_REPORT_SESSION]
             else:
                 LOGGER.debug("Creating new context for ws %s", ws)
                 session = ReportSession(
@@ -423,12 +665,32 @@ class Server(object):
                 )
 
             self._session_infos[ws] = SessionInfo(session)
-
-            if ws is not PREHEATED_REPORT_SESSION:
-                self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
+            self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
 
         return self._session_infos[ws].session
 
+    def _add_client_cache_manifest(self, ws, manifest):
+        """Record the cached messages that a browser says it already has.
+
+        Parameters
+        ----------
+        ws : _BrowserWebSocketHandler
+        manifest : ClientCacheManifest
+
+        """
+        session_info = self._session_infos.get(ws, None)
+        if session_info is None:
+            return
+
+        num_found = self._message_cache.add_session_refs(
+            manifest.hashes, session_info.session, session_info.report_run_count
+        )
+        LOGGER.debug(
+            "Client has %s cached messages (%s still cached on the server)",
+            len(manifest.hashes),
+            num_found,
+        )
+
     def _remove_browser_connection(self, ws):
         if ws in self._session_infos:
             session_info = self._session_infos[ws]
@@ -449,6 +711,50 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
         """Set up CORS."""
         return is_url_from_allowed_origins(origin)
 
+    def get_compression_options(self):
+        """Enable permessage-deflate compression if configured.
+
+        Returns
+        -------
+        dict | None
+            Tornado compression options, or None to disable compression.
+
+        """
+        if not config.get_option("server.websocketCompression"):
+            return None
+
+        return {
+            "compression_level": config.get_option("server.websocketCompressionLevel"),
+            "mem_level": config.get_option("server.websocketCompressionMemLevel"),
+        }
+
+    def write_message(self, message, binary=False):
+        """Send a message to the browser.
+
+        When compression was negotiated, messages smaller than
+        server.websocketCompressionMinSize are sent uncompressed, if
+        _can_detach_compressor allows it. permessage-deflate flags
+        compression per message, so the browser handles both kinds
+        transparently.
+        """
+        # Tornado only exposes compression as a per-connection setting, so we
+        # briefly detach the connection's compressor for small messages.
+        ws_connection = self.ws_connection
+        min_size = config.get_option("server.websocketCompressionMinSize")
+        if not _can_detach_compressor(ws_connection) or len(message) >= min_size:
+            return super(_BrowserWebSocketHandler, self).write_message(
+                message, binary=binary
+            )
+
+        compressor = ws_connection._compressor
+        ws_connection._compressor = None
+        try:
+            return super(_BrowserWebSocketHandler, self).write_message(
+                message, binary=binary
+            )
+        finally:
+            ws_connection._compressor = compressor
+
     def open(self):
         self._session = self._server._add_browser_connection(self)
 
@@ -479,6 +785,8 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
                 self._session.handle_rerun_script_request(
                     widget_state=msg.update_widgets
                 )
+            elif msg_type == "cache_manifest":
+                self._server._add_client_cache_manifest(self, msg.cache_manifest)
             elif msg_type == "close_connection":
                 if config.get_option("global.developmentMode"):
                     Server.get_current().stop()
@@ -495,6 +803,45 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
             self._session.enqueue_exception(e)
 
 
+def _track_outbound_bytes(session_info, num_bytes, write_future):
+    """Count num_bytes against a session until write_future resolves.
+
+    Parameters
+    ----------
+    session_info : SessionInfo
+    num_bytes : int
+    write_future : Future
+        The Future returned by WebSocketHandler.write_message. It resolves
+        once the message has been handed off to the network.
+
+    """
+    outbound_bytes = metrics.Client.get("streamlit_websocket_outbound_bytes")
+    session_info.outbound_bytes += num_bytes
+    outbound_bytes.inc(num_bytes)
+
+    def on_written(_):
+        session_info.outbound_bytes -= num_bytes
+        outbound_bytes.dec(num_bytes)
+
+    write_future.add_done_callback(on_written)
+
+
+def _can_detach_compressor(ws_connection):
+    """True if a message can be sent uncompressed over this connection, by
+    detaching its compressor.
+
+    This relies on Tornado internals: WebSocketProtocol13 keeps its
+    compressor in the private _compressor attribute, and compresses each
+    message synchronously inside write_message. We've only checked that
+    for Tornado 5. Other versions compress every message.
+    """
+    return (
+        tornado.version_info[0] == 5
+        and isinstance(ws_connection, tornado.websocket.WebSocketProtocol13)
+        and getattr(ws_connection, "_compressor", None) is not None
+    )
+
+
 def _set_tornado_log_levels():
     if not config.get_option("global.developmentMode"):
         # Hide logs unless they're super important.
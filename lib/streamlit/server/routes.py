@@ -15,11 +15,16 @@
 
 import json
 
+import tornado.gen
 import tornado.web
+from tornado.concurrent import futures
+from tornado.concurrent import run_on_executor
 
 from streamlit import config
 from streamlit import metrics
+from streamlit.elements import data_frame_proto
 from streamlit.logger import get_logger
+from streamlit.proto.DataFrame_pb2 import DataFrame
 from streamlit.server.server_util import serialize_forward_msg
 
 LOGGER = get_logger(__name__)
@@ -173,3 +178,102 @@ class MessageCacheHandler(tornado.web.RequestHandler):
         """/OPTIONS handler for preflight CORS checks."""
         self.set_status(204)
         self.finish()
+
+
+class DataFrameWindowHandler(tornado.web.RequestHandler):
+    """Returns windows of the DataFrames that st.dataframe sent to the
+    browser in windows, as serialized DataFrame protos.
+
+    Besides the window's rows and columns, requests can ask for the rows to
+    be sorted by a column and filtered by a string, which is done on the
+    whole DataFrame, so the browser only ever gets the rows it shows.
+    """
+
+    # Sorting and filtering a large DataFrame is slow, so it's done in these
+    # threads rather than on the IOLoop.
+    executor = futures.ThreadPoolExecutor(4)
+
+    def initialize(self, store):
+        """Initializes the handler.
+
+        Parameters
+        ----------
+        store : DataFrameStore
+
+        """
+        self._store = store
+
+    def set_default_headers(self):
+        if _allow_cross_origin_requests():
+            self.set_header("Access-Control-Allow-Origin", "*")
+
+    @tornado.gen.coroutine
+    def get(self):
+        data_frame_id = self.get_argument("id")
+        try:
+            row_start = int(self.get_argument("row_start"))
+            row_end = int(self.get_argument("row_end"))
+            columns = self.get_argument("columns", None)
+            if columns is not None:
+                columns = [int(column) for column in columns.split(",") if column]
+            else:
+                col_start = int(self.get_argument("col_start"))
+                col_end = int(self.get_argument("col_end"))
+                if col_start < 0:
+                    raise ValueError("Negative col_start: %s" % col_start)
+            sort_column = self._get_int_argument("sort_column")
+            ascending = self.get_argument("ascending", "1") != "0"
+            filter_text = self.get_argument("filter", None)
+            filter_column = self._get_int_argument("filter_column")
+        except ValueError:
+            self._finish_with_status(400)
+        if row_start < 0:
+            self._finish_with_status(400)
+
+        try:
+            result = yield self._get_rows(
+                data_frame_id, sort_column, ascending, filter_text, filter_column
+            )
+        except IndexError:
+            self._finish_with_status(400)
+        if result is None:
+            # The DataFrame was dropped, or never existed.
+            LOGGER.debug("No retained DataFrame: %s", data_frame_id)
+            self._finish_with_status(404)
+
+        df, rows = result
+        num_columns = len(df.columns)
+        if columns is None:
+            col_end = min(
+                col_end,
+                num_columns,
+                col_start + config.get_option("server.dataFrameWindowColumns"),
+            )
+            columns = list(range(col_start, col_end))
+        elif not all(0 <= column < num_columns for column in columns):
+            self._finish_with_status(400)
+
+        proto_df = DataFrame()
+        data_frame_proto.marshall_window(
+            df, proto_df, row_start, row_end, columns, rows
+        )
+        self.set_header("Content-Type", "application/octet-stream")
+        self.write(proto_df.SerializeToString())
+        self.set_status(200)
+
+    @run_on_executor
+    def _get_rows(self, *args):
+        return self._store.get_rows(*args)
+
+    def _get_int_argument(self, name):
+        value = self.get_argument(name, None)
+        return None if value is None else int(value)
+
+    def _finish_with_status(self, status):
+        self.set_status(status)
+        raise tornado.web.Finish()
+
+    def options(self):
+        """/OPTIONS handler for preflight CORS checks."""
+        self.set_status(204)
+        self.finish()
@@ -15,15 +15,21 @@
 
 """Server related utility functions"""
 
+import math
+
 from streamlit import config
 from streamlit import util
 from streamlit.ForwardMsgCache import populate_hash_if_needed
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
-# Largest message that can be sent via the WebSocket connection.
+# Largest message that can be received via the WebSocket connection.
 # (Limit was picked arbitrarily)
-# TODO: Break message in several chunks if too large.
 MESSAGE_SIZE_LIMIT = 50 * 1e6  # 50MB
 
+# ForwardMsgs larger than this are split into chunks before being sent over
+# the WebSocket connection.
+MESSAGE_CHUNK_SIZE = int(5 * 1e6)  # 5MB
+
 
 def is_cacheable_msg(msg):
     """True if the given message qualifies for caching.
@@ -47,9 +53,6 @@ def is_cacheable_msg(msg):
 def serialize_forward_msg(msg):
     """Serialize a ForwardMsg to send to a client.
 
-    If the message is too large, it will be converted to an exception message
-    instead.
-
     Parameters
     ----------
     msg : ForwardMsg
@@ -62,23 +65,42 @@ def serialize_forward_msg(msg):
 
     """
     populate_hash_if_needed(msg)
-    msg_str = msg.SerializeToString()
-
-    if len(msg_str) > MESSAGE_SIZE_LIMIT:
-        _convert_msg_to_exception_msg(msg, RuntimeError("Data too large"))
-        msg_str = msg.SerializeToString()
+    return msg.SerializeToString()
 
-    return msg_str
 
+def serialize_msg_chunks(msg_hash, msg_str, chunk_size=MESSAGE_CHUNK_SIZE):
+    """Split a serialized ForwardMsg into serialized ForwardMsgChunks.
 
-def _convert_msg_to_exception_msg(msg, e):
-    import streamlit.elements.exception_proto as exception_proto
+    This is a generator, so that only one chunk needs to exist in memory
+    alongside the complete message at any given time.
 
-    delta_id = msg.metadata.delta_id
-    msg.Clear()
-    msg.metadata.delta_id = delta_id
+    Parameters
+    ----------
+    msg_hash : str
+        The hash of the ForwardMsg
+    msg_str : str
+        The serialized ForwardMsg
+    chunk_size : int
+        The maximum number of the ForwardMsg's bytes to put in each chunk
+
+    Yields
+    ------
+    str
+        Serialized ForwardMsgs of type "chunk", in order.
 
-    exception_proto.marshall(msg.delta.new_element.exception, e)
+    """
+    num_chunks = int(math.ceil(len(msg_str) / float(chunk_size)))
+    msg_view = memoryview(msg_str)
+
+    for index in range(num_chunks):
+        chunk_msg = ForwardMsg()
+        chunk_msg.chunk.msg_hash = msg_hash
+        chunk_msg.chunk.index = index
+        chunk_msg.chunk.num_chunks = num_chunks
+        chunk_msg.chunk.data = msg_view[
+            index * chunk_size : (index + 1) * chunk_size
+        ].tobytes()
+        yield chunk_msg.SerializeToString()
 
 
 def is_url_from_allowed_origins(url):
@@ -26,6 +26,7 @@ except ImportError:
     import importlib
 
 from streamlit import config
+from streamlit import script_cache
 from streamlit import util
 
 from streamlit.logger import get_logger
@@ -97,6 +98,10 @@ class LocalSourcesWatcher(object):
         if wm.module_name is not None and wm.module_name in sys.modules:
             del sys.modules[wm.module_name]
 
+        if wm.module_name is None:
+            # This is the report's script.
+            script_cache.invalidate(filepath)
+
         self._on_file_changed()
 
     def close(self):
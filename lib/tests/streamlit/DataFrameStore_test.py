@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""DataFrameStore unit tests."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from mock import patch
+
+import streamlit.DataFrameStore as DataFrameStore_module
+from streamlit.DataFrameStore import DataFrameStore
+from tests import testutil
+
+
+def _patch_config(overrides):
+    return patch(
+        "streamlit.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(overrides),
+    )
+
+
+def _patch_windows(window_rows, window_columns=50):
+    return _patch_config(
+        {
+            "server.dataFrameWindowRows": window_rows,
+            "server.dataFrameWindowColumns": window_columns,
+        }
+    )
+
+
+def _create_df(num_rows, num_columns=1):
+    """Return a DataFrame of int64s, whose size is 8 bytes per cell."""
+    return pd.DataFrame(
+        [[row] * num_columns for row in range(num_rows)],
+        index=pd.Int64Index(range(num_rows)),
+    )
+
+
+class DataFrameStoreTest(unittest.TestCase):
+    def setUp(self):
+        DataFrameStore._singleton = None
+
+    def tearDown(self):
+        DataFrameStore._singleton = None
+
+    def test_add_get_remove(self):
+        store = DataFrameStore.get_current()
+        df = _create_df(3)
+
+        data_frame_id = store.add(df)
+        self.assertIs(df, store.get(data_frame_id))
+        self.assertNotEqual(data_frame_id, store.add(df))
+
+        store.remove(data_frame_id)
+        self.assertIsNone(store.get(data_frame_id))
+        store.remove(data_frame_id)
+
+    def test_max_size(self):
+        """The least recently used DataFrames are dropped once the store is
+        full, and DataFrames that are too large aren't retained."""
+        store = DataFrameStore.get_current()
+
+        # Each DataFrame is 1.6MB.
+        with _patch_config({"server.maxRetainedDataFrameSize": 4}):
+            id1 = store.add(_create_df(50000, 3))
+            id2 = store.add(_create_df(50000, 3))
+            store.get(id1)
+            id3 = store.add(_create_df(50000, 3))
+
+            self.assertIsNotNone(store.get(id1))
+            self.assertIsNone(store.get(id2))
+            self.assertIsNotNone(store.get(id3))
+
+            self.assertIsNone(store.add(_create_df(200000, 3)))
+            self.assertIsNotNone(store.get(id1))
+
+    def test_max_size_object_columns(self):
+        """The contents of object columns count towards the store's size."""
+        store = DataFrameStore.get_current()
+
+        # 20000 strings of 100 characters are over 2MB.
+        df = pd.DataFrame({"a": ["x" * 100 + str(i) for i in range(20000)]})
+        with _patch_config({"server.maxRetainedDataFrameSize": 2}):
+            self.assertIsNone(store.add(df))
+            self.assertIsNotNone(store.add(df.iloc[:5000]))
+
+    def test_estimate_num_bytes(self):
+        """Large DataFrames' sizes are estimated from a sample of rows."""
+        df = pd.DataFrame(
+            {"a": range(100000), "b": ["x" * (i % 100) for i in range(100000)]}
+        )
+        actual = df.memory_usage(index=True, deep=True).sum()
+        estimate = DataFrameStore_module._estimate_num_bytes(df)
+        self.assertAlmostEqual(1, estimate / actual, delta=0.05)
+
+        small_df = df.iloc[:10]
+        self.assertEqual(
+            small_df.memory_usage(index=True, deep=True).sum(),
+            DataFrameStore_module._estimate_num_bytes(small_df),
+        )
+
+    def test_get_rows(self):
+        store = DataFrameStore.get_current()
+        df = pd.DataFrame({"a": [2.0, np.nan, 1.0, 2.0], "b": ["ab", "AB", None, "c"]})
+        data_frame_id = store.add(df)
+
+        def get_rows(*args, **kwargs):
+            retained_df, rows = store.get_rows(data_frame_id, *args, **kwargs)
+            self.assertIs(df, retained_df)
+            return None if rows is None else list(rows)
+
+        self.assertIsNone(get_rows())
+        self.assertEqual([3, 2, 1, 0], get_rows(ascending=False))
+
+        # Sorting is stable, and puts NaNs last.
+        self.assertEqual([2, 0, 3, 1], get_rows(0))
+        self.assertEqual([1, 3, 0, 2], get_rows(0, ascending=False))
+        # So are Nones, in object columns.
+        self.assertEqual([1, 0, 3, 2], get_rows(1))
+
+        self.assertEqual([0, 1], get_rows(filter_text="aB"))
+        self.assertEqual([0, 1], get_rows(1, False, "ab", filter_column=1))
+        self.assertEqual([0, 3], get_rows(filter_text="2", filter_column=0))
+        # Missing values don't match, even though their strings are "nan"
+        # and "None".
+        self.assertEqual([], get_rows(filter_text="n"))
+
+        with self.assertRaises(IndexError):
+            store.get_rows(data_frame_id, sort_column=2)
+        self.assertIsNone(store.get_rows("non_existent"))
+
+    def test_sort_missing_values(self):
+        """Missing values are sorted last, whatever the column's type."""
+        store = DataFrameStore.get_current()
+        df = pd.DataFrame(
+            {
+                "a": pd.to_datetime(["2019-01-02", None, "2019-01-01"]),
+                "b": ["b", np.nan, 1],
+                "c": pd.Categorical(["y", None, "x"]),
+            }
+        )
+        data_frame_id = store.add(df)
+
+        def get_rows(sort_column):
+            return list(store.get_rows(data_frame_id, sort_column)[1])
+
+        self.assertEqual([2, 0, 1], get_rows(0))
+        # Values that can't be compared with each other are sorted as
+        # strings.
+        self.assertEqual([2, 0, 1], get_rows(1))
+        self.assertEqual([2, 0, 1], get_rows(2))
+
+    def test_last_query_size(self):
+        """The rows of the last query count towards the store's size, unless
+        they're a cached sort order."""
+        store = DataFrameStore.get_current()
+        # 1.6MB.
+        data_frame_id = store.add(_create_df(50000, 3))
+        num_filtered = sum("1" in str(row) for row in range(50000))
+
+        store.get_rows(data_frame_id, ascending=False)
+        self.assertEqual(2000000, store._num_bytes)
+
+        # The last query's rows replace the previous ones.
+        store.get_rows(data_frame_id, filter_text="1")
+        self.assertEqual(1600000 + 8 * num_filtered, store._num_bytes)
+
+        # The sort order, reversed, isn't counted twice.
+        store.get_rows(data_frame_id, 0, ascending=False)
+        self.assertEqual(2000000, store._num_bytes)
+
+    def test_cached_sort_orders(self):
+        """Sort orders are computed once per column, and count towards the
+        store's size."""
+        store = DataFrameStore.get_current()
+
+        # Each DataFrame is 1.6MB, and each sort order 0.4MB.
+        with _patch_config({"server.maxRetainedDataFrameSize": 4}):
+            id1 = store.add(_create_df(50000, 3))
+            id2 = store.add(_create_df(50000, 3))
+
+            with patch(
+                "streamlit.DataFrameStore._sort_order",
+                wraps=DataFrameStore_module._sort_order,
+            ) as sort_order:
+                store.get_rows(id1, 0)
+                store.get_rows(id1, 0, ascending=False)
+                store.get_rows(id1, 1)
+                store.get_rows(id1, 2)
+                self.assertEqual(3, sort_order.call_count)
+
+            # The sort orders grew id1 past the space left by id2.
+            self.assertIsNone(store.get(id2))
+            self.assertIsNotNone(store.get(id1))
+
+
+class DeltaGeneratorWindowTest(testutil.DeltaGeneratorTestCase):
+    def setUp(self):
+        super(DeltaGeneratorWindowTest, self).setUp()
+        DataFrameStore._singleton = None
+
+    def tearDown(self):
+        super(DeltaGeneratorWindowTest, self).tearDown()
+        DataFrameStore._singleton = None
+
+    def test_disabled_by_default(self):
+        self.new_delta_generator().dataframe(_create_df(1000))
+
+        proto_df = self.get_delta_from_queue().new_element.data_frame
+        self.assertFalse(proto_df.HasField("window"))
+        self.assertEqual(1000, len(proto_df.index.int_64_index.data.data))
+
+    def test_first_window(self):
+        df = _create_df(5, 3)
+        with _patch_windows(2, 2):
+            self.new_delta_generator().dataframe(df)
+
+        proto_df = self.get_delta_from_queue().new_element.data_frame
+        self.assertEqual([0, 1], proto_df.index.int_64_index.data.data)
+        self.assertEqual(2, len(proto_df.data.cols))
+        self.assertEqual(2, proto_df.columns.range_index.stop)
+
+        window = proto_df.window
+        self.assertEqual(5, window.num_rows)
+        self.assertEqual(3, window.columns.range_index.stop)
+        self.assertEqual(2, window.window_rows)
+        self.assertEqual(2, window.window_columns)
+
+        # The store has a copy of the DataFrame.
+        retained_df = DataFrameStore.get_current().get(window.id)
+        self.assertIsNot(df, retained_df)
+        self.assertTrue(df.equals(retained_df))
+
+    def test_small_data_frame(self):
+        """DataFrames that fit in a window, and styled DataFrames, are sent
+        in full."""
+        with _patch_windows(5):
+            self.new_delta_generator().dataframe(_create_df(5))
+            self.assertFalse(
+                self.get_delta_from_queue().new_element.data_frame.HasField("window")
+            )
+
+            self.new_delta_generator().dataframe(_create_df(10).style)
+            self.assertFalse(
+                self.get_delta_from_queue().new_element.data_frame.HasField("window")
+            )
+
+    def test_add_rows(self):
+        """Adding rows to a DataFrame sent in windows sends its first window
+        again, and replaces the retained DataFrame."""
+        store = DataFrameStore.get_current()
+        with _patch_windows(2):
+            el = self.new_delta_generator().dataframe(pd.DataFrame({"a": [1, 2, 3]}))
+            first_id = self.get_delta_from_queue().new_element.data_frame.window.id
+
+            el.add_rows(pd.DataFrame({"b": [4, 5]}))
+            delta = self.get_delta_from_queue()
+            window = delta.new_element.data_frame.window
+            self.assertEqual(5, window.num_rows)
+            self.assertIsNone(store.get(first_id))
+
+            retained_df = store.get(window.id)
+            self.assertEqual(["a"], list(retained_df.columns))
+            self.assertEqual([1, 2, 3, 4, 5], list(retained_df["a"]))
+            self.assertEqual(list(range(5)), list(retained_df.index))
+
+            with self.assertRaises(ValueError):
+                el.add_rows(pd.DataFrame({"a": [7], "b": [8]}))
+
+            # When there are no more rows than fit in a window, the
+            # DataFrame is sent in full.
+            el.add_rows(pd.DataFrame({"a": [6]}), max_rows=2)
+            proto_df = self.get_delta_from_queue().new_element.data_frame
+            self.assertFalse(proto_df.HasField("window"))
+            self.assertEqual([5, 6], proto_df.data.cols[0].int64s.data)
+            self.assertIsNone(store.get(window.id))
@@ -15,6 +15,9 @@
 
 """Unit tests for MessageCache"""
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from mock import MagicMock
@@ -22,6 +25,7 @@ from mock import MagicMock
 from streamlit import ReportSession
 from streamlit import config
 from streamlit.ForwardMsgCache import ForwardMsgCache
+from streamlit.ForwardMsgCache import SentElementTracker
 from streamlit.ForwardMsgCache import create_reference_msg
 from streamlit.ForwardMsgCache import populate_hash_if_needed
 from streamlit.elements import data_frame_proto
@@ -37,6 +41,19 @@ def _create_dataframe_msg(df, id=1):
     return msg
 
 
+def _create_text_msg(body, id=0):
+    msg = ForwardMsg()
+    msg.metadata.delta_id = id
+    msg.delta.new_element.text.body = body
+    return msg
+
+
+def _create_new_report_msg():
+    msg = ForwardMsg()
+    msg.new_report.id = "report"
+    return msg
+
+
 def _create_mock_session():
     return MagicMock(ReportSession)
 
@@ -76,6 +93,20 @@ class ForwardMsgCacheTest(unittest.TestCase):
         self.assertTrue(cache.has_message_reference(msg, session, 0))
         self.assertFalse(cache.has_message_reference(msg, _create_mock_session(), 0))
 
+    def test_add_session_refs(self):
+        """Test MessageCache.add_session_refs"""
+        cache = ForwardMsgCache()
+        msg = _create_dataframe_msg([1, 2, 3])
+        cache.add_message(msg, _create_mock_session(), 0)
+
+        session = _create_mock_session()
+        self.assertFalse(cache.has_message_reference(msg, session, 0))
+
+        num_found = cache.add_session_refs([msg.hash, "unknown_hash"], session, 0)
+        self.assertEqual(1, num_found)
+        self.assertTrue(cache.has_message_reference(msg, session, 0))
+        self.assertIsNone(cache.get_message("unknown_hash"))
+
     def test_get_message(self):
         """Test MessageCache.get_message"""
         cache = ForwardMsgCache()
@@ -87,6 +118,51 @@ class ForwardMsgCacheTest(unittest.TestCase):
         cache.add_message(msg, session, 0)
         self.assertEqual(msg, cache.get_message(msg_hash))
 
+    def test_shared_dir(self):
+        """Test that caches sharing a directory can get each other's
+        messages"""
+        shared_dir = tempfile.mkdtemp()
+        try:
+            cache1 = ForwardMsgCache(shared_dir)
+            cache2 = ForwardMsgCache(shared_dir)
+
+            msg = _create_dataframe_msg([1, 2, 3])
+            msg_hash = populate_hash_if_needed(msg)
+            cache1.add_message(msg, _create_mock_session(), 0)
+
+            self.assertEqual(msg, cache2.get_message(msg_hash))
+            self.assertIsNone(cache2.get_message("0" * 32))
+            self.assertIsNone(cache2.get_message("../" + msg_hash))
+        finally:
+            shutil.rmtree(shared_dir)
+
+    def test_shared_dir_eviction(self):
+        """Test that shared messages are deleted once no cache sharing the
+        directory holds them"""
+        config._set_option("global.maxCachedMessageAge", 1, "test")
+        shared_dir = tempfile.mkdtemp()
+        try:
+            cache1 = ForwardMsgCache(shared_dir)
+            cache2 = ForwardMsgCache(shared_dir)
+            cache3 = ForwardMsgCache(shared_dir)
+            session1 = _create_mock_session()
+            session2 = _create_mock_session()
+
+            msg = _create_dataframe_msg([1, 2, 3])
+            msg_hash = populate_hash_if_needed(msg)
+            cache1.add_message(msg, session1, 0)
+            cache2.add_message(msg, session2, 0)
+
+            cache1.remove_expired_session_entries(session1, 2)
+            self.assertEqual(msg, cache3.get_message(msg_hash))
+
+            cache2.clear()
+            self.assertIsNone(cache3.get_message(msg_hash))
+            num_files = sum(len(files) for _, _, files in os.walk(shared_dir))
+            self.assertEqual(0, num_files)
+        finally:
+            shutil.rmtree(shared_dir)
+
     def test_clear(self):
         """Test MessageCache.clear"""
         cache = ForwardMsgCache()
@@ -140,3 +216,54 @@ class ForwardMsgCacheTest(unittest.TestCase):
         runcount2 += 2
         cache.remove_expired_session_entries(session2, runcount2)
         self.assertIsNone(cache.get_message(msg_hash))
+
+
+class SentElementTrackerTest(unittest.TestCase):
+    def _process(self, tracker, msg):
+        """Return the delta type of the message to send."""
+        return tracker.process(msg).delta.WhichOneof("type")
+
+    def test_unchanged_elements(self):
+        """Elements that are the same as in the previous run are replaced
+        with unchanged_element deltas."""
+        tracker = SentElementTracker()
+        tracker.process(_create_new_report_msg())
+        self.assertEqual("new_element", self._process(tracker, _create_text_msg("a")))
+        self.assertEqual(
+            "new_element", self._process(tracker, _create_text_msg("b", id=1))
+        )
+
+        tracker.process(_create_new_report_msg())
+        msg = _create_text_msg("a")
+        unchanged_msg = tracker.process(msg)
+        self.assertEqual(msg.hash, unchanged_msg.delta.unchanged_element)
+        self.assertEqual(msg.metadata, unchanged_msg.metadata)
+
+        # Changed elements are sent in full...
+        self.assertEqual(
+            "new_element", self._process(tracker, _create_text_msg("c", id=1))
+        )
+        # ...and so are elements that change within a run.
+        self.assertEqual("new_element", self._process(tracker, _create_text_msg("a")))
+
+    def test_forgets_older_runs(self):
+        """Only elements from the previous run are referred to."""
+        tracker = SentElementTracker()
+        tracker.process(_create_new_report_msg())
+        tracker.process(_create_text_msg("a"))
+
+        tracker.process(_create_new_report_msg())
+        tracker.process(_create_new_report_msg())
+        self.assertEqual("new_element", self._process(tracker, _create_text_msg("a")))
+
+    def test_add_rows(self):
+        """Elements that had rows added to them are resent."""
+        tracker = SentElementTracker()
+        tracker.process(_create_new_report_msg())
+        tracker.process(_create_text_msg("a"))
+        add_rows_msg = ForwardMsg()
+        add_rows_msg.delta.add_rows.name = "rows"
+        tracker.process(add_rows_msg)
+
+        tracker.process(_create_new_report_msg())
+        self.assertEqual("new_element", self._process(tracker, _create_text_msg("a")))
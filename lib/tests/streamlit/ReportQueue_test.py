@@ -18,6 +18,8 @@
 import copy
 import unittest
 
+from mock import patch
+
 from streamlit.ReportQueue import ReportQueue
 from streamlit.elements import data_frame_proto
 from streamlit.proto.BlockPath_pb2 import BlockPath
@@ -217,3 +219,282 @@ class ReportQueueTest(unittest.TestCase):
 
         assert_deltas(BlockPath.MAIN, [], 1)
         assert_deltas(BlockPath.SIDEBAR, [0, 0, 1], 3)
+
+    def test_flush_with_held_deltas(self):
+        """Held-back deltas stay in the queue and can still be composed."""
+        rq = ReportQueue()
+
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+
+        DF_DELTA_MSG.metadata.delta_id = 1
+        rq.enqueue(DF_DELTA_MSG)
+
+        def hold_dataframes(msg):
+            return msg.delta.new_element.WhichOneof("type") == "data_frame"
+
+        queue = rq.flush(hold_dataframes)
+        self.assertEqual(1, len(queue))
+        self.assertEqual("text1", queue[0].delta.new_element.text.body)
+
+        # The held-back dataframe gets composed with a later add_rows.
+        ADD_ROWS_MSG.metadata.delta_id = 1
+        rq.enqueue(ADD_ROWS_MSG)
+
+        queue = rq.flush()
+        self.assertEqual(1, len(queue))
+        col0 = queue[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5], col0)
+        self.assertTrue(rq.is_empty())
+
+    def test_flush_holds_messages_after_held_delta(self):
+        """Non-delta messages are never delivered ahead of held deltas."""
+        rq = ReportQueue()
+
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+        rq.enqueue(INIT_MSG)
+        TEXT_DELTA_MSG2.metadata.delta_id = 1
+        rq.enqueue(TEXT_DELTA_MSG2)
+
+        def hold_first_delta(msg):
+            return msg.metadata.delta_id == 0
+
+        self.assertEqual([], rq.flush(hold_first_delta))
+
+        queue = rq.flush(lambda msg: False)
+        self.assertEqual(3, len(queue))
+        self.assertEqual("text1", queue[0].delta.new_element.text.body)
+        self.assertTrue(queue[1].HasField("initialize"))
+        self.assertEqual("text2", queue[2].delta.new_element.text.body)
+
+    def test_many_add_rows(self):
+        """add_rows deltas are composed with a single copy of the DataFrame."""
+        rq = ReportQueue()
+
+        DF_DELTA_MSG.metadata.delta_id = 0
+        rq.enqueue(DF_DELTA_MSG)
+
+        ADD_ROWS_MSG.metadata.delta_id = 0
+        with patch("streamlit.ReportQueue.copy.deepcopy", wraps=copy.deepcopy) as p:
+            for _ in range(10):
+                rq.enqueue(ADD_ROWS_MSG)
+            queue = rq.flush()
+            self.assertEqual(1, p.call_count)
+
+        self.assertEqual(1, len(queue))
+        col0 = queue[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2] + [3, 4, 5] * 10, col0)
+        index = queue[0].delta.new_element.data_frame.index.range_index
+        self.assertEqual(33, index.stop - index.start)
+
+        # The original messages weren't modified.
+        col0 = DF_DELTA_MSG.delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2], col0)
+
+    def test_add_rows_pending_in_clone(self):
+        rq = ReportQueue()
+
+        DF_DELTA_MSG.metadata.delta_id = 0
+        rq.enqueue(DF_DELTA_MSG)
+        ADD_ROWS_MSG.metadata.delta_id = 0
+        rq.enqueue(ADD_ROWS_MSG)
+
+        clone = rq.clone()
+        rq.enqueue(ADD_ROWS_MSG)
+
+        col0 = list(clone)[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5], col0)
+        col0 = list(rq)[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5, 3, 4, 5], col0)
+
+    def test_incompatible_add_rows(self):
+        """Errors are raised when the add_rows delta is enqueued."""
+        rq = ReportQueue()
+
+        DF_DELTA_MSG.metadata.delta_id = 0
+        rq.enqueue(DF_DELTA_MSG)
+        ADD_ROWS_MSG.metadata.delta_id = 0
+        rq.enqueue(ADD_ROWS_MSG)
+
+        msg = ForwardMsg()
+        data_frame_proto.marshall_data_frame({"col1": [6]}, msg.delta.add_rows.data)
+        msg.metadata.delta_id = 0
+        with self.assertRaises(ValueError):
+            rq.enqueue(msg)
+
+        col0 = rq.flush()[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5], col0)
+
+    def test_add_rows_max_rows(self):
+        """Pending add_rows beyond max_rows are composed, not accumulated."""
+        rq = ReportQueue()
+
+        DF_DELTA_MSG.metadata.delta_id = 0
+        rq.enqueue(DF_DELTA_MSG)
+
+        msg = copy.deepcopy(ADD_ROWS_MSG)
+        msg.metadata.delta_id = 0
+        msg.delta.add_rows.max_rows = 4
+        for _ in range(10):
+            rq.enqueue(msg)
+            self.assertLessEqual(len(rq._pending_add_rows.get(0, [])), 2)
+
+        queue = rq.flush()
+        col0 = queue[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([5, 3, 4, 5], col0)
+
+    def test_flush_unsent(self):
+        """flush_unsent returns each message once, and keeps the queue."""
+        rq = ReportQueue(track_unsent=True)
+
+        rq.enqueue(INIT_MSG)
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+
+        self.assertEqual([INIT_MSG, TEXT_DELTA_MSG1], rq.flush_unsent())
+        self.assertEqual([], rq.flush_unsent())
+        self.assertEqual([INIT_MSG, TEXT_DELTA_MSG1], list(rq))
+
+        # Changed messages are sent again.
+        TEXT_DELTA_MSG2.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG2)
+        self.assertEqual([TEXT_DELTA_MSG2], rq.flush_unsent())
+        self.assertEqual([INIT_MSG, TEXT_DELTA_MSG2], list(rq))
+
+    def test_flush_unsent_add_rows(self):
+        """Only the new rows of a sent element are sent."""
+        rq = ReportQueue(track_unsent=True)
+
+        DF_DELTA_MSG.metadata.delta_id = 0
+        rq.enqueue(DF_DELTA_MSG)
+        self.assertEqual([DF_DELTA_MSG], rq.flush_unsent())
+
+        ADD_ROWS_MSG.metadata.delta_id = 0
+        rq.enqueue(ADD_ROWS_MSG)
+        rq.enqueue(ADD_ROWS_MSG)
+        TEXT_DELTA_MSG1.metadata.delta_id = 1
+        rq.enqueue(TEXT_DELTA_MSG1)
+
+        queue = rq.flush_unsent()
+        self.assertEqual(2, len(queue))
+        col0 = queue[0].delta.add_rows.data.data.cols[0].int64s.data
+        self.assertEqual([3, 4, 5, 3, 4, 5], col0)
+        self.assertEqual(TEXT_DELTA_MSG1, queue[1])
+
+        col0 = list(rq)[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5, 3, 4, 5], col0)
+
+        # A new element replaces its unsent rows, and keeps their place.
+        rq.enqueue(ADD_ROWS_MSG)
+        TEXT_DELTA_MSG2.metadata.delta_id = 1
+        rq.enqueue(TEXT_DELTA_MSG2)
+        rq.enqueue(DF_DELTA_MSG)
+        self.assertEqual([DF_DELTA_MSG, TEXT_DELTA_MSG2], rq.flush_unsent())
+
+    def test_flush_unsent_with_held_deltas(self):
+        rq = ReportQueue(track_unsent=True)
+
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+        rq.enqueue(INIT_MSG)
+
+        self.assertEqual([], rq.flush_unsent(lambda msg: True))
+        self.assertEqual([TEXT_DELTA_MSG1, INIT_MSG], rq.flush_unsent())
+
+    def test_clear_retain_initial_msg(self):
+        rq = ReportQueue(track_unsent=True)
+
+        rq.enqueue(INIT_MSG)
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+        rq.clear(retain_initial_msg=True)
+
+        self.assertEqual([INIT_MSG], list(rq))
+        self.assertEqual([], rq.flush_unsent())
+
+    def test_flush_unsent_untracked(self):
+        rq = ReportQueue()
+        rq.enqueue(INIT_MSG)
+        self.assertEqual([], rq.flush_unsent())
+
+    def test_compact_orphans(self):
+        """Children of a block that was replaced by an element are dropped."""
+        rq = ReportQueue()
+
+        block_msg = ForwardMsg()
+        block_msg.delta.new_block = True
+        block_msg.metadata.delta_id = 0
+        rq.enqueue(block_msg)
+
+        child_msg = copy.deepcopy(TEXT_DELTA_MSG1)
+        child_msg.metadata.parent_block.path[:] = [0]
+        child_msg.metadata.delta_id = 0
+        rq.enqueue(child_msg)
+
+        rq.compact()
+        self.assertEqual([block_msg, child_msg], list(rq))
+
+        TEXT_DELTA_MSG2.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG2)
+        rq.compact()
+        self.assertEqual([TEXT_DELTA_MSG2], list(rq))
+
+        # The queue's index was updated.
+        TEXT_DELTA_MSG1.metadata.delta_id = 0
+        rq.enqueue(TEXT_DELTA_MSG1)
+        self.assertEqual([TEXT_DELTA_MSG1], list(rq))
+
+    def test_compact_max_bytes(self):
+        """The oldest sent deltas are dropped to fit max_bytes."""
+        rq = ReportQueue(track_unsent=True, max_bytes=1000)
+        rq.enqueue(INIT_MSG)
+
+        def create_msg(delta_id):
+            msg = ForwardMsg()
+            msg.metadata.delta_id = delta_id
+            msg.delta.new_element.text.body = "x" * 300
+            return msg
+
+        for delta_id in range(3):
+            rq.enqueue(create_msg(delta_id))
+        rq.flush_unsent()
+
+        # Unsent messages are never dropped.
+        rq.enqueue(create_msg(3))
+        rq.enqueue(create_msg(4))
+
+        queue = list(rq)
+        self.assertTrue(queue[0].HasField("initialize"))
+        self.assertEqual([2, 3, 4], [msg.metadata.delta_id for msg in queue[1:]])
+
+        queue = rq.flush_unsent()
+        self.assertEqual([3, 4], [msg.metadata.delta_id for msg in queue])
+
+    def test_automatic_compaction(self):
+        """Queues are compacted as they grow."""
+        rq = ReportQueue()
+
+        block_msg = ForwardMsg()
+        block_msg.delta.new_block = True
+        block_msg.metadata.delta_id = 0
+        rq.enqueue(block_msg)
+
+        for delta_id in range(10):
+            msg = copy.deepcopy(TEXT_DELTA_MSG1)
+            msg.metadata.parent_block.path[:] = [0]
+            msg.metadata.delta_id = delta_id
+            rq.enqueue(msg)
+
+        # Replace the block, then grow the queue past MIN_COMPACTION_LEN.
+        text_msg = copy.deepcopy(TEXT_DELTA_MSG1)
+        text_msg.metadata.delta_id = 0
+        rq.enqueue(text_msg)
+
+        with patch("streamlit.ReportQueue.MIN_COMPACTION_LEN", 12):
+            rq._reset_compaction_state()
+            other_text_msg = copy.deepcopy(TEXT_DELTA_MSG2)
+            other_text_msg.metadata.delta_id = 1
+            rq.enqueue(other_text_msg)
+
+        self.assertEqual([text_msg, other_text_msg], list(rq))
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for ReportSession.py."""
+
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from streamlit.ReportSession import ReportSession
+from streamlit.ScriptRequestQueue import ScriptRequest
+from streamlit.ScriptRunner import ScriptRunnerEvent
+from streamlit.proto.Widget_pb2 import WidgetStates
+from tests import testutil
+
+
+def _create_widget_states(value):
+    widget_states = WidgetStates()
+    widget = widget_states.widgets.add()
+    widget.id = "slider"
+    widget.int_value = value
+    return widget_states
+
+
+@patch("streamlit.ReportSession.LocalSourcesWatcher", MagicMock())
+@patch("streamlit.ReportSession.ScriptRunner", MagicMock())
+@patch(
+    "streamlit.ReportSession.config.get_option",
+    side_effect=testutil.build_mock_config_get_option({"server.shareScriptRuns": True}),
+)
+class ReportSessionSharedRunTest(unittest.TestCase):
+    def _create_session(self):
+        ioloop = MagicMock()
+        # Run callbacks right away.
+        ioloop.spawn_callback.side_effect = lambda callback: callback()
+        return ReportSession(ioloop, "/not/a/script.py", "")
+
+    @patch("streamlit.ReportSession.SharedReportRun.subscribe")
+    def test_subscribe_after_shutdown(self, subscribe, _):
+        """Tests that a session whose ScriptRunner is active subscribes to
+        a shared run only once the ScriptRunner has shut down."""
+        session = self._create_session()
+        session.request_rerun()
+        scriptrunner = session._scriptrunner
+        self.assertIsNotNone(scriptrunner)
+
+        states = _create_widget_states(1)
+        session.handle_rerun_script_request(widget_state=states)
+        subscribe.assert_not_called()
+        self.assertEqual(
+            ScriptRequest.SHUTDOWN, session._script_request_queue.dequeue()[0]
+        )
+
+        session._on_scriptrunner_event(
+            ScriptRunnerEvent.SHUTDOWN, widget_states=WidgetStates()
+        )
+        subscribe.assert_called_once_with(
+            session, states, session._create_shared_runner
+        )
+        self.assertIsNone(session._scriptrunner)
+        # The RERUN that the old ScriptRunner didn't get to was dropped.
+        self.assertFalse(session._script_request_queue.has_request)
+
+    def test_rerun_leaves_shared_run(self, _):
+        """Tests that a viewer's rerun runs the script for that viewer only."""
+        session = self._create_session()
+        shared_run = MagicMock()
+        session._shared_run = shared_run
+
+        session.handle_rerun_script_request()
+
+        shared_run.unsubscribe.assert_called_once_with(session)
+        shared_run.request_rerun.assert_not_called()
+        self.assertIsNone(session._shared_run)
+        self.assertIsNotNone(session._scriptrunner)
+
+    def test_stop_leaves_shared_run(self, _):
+        """Tests that a viewer's stop doesn't stop the other subscribers'
+        run."""
+        session = self._create_session()
+        shared_run = MagicMock()
+        session._shared_run = shared_run
+
+        session.handle_stop_script_request()
+
+        shared_run.unsubscribe.assert_called_once_with(session)
+        self.assertIsNone(session._shared_run)
+        self.assertIsNone(session._scriptrunner)
+
+    def test_run_on_save_leaves_shared_run(self, _):
+        """Tests that a viewer's run_on_save flag is their own."""
+        session = self._create_session()
+        shared_run = MagicMock()
+        session._shared_run = shared_run
+
+        session.handle_set_run_on_save_request(True)
+
+        shared_run.unsubscribe.assert_called_once_with(session)
+        self.assertTrue(session._run_on_save)
+        self.assertIsNotNone(session._scriptrunner)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit test of Report.py."""
+
+import unittest
+
+from mock import patch
+
+from streamlit.Report import Report
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tests.testutil import build_mock_config_get_option
+
+
+def _create_text_msg(body, delta_id=0):
+    msg = ForwardMsg()
+    msg.metadata.delta_id = delta_id
+    msg.delta.new_element.text.body = body
+    return msg
+
+
+def _patch_max_element_update_rate(rate):
+    return patch(
+        "streamlit.Report.config.get_option",
+        side_effect=build_mock_config_get_option({"server.maxElementUpdateRate": rate}),
+    )
+
+
+class ReportTest(unittest.TestCase):
+    def test_throttled_element_updates(self):
+        """Rapid updates to one element are held back, and the final state
+        is delivered once the frame window has passed."""
+        report = Report("/not/a/script.py", "test command line")
+
+        with _patch_max_element_update_rate(10), patch(
+            "streamlit.Report.time.time"
+        ) as time:
+            time.return_value = 100.0
+            report.enqueue(_create_text_msg("first"))
+            msgs = report.flush_browser_queue()
+            self.assertEqual(["first"], [m.delta.new_element.text.body for m in msgs])
+
+            # Within the window, updates are held back and superseded...
+            time.return_value = 100.05
+            report.enqueue(_create_text_msg("second"))
+            report.enqueue(_create_text_msg("third"))
+            report.enqueue(_create_text_msg("other element", delta_id=1))
+            msgs = report.flush_browser_queue()
+            self.assertEqual(
+                ["other element"], [m.delta.new_element.text.body for m in msgs]
+            )
+
+            # ...and the final state goes out after the window.
+            time.return_value = 100.11
+            msgs = report.flush_browser_queue()
+            self.assertEqual(["third"], [m.delta.new_element.text.body for m in msgs])
+
+    def test_unthrottled_element_updates(self):
+        """Every update is flushed when maxElementUpdateRate is 0."""
+        report = Report("/not/a/script.py", "test command line")
+
+        with _patch_max_element_update_rate(0):
+            report.enqueue(_create_text_msg("first"))
+            self.assertEqual(1, len(report.flush_browser_queue()))
+            report.enqueue(_create_text_msg("second"))
+            self.assertEqual(1, len(report.flush_browser_queue()))
+
+    def test_mirror(self):
+        """A mirror gets a replay of the report, then all its new messages."""
+        report = Report("/not/a/script.py", "test command line", headless=True)
+        report.enqueue(_create_text_msg("first"))
+
+        mirror = Report("/not/a/script.py", "test command line")
+        mirror.enqueue(_create_text_msg("stale", delta_id=5))
+        report.add_mirror(mirror)
+        report.enqueue(_create_text_msg("second", delta_id=1))
+
+        with _patch_max_element_update_rate(0):
+            # A headless report doesn't queue messages for a browser.
+            self.assertEqual([], report.flush_browser_queue())
+            msgs = mirror.flush_browser_queue()
+            self.assertEqual(
+                ["first", "second"], [m.delta.new_element.text.body for m in msgs]
+            )
+
+            report.clear()
+            report.remove_mirror(mirror)
+            report.enqueue(_create_text_msg("third"))
+            self.assertEqual([], mirror.flush_browser_queue())
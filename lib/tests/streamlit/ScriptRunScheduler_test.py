@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for ScriptRunScheduler."""
+
+import threading
+import time
+import unittest
+
+from mock import patch
+
+from streamlit.ScriptRunScheduler import ScriptRunScheduler
+from tests.testutil import build_mock_config_get_option
+
+
+def _patch_max_concurrent_runs(max_runs):
+    return patch(
+        "streamlit.ScriptRunScheduler.config.get_option",
+        side_effect=build_mock_config_get_option(
+            {"runner.maxConcurrentRuns": max_runs}
+        ),
+    )
+
+
+def _wait_for(pred, timeout=5):
+    end_time = time.time() + timeout
+    while not pred() and time.time() < end_time:
+        time.sleep(0.01)
+
+
+class ScriptRunSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        ScriptRunScheduler._singleton = None
+        self.scheduler = ScriptRunScheduler.get_current()
+
+    def tearDown(self):
+        ScriptRunScheduler._singleton = None
+
+    def _acquire_in_thread(self, name, interactive, acquired):
+        def run():
+            if self.scheduler.acquire(interactive):
+                acquired.append(name)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        _wait_for(lambda: len(self.scheduler._waiting) > 0)
+        return thread
+
+    def test_unlimited(self):
+        """With no limit, acquire never waits."""
+        with _patch_max_concurrent_runs(0):
+            for _ in range(5):
+                self.assertTrue(self.scheduler.acquire(interactive=False))
+            self.assertEqual(5, self.scheduler._num_running)
+
+    def test_priority_order(self):
+        """Interactive runs go before background runs, and runs of the same
+        priority go in order of arrival."""
+        acquired = []
+        with _patch_max_concurrent_runs(1):
+            self.assertTrue(self.scheduler.acquire(interactive=False))
+
+            threads = []
+            for name, interactive in [
+                ("bg1", False),
+                ("ui1", True),
+                ("bg2", False),
+                ("ui2", True),
+            ]:
+                threads.append(self._acquire_in_thread(name, interactive, acquired))
+                _wait_for(lambda: len(self.scheduler._waiting) == len(threads))
+
+            for _ in range(len(threads)):
+                num_acquired = len(acquired)
+                self.scheduler.release()
+                _wait_for(lambda: len(acquired) > num_acquired)
+
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(["ui1", "ui2", "bg1", "bg2"], acquired)
+
+    def test_cancel(self):
+        """A waiting run can be cancelled."""
+        cancelled = threading.Event()
+        result = []
+        with _patch_max_concurrent_runs(1):
+            self.assertTrue(self.scheduler.acquire(interactive=True))
+
+            thread = threading.Thread(
+                target=lambda: result.append(
+                    self.scheduler.acquire(True, is_cancelled=cancelled.is_set)
+                )
+            )
+            thread.start()
+            _wait_for(lambda: len(self.scheduler._waiting) > 0)
+            cancelled.set()
+            thread.join()
+
+        self.assertEqual([False], result)
+        self.assertEqual([], self.scheduler._waiting)
+        self.assertEqual(1, self.scheduler._num_running)
+
+    def test_get_current_from_threads(self):
+        """Threads that get the scheduler at the same time share one."""
+        ScriptRunScheduler._singleton = None
+        schedulers = []
+
+        def get_scheduler():
+            schedulers.append(ScriptRunScheduler.get_current())
+
+        # Make creating the scheduler slow, so the threads overlap.
+        init = ScriptRunScheduler.__init__
+
+        def slow_init(scheduler):
+            time.sleep(0.05)
+            init(scheduler)
+
+        with patch.object(ScriptRunScheduler, "__init__", slow_init):
+            threads = [threading.Thread(target=get_scheduler) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(4, len(schedulers))
+        self.assertEqual(1, len(set(id(scheduler) for scheduler in schedulers)))
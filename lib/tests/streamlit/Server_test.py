@@ -15,9 +15,11 @@
 
 """Server.py unit tests"""
 
+import threading
 import unittest
 
 import mock
+import pandas as pd
 import pytest
 import tornado.testing
 import tornado.web
@@ -31,14 +33,20 @@ import streamlit.server.Server
 from streamlit import config
 from streamlit.server.Server import server_port_is_manually_set
 from streamlit.server.Server import MAX_PORT_SEARCH_RETRIES
+from streamlit.server.Server import PREHEATED_SESSION_MAX_AGE_SECS
+from streamlit.DataFrameStore import DataFrameStore
 from streamlit.ForwardMsgCache import ForwardMsgCache
 from streamlit.ForwardMsgCache import populate_hash_if_needed
 from streamlit.elements import data_frame_proto
+from streamlit.proto.BackMsg_pb2 import BackMsg
 from streamlit.proto.BlockPath_pb2 import BlockPath
+from streamlit.proto.DataFrame_pb2 import DataFrame
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 from streamlit.server.Server import State
+from streamlit.server.Server import bind_sockets
 from streamlit.server.Server import start_listening
 from streamlit.server.Server import RetriesExceeded
+from streamlit.server.routes import DataFrameWindowHandler
 from streamlit.server.routes import DebugHandler
 from streamlit.server.routes import HealthHandler
 from streamlit.server.routes import MessageCacheHandler
@@ -46,7 +54,9 @@ from streamlit.server.routes import MetricsHandler
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
 from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import serialize_msg_chunks
 from tests.ServerTestCase import ServerTestCase
+from tests.testutil import build_mock_config_get_option
 
 from streamlit.logger import get_logger
 
@@ -109,6 +119,70 @@ class ServerTest(ServerTestCase):
             yield gen.sleep(0.1)
             self.assertFalse(self.server.browser_is_connected)
 
+    @tornado.testing.gen_test
+    def test_preheated_session_pool(self):
+        """Test that browsers claim preheated sessions, and that the pool
+        isn't refilled by default."""
+        with self._patch_report_session() as report_session, patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option(
+                {"server.numPreheatedSessions": 2}
+            ),
+        ):
+            report_session.side_effect = lambda **kwargs: MagicMock()
+            yield self.start_server_loop()
+            self.server.add_preheated_report_session()
+
+            preheated = [session for _, session in self.server._preheated_sessions]
+            self.assertEqual(2, len(preheated))
+            for session in preheated:
+                session.handle_rerun_script_request.assert_called_once_with(
+                    is_preheat=True
+                )
+
+            yield self.ws_connect()
+            _, session_info = list(self.server._session_infos.items())[0]
+            self.assertIs(preheated[0], session_info.session)
+
+            yield gen.sleep(0.05)
+            self.assertEqual(1, len(self.server._preheated_sessions))
+            self.assertEqual(2, report_session.call_count)
+
+    @tornado.testing.gen_test
+    def test_refill_preheated_sessions(self):
+        """Test that the pool is refilled if server.refillPreheatedSessions
+        is set, and that expired sessions aren't claimed."""
+        with self._patch_report_session() as report_session, patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option(
+                {
+                    "server.numPreheatedSessions": 2,
+                    "server.refillPreheatedSessions": True,
+                }
+            ),
+        ):
+            report_session.side_effect = lambda **kwargs: MagicMock()
+            yield self.start_server_loop()
+            self.server.add_preheated_report_session()
+
+            # The first session has expired.
+            created_time, expired = self.server._preheated_sessions[0]
+            self.server._preheated_sessions[0] = (
+                created_time - PREHEATED_SESSION_MAX_AGE_SECS - 1,
+                expired,
+            )
+            _, fresh = self.server._preheated_sessions[1]
+
+            yield self.ws_connect()
+            _, session_info = list(self.server._session_infos.items())[0]
+            self.assertIs(fresh, session_info.session)
+            expired.shutdown.assert_called_once()
+
+            # The pool is refilled in the background.
+            yield gen.sleep(0.05)
+            self.assertEqual(2, len(self.server._preheated_sessions))
+            self.assertEqual(4, report_session.call_count)
+
     @tornado.testing.gen_test
     def test_forwardmsg_hashing(self):
         """Test that outgoing ForwardMsgs contain hashes."""
@@ -187,6 +261,31 @@ class ServerTest(ServerTestCase):
             # And the same *metadata* as msg2:
             self.assertEqual(msg2.metadata, cached.metadata)
 
+    @tornado.testing.gen_test
+    def test_client_cache_manifest(self):
+        """Test that messages from a client's cache manifest are sent
+        as references."""
+        with self._patch_report_session():
+            config._set_option("global.minCachedMessageSize", 0, "test")
+
+            yield self.start_server_loop()
+
+            # A previous session caches a message.
+            msg = _create_dataframe_msg([1, 2, 3])
+            self.server._message_cache.add_message(msg, MagicMock(), 0)
+
+            ws_client = yield self.ws_connect()
+            ws, session_info = list(self.server._session_infos.items())[0]
+
+            back_msg = BackMsg()
+            back_msg.cache_manifest.hashes.extend([msg.hash, "unknown_hash"])
+            ws.on_message(back_msg.SerializeToString())
+
+            self.server._send_message(ws, session_info, msg)
+            received = yield self.read_forward_msg(ws_client)
+            self.assertEqual("ref_hash", received.WhichOneof("type"))
+            self.assertEqual(msg.hash, received.ref_hash)
+
     @tornado.testing.gen_test
     def test_cache_clearing(self):
         """Test that report_run_count is incremented when a report
@@ -246,6 +345,185 @@ class ServerTest(ServerTestCase):
             finish_report(True)
             self.assertFalse(is_data_msg_cached())
 
+    @tornado.testing.gen_test
+    def test_websocket_compression(self):
+        """Test that messages are compressed when websocketCompression is on,
+        except for those under websocketCompressionMinSize."""
+        config_overrides = {
+            "server.websocketCompression": True,
+            "server.websocketCompressionMinSize": 100,
+        }
+        with self._patch_report_session(), patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option(config_overrides),
+        ):
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+
+            ws, session = list(self.server._session_infos.items())[0]
+            compressor = ws.ws_connection._compressor
+            self.assertIsNotNone(compressor)
+
+            with patch.object(
+                compressor, "compress", wraps=compressor.compress
+            ) as compress:
+                small_msg = _create_report_finished_msg(
+                    ForwardMsg.FINISHED_SUCCESSFULLY
+                )
+                self.server._send_message(ws, session, small_msg)
+                received = yield self.read_forward_msg(ws_client)
+                self.assertEqual(small_msg, received)
+                self.assertEqual(0, compress.call_count)
+
+                large_msg = _create_dataframe_msg(list(range(100)))
+                self.server._send_message(ws, session, large_msg)
+                received = yield self.read_forward_msg(ws_client)
+                self.assertEqual(large_msg.delta, received.delta)
+                self.assertEqual(1, compress.call_count)
+
+            # The compressor is restored after sending a small message.
+            self.assertIs(compressor, ws.ws_connection._compressor)
+
+    @tornado.testing.gen_test
+    def test_websocket_compression_unknown_tornado(self):
+        """Test that all messages are compressed if we can't tell whether
+        Tornado's compressor can be detached."""
+        config_overrides = {
+            "server.websocketCompression": True,
+            "server.websocketCompressionMinSize": 100,
+        }
+        with self._patch_report_session(), patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option(config_overrides),
+        ), patch("tornado.version_info", (99, 0, 0, 0)):
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+
+            ws, session = list(self.server._session_infos.items())[0]
+            compressor = ws.ws_connection._compressor
+            with patch.object(
+                compressor, "compress", wraps=compressor.compress
+            ) as compress:
+                small_msg = _create_report_finished_msg(
+                    ForwardMsg.FINISHED_SUCCESSFULLY
+                )
+                self.server._send_message(ws, session, small_msg)
+                received = yield self.read_forward_msg(ws_client)
+                self.assertEqual(small_msg, received)
+                self.assertEqual(1, compress.call_count)
+
+    @tornado.testing.gen_test
+    def test_websocket_compression_disabled(self):
+        """Test that compression is not negotiated by default."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+
+            ws, _ = list(self.server._session_infos.items())[0]
+            self.assertIsNone(ws.get_compression_options())
+            self.assertIsNone(ws.ws_connection._compressor)
+
+    @tornado.testing.gen_test
+    def test_outbound_bytes_tracking(self):
+        """Test that undelivered bytes are counted against a session."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+
+            ws, session_info = list(self.server._session_infos.items())[0]
+            msg = _create_dataframe_msg([1, 2, 3])
+            self.server._send_message(ws, session_info, msg)
+            self.assertEqual(
+                len(serialize_forward_msg(msg)), session_info.outbound_bytes
+            )
+
+            yield self.read_forward_msg(ws_client)
+            self.assertEqual(0, session_info.outbound_bytes)
+
+    @tornado.testing.gen_test
+    def test_slow_client(self):
+        """Test that slow clients are throttled, then disconnected."""
+        config_overrides = {
+            "server.maxOutboundBytes": 100,
+            "server.slowClientTimeout": 10,
+        }
+        with self._patch_report_session(), patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option(config_overrides),
+        ):
+            yield self.start_server_loop()
+            yield self.ws_connect()
+
+            ws, session_info = list(self.server._session_infos.items())[0]
+            session = session_info.session
+
+            # Under budget: the browser queue gets flushed.
+            session_info.outbound_bytes = 100
+            self.assertFalse(self.server._is_over_outbound_budget(ws, session_info))
+            self.assertIsNone(session_info.over_budget_since)
+
+            # Over budget: the queue is left alone, so its deltas can be
+            # composed, but the client stays connected.
+            session_info.outbound_bytes = 101
+            session.flush_browser_queue.reset_mock()
+            yield gen.sleep(0.05)
+            self.assertTrue(self.server._is_over_outbound_budget(ws, session_info))
+            self.assertIsNotNone(session_info.over_budget_since)
+            session.flush_browser_queue.assert_not_called()
+            self.assertTrue(self.server.browser_is_connected)
+
+            # Over budget for too long: the client is disconnected.
+            session_info.over_budget_since -= 11
+            self.assertTrue(self.server._is_over_outbound_budget(ws, session_info))
+            self.assertFalse(self.server.browser_is_connected)
+            session.shutdown.assert_called_once()
+
+    @tornado.testing.gen_test
+    def test_chunked_message(self):
+        """Test that oversized messages are sent in chunks, in order."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.Server.MESSAGE_CHUNK_SIZE", 100
+        ):
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+
+            ws, session_info = list(self.server._session_infos.items())[0]
+            large_msg = _create_dataframe_msg(list(range(50)))
+            small_msg = _create_dataframe_msg([1], id=2)
+            session_info.session.flush_browser_queue.return_value = [
+                large_msg,
+                small_msg,
+            ]
+
+            # The first chunk triggers a chunked send. The small message
+            # waits for it to finish.
+            chunk_msg = yield self.read_forward_msg(ws_client)
+            self.assertEqual("chunk", chunk_msg.WhichOneof("type"))
+            self.assertEqual(0, chunk_msg.chunk.index)
+            self.assertEqual([small_msg], session_info.unsent_msgs)
+            session_info.session.flush_browser_queue.return_value = []
+
+            msg_data = chunk_msg.chunk.data
+            for index in range(1, chunk_msg.chunk.num_chunks):
+                chunk_msg = yield self.read_forward_msg(ws_client)
+                self.assertEqual(index, chunk_msg.chunk.index)
+                msg_data += chunk_msg.chunk.data
+
+            received = ForwardMsg()
+            received.ParseFromString(msg_data)
+            self.assertEqual(large_msg, received)
+            self.assertEqual(large_msg.hash, chunk_msg.chunk.msg_hash)
+
+            received = yield self.read_forward_msg(ws_client)
+            self.assertEqual(small_msg.delta, received.delta)
+            self.assertEqual([], session_info.unsent_msgs)
+
 
 class ServerUtilsTest(unittest.TestCase):
     def test_is_url_from_allowed_origins_allowed_domains(self):
@@ -291,6 +569,20 @@ class ServerUtilsTest(unittest.TestCase):
         config._set_option("global.minCachedMessageSize", 1000, "test")
         self.assertFalse(is_cacheable_msg(_create_dataframe_msg([1, 2, 3])))
 
+    def test_serialize_msg_chunks(self):
+        """Test server_util.serialize_msg_chunks"""
+        msg_str = b"0123456789"
+        chunks = []
+        for chunk_str in serialize_msg_chunks("some_hash", msg_str, 4):
+            chunk_msg = ForwardMsg()
+            chunk_msg.ParseFromString(chunk_str)
+            chunks.append(chunk_msg.chunk)
+
+        self.assertEqual([0, 1, 2], [chunk.index for chunk in chunks])
+        self.assertEqual([3, 3, 3], [chunk.num_chunks for chunk in chunks])
+        self.assertEqual({"some_hash"}, {chunk.msg_hash for chunk in chunks})
+        self.assertEqual([b"0123", b"4567", b"89"], [chunk.data for chunk in chunks])
+
 
 class HealthHandlerTest(tornado.testing.AsyncHTTPTestCase):
     """Tests the /healthz endpoint"""
@@ -370,6 +662,38 @@ class PortRotateOneTest(unittest.TestCase):
             )
 
 
+class BindSocketsTest(unittest.TestCase):
+    """Tests binding the sockets that worker processes share"""
+
+    @mock.patch("streamlit.server.Server.config._set_option")
+    @mock.patch("streamlit.server.Server.server_port_is_manually_set")
+    @mock.patch("streamlit.server.Server.tornado.netutil.bind_sockets")
+    def test_bind_sockets(
+        self,
+        patched_bind_sockets,
+        patched_server_port_is_manually_set,
+        patched__set_option,
+    ):
+        patched_server_port_is_manually_set.return_value = False
+        sockets = [mock.Mock()]
+        patched_bind_sockets.side_effect = [
+            OSError(errno.EADDRINUSE, "test", "asd"),
+            sockets,
+        ]
+        with patch(
+            "streamlit.server.Server.config.get_option",
+            side_effect=build_mock_config_get_option({"server.port": 8501}),
+        ):
+            self.assertIs(sockets, bind_sockets())
+
+        # The port isn't shared with other processes that listen on it.
+        patched_bind_sockets.assert_called_with(8501)
+        self.assertEqual(2, patched_bind_sockets.call_count)
+        patched__set_option.assert_called_with(
+            "server.port", 8502, "server initialization"
+        )
+
+
 class MetricsHandlerTest(tornado.testing.AsyncHTTPTestCase):
     """Tests the /metrics endpoint"""
 
@@ -418,3 +742,141 @@ class MessageCacheHandlerTest(tornado.testing.AsyncHTTPTestCase):
         # Cache misses
         self.assertEqual(404, self.fetch("/message").code)
         self.assertEqual(404, self.fetch("/message?id=non_existent").code)
+
+
+class DataFrameWindowHandlerTest(tornado.testing.AsyncHTTPTestCase):
+    def get_app(self):
+        DataFrameStore._singleton = None
+        self._store = DataFrameStore.get_current()
+        return tornado.web.Application(
+            [(r"/dataframe", DataFrameWindowHandler, dict(store=self._store))]
+        )
+
+    def tearDown(self):
+        super(DataFrameWindowHandlerTest, self).tearDown()
+        DataFrameStore._singleton = None
+
+    def test_window(self):
+        df = pd.DataFrame({"a": range(10), "b": range(10), "c": range(10)})
+        data_frame_id = self._store.add(df)
+
+        def fetch_window(row_start, row_end, col_start, col_end):
+            response = self.fetch(
+                "/dataframe?id=%s&row_start=%s&row_end=%s&col_start=%s&col_end=%s"
+                % (data_frame_id, row_start, row_end, col_start, col_end)
+            )
+            self.assertEqual(200, response.code)
+            proto_df = DataFrame()
+            proto_df.ParseFromString(response.body)
+            return proto_df
+
+        with patch(
+            "streamlit.config.get_option",
+            side_effect=build_mock_config_get_option(
+                {"server.dataFrameWindowRows": 4, "server.dataFrameWindowColumns": 2}
+            ),
+        ):
+            proto_df = fetch_window(4, 8, 1, 3)
+            self.assertEqual(4, proto_df.index.range_index.start)
+            self.assertEqual(8, proto_df.index.range_index.stop)
+            self.assertEqual(["b", "c"], proto_df.columns.plain_index.data.strings.data)
+            self.assertEqual([4, 5, 6, 7], proto_df.data.cols[0].int64s.data)
+
+            # Windows are cut down to the configured size.
+            proto_df = fetch_window(0, 10, 0, 3)
+            self.assertEqual(4, proto_df.index.range_index.stop)
+            self.assertEqual(2, len(proto_df.data.cols))
+
+            # Windows past the end are empty.
+            proto_df = fetch_window(12, 16, 0, 2)
+            self.assertEqual(0, len(proto_df.data.cols[0].int64s.data))
+
+            # Windows past the last column are cut down.
+            proto_df = fetch_window(0, 4, 2, 4)
+            self.assertEqual(["c"], proto_df.columns.plain_index.data.strings.data)
+
+    def test_query(self):
+        """Windows can be taken from sorted and filtered rows, and have the
+        requested columns."""
+        df = pd.DataFrame(
+            {"a": [3, 1, 2, 5, 4], "b": ["x", "Y", "y", "z", "yz"], "c": range(5)}
+        )
+        data_frame_id = self._store.add(df)
+
+        def fetch_window(query):
+            with patch(
+                "streamlit.config.get_option",
+                side_effect=build_mock_config_get_option(
+                    {"server.dataFrameWindowRows": 10}
+                ),
+            ):
+                response = self.fetch(
+                    "/dataframe?id=%s&row_start=0&row_end=10&%s"
+                    % (data_frame_id, query)
+                )
+            self.assertEqual(200, response.code)
+            proto_df = DataFrame()
+            proto_df.ParseFromString(response.body)
+            return proto_df
+
+        proto_df = fetch_window("columns=2,0&sort_column=0")
+        self.assertEqual(["c", "a"], proto_df.columns.plain_index.data.strings.data)
+        self.assertEqual([1, 2, 0, 4, 3], proto_df.index.int_64_index.data.data)
+        self.assertEqual([1, 2, 3, 4, 5], proto_df.data.cols[1].int64s.data)
+        self.assertEqual(5, proto_df.window.num_rows)
+
+        proto_df = fetch_window("columns=0&sort_column=0&ascending=0&filter=y")
+        self.assertEqual([4, 2, 1], proto_df.data.cols[0].int64s.data)
+        self.assertEqual(3, proto_df.window.num_rows)
+
+        proto_df = fetch_window("col_start=0&col_end=1&filter=y&filter_column=0")
+        self.assertEqual(0, proto_df.window.num_rows)
+
+        # Without sort_column, ascending=0 reverses the rows.
+        proto_df = fetch_window("columns=2&ascending=0")
+        self.assertEqual([4, 3, 2, 1, 0], proto_df.data.cols[0].int64s.data)
+
+        for query in ("columns=3", "columns=0&sort_column=3", "columns=0,x"):
+            response = self.fetch(
+                "/dataframe?id=%s&row_start=0&row_end=10&%s" % (data_frame_id, query)
+            )
+            self.assertEqual(400, response.code)
+
+    def test_query_in_executor(self):
+        """Queries are answered off the IOLoop's thread."""
+        data_frame_id = self._store.add(pd.DataFrame({"a": [2, 1]}))
+        get_rows = self._store.get_rows
+        threads = []
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return get_rows(*args)
+
+        with patch.object(self._store, "get_rows", side_effect=record_thread):
+            response = self.fetch(
+                "/dataframe?id=%s&row_start=0&row_end=2&columns=0&sort_column=0"
+                % data_frame_id
+            )
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    def test_errors(self):
+        self.assertEqual(400, self.fetch("/dataframe").code)
+        self.assertEqual(
+            404,
+            self.fetch(
+                "/dataframe?id=non_existent&row_start=0&row_end=1"
+                "&col_start=0&col_end=1"
+            ).code,
+        )
+
+        data_frame_id = self._store.add(pd.DataFrame({"a": [1]}))
+        for args in ("row_start=x&row_end=1", "row_start=-1&row_end=1"):
+            self.assertEqual(
+                400,
+                self.fetch(
+                    "/dataframe?id=%s&%s&col_start=0&col_end=1" % (data_frame_id, args)
+                ).code,
+            )
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for SharedReportRun.py."""
+
+import unittest
+
+from mock import MagicMock
+
+from streamlit.SharedReportRun import SharedReportRun
+from streamlit.SharedReportRun import get_widget_states_key
+from streamlit.SharedReportRun import has_trigger_value
+from streamlit.proto.Widget_pb2 import WidgetStates
+
+
+def _create_widget_states(**values):
+    widget_states = WidgetStates()
+    for widget_id, value in values.items():
+        widget = widget_states.widgets.add()
+        widget.id = widget_id
+        if isinstance(value, bool):
+            widget.trigger_value = value
+        else:
+            widget.int_value = value
+    return widget_states
+
+
+class SharedReportRunTest(unittest.TestCase):
+    def tearDown(self):
+        SharedReportRun._runs.clear()
+
+    def test_widget_states_key(self):
+        """Widget order doesn't matter, but values do."""
+        states1 = _create_widget_states(a=1, b=2)
+        states2 = WidgetStates()
+        states2.widgets.extend(reversed(states1.widgets))
+        self.assertEqual(get_widget_states_key(states1), get_widget_states_key(states2))
+        self.assertNotEqual(
+            get_widget_states_key(states1),
+            get_widget_states_key(_create_widget_states(a=1, b=3)),
+        )
+
+    def test_has_trigger_value(self):
+        self.assertFalse(has_trigger_value(_create_widget_states(a=1, button=False)))
+        self.assertTrue(has_trigger_value(_create_widget_states(a=1, button=True)))
+
+    def test_subscribe(self):
+        """Sessions with the same widget states share a runner."""
+        runner = MagicMock()
+        create_runner = MagicMock(return_value=runner)
+        session1 = MagicMock()
+        session2 = MagicMock()
+
+        states = _create_widget_states(a=1)
+        run1 = SharedReportRun.subscribe(session1, states, create_runner)
+        run2 = SharedReportRun.subscribe(session2, states, create_runner)
+
+        self.assertIs(run1, run2)
+        create_runner.assert_called_once()
+        runner.request_rerun.assert_called_once_with(states)
+        runner.add_mirror.assert_any_call(session1)
+        runner.add_mirror.assert_any_call(session2)
+
+        other_run = SharedReportRun.subscribe(
+            session1, _create_widget_states(a=2), MagicMock()
+        )
+        self.assertIsNot(run1, other_run)
+
+    def test_unsubscribe(self):
+        """The runner is shut down when its last session unsubscribes."""
+        runner = MagicMock()
+        session1 = MagicMock()
+        session2 = MagicMock()
+
+        states = _create_widget_states(a=1)
+        run = SharedReportRun.subscribe(session1, states, lambda: runner)
+        SharedReportRun.subscribe(session2, states, lambda: runner)
+
+        run.unsubscribe(session1)
+        runner.remove_mirror.assert_called_once_with(session1)
+        runner.shutdown.assert_not_called()
+
+        run.unsubscribe(session2)
+        runner.shutdown.assert_called_once()
+        self.assertEqual({}, SharedReportRun._runs)
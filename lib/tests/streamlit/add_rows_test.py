@@ -21,6 +21,9 @@ from streamlit.compatibility import setup_2_3_shims
 
 setup_2_3_shims(globals())
 
+import threading
+from contextlib import contextmanager
+
 import pandas as pd
 
 import streamlit.elements.data_frame_proto as data_frame_proto
@@ -219,3 +222,98 @@ class DeltaGeneratorAddRowsTest(testutil.DeltaGeneratorTestCase):
             # Clear the queue so the next loop is like a brand new test.
             self._dg._reset()
             self.report_queue.clear()
+
+    def test_add_rows_max_rows(self):
+        """Test that add_rows only keeps the last max_rows rows."""
+        all_methods = self._get_unnamed_data_methods() + self._get_named_data_methods()
+
+        for method in all_methods:
+            el = method(DATAFRAME)
+
+            # This is what we're testing:
+            el.add_rows(NEW_ROWS, max_rows=4)
+            el.add_rows(NEW_ROWS, max_rows=4)
+
+            df_proto = data_frame_proto._get_data_frame(self.get_delta_from_queue())
+            self.assertEqual([5, 3, 4, 5], df_proto.data.cols[0].int64s.data)
+            self.assertEqual(4, len(df_proto.style.style_indices[0].data))
+
+            # Clear the queue so the next loop is like a brand new test.
+            self._dg._reset()
+            self.report_queue.clear()
+
+    def test_melted_add_rows_max_rows(self):
+        """Test that max_rows counts rows before they are melted."""
+        for method in self._get_deltas_that_melt_dataframes():
+            el = method(DATAFRAME)
+            el.add_rows(NEW_ROWS, max_rows=4)
+
+            df_proto = data_frame_proto._get_data_frame(self.get_delta_from_queue())
+            # Two melted rows, one per column, for each of the 4 rows.
+            self.assertEqual(8, len(df_proto.data.cols[0].int64s.data))
+
+            # Clear the queue so the next loop is like a brand new test.
+            self._dg._reset()
+            self.report_queue.clear()
+
+    def test_melted_add_rows_max_rows_per_series(self):
+        """Test that max_rows keeps the same rows of every melted series."""
+        for method in self._get_deltas_that_melt_dataframes():
+            el = method(pd.DataFrame({"a": [0, 1], "b": [10, 11]}))
+            el.add_rows(pd.DataFrame({"a": [2, 3], "b": [12, 13]}), max_rows=3)
+
+            df_proto = data_frame_proto._get_data_frame(self.get_delta_from_queue())
+            index, variable, value = df_proto.data.cols
+            series = {}
+            for i, name in enumerate(_any_array_strings(variable)):
+                series.setdefault(name, []).append(
+                    (index.int64s.data[i], value.int64s.data[i])
+                )
+
+            self.assertEqual([(1, 1), (2, 2), (3, 3)], series["a"])
+            self.assertEqual([(1, 11), (2, 12), (3, 13)], series["b"])
+
+            # Clear the queue so the next loop is like a brand new test.
+            self._dg._reset()
+            self.report_queue.clear()
+
+    def test_streamlit_call(self):
+        """Test that st.dataframe and add_rows enqueue in a
+        ReportThread.streamlit_call context."""
+        depth = [0]
+        enqueued_depths = []
+
+        @contextmanager
+        def streamlit_call_ctx():
+            depth[0] += 1
+            try:
+                yield
+            finally:
+                depth[0] -= 1
+
+        def enqueue(msg):
+            enqueued_depths.append(depth[0])
+            return True
+
+        thread = threading.current_thread()
+        thread.streamlit_call_ctx = streamlit_call_ctx
+        try:
+            el = self.new_delta_generator(enqueue).dataframe(DATAFRAME)
+            el.add_rows(NEW_ROWS)
+        finally:
+            del thread.streamlit_call_ctx
+
+        self.assertEqual([1, 1], enqueued_depths)
+
+    def test_add_rows_invalid_max_rows(self):
+        el = self._dg.dataframe(DATAFRAME)
+        with self.assertRaises(ValueError):
+            el.add_rows(NEW_ROWS, max_rows=0)
+
+
+def _any_array_strings(any_array):
+    """The strings in a proto.AnyArray, which may be dictionary-encoded."""
+    if any_array.WhichOneof("type") == "strings":
+        return list(any_array.strings.data)
+    dictionary = any_array.string_dictionary
+    return [dictionary.values.data[code] for code in dictionary.codes.data]
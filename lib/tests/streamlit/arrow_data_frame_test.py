@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""arrow_data_frame unit tests."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from mock import patch
+
+import streamlit.elements.arrow_data_frame as arrow_data_frame
+import streamlit.elements.data_frame_proto as data_frame_proto
+from streamlit.proto.DataFrame_pb2 import DataFrame
+from streamlit.proto.Delta_pb2 import Delta
+from tests import testutil
+
+
+def _patch_serialization(value):
+    return patch(
+        "streamlit.elements.data_frame_proto.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"global.dataFrameSerialization": value}
+        ),
+    )
+
+
+def _marshall(df):
+    proto_df = DataFrame()
+    arrow_data_frame.marshall(df, proto_df)
+    return proto_df
+
+
+def _read(proto_df):
+    table, metadata = arrow_data_frame._read_table(proto_df)
+    return table.to_pydict(), metadata
+
+
+def _create_delta(df):
+    delta = Delta()
+    delta.new_element.data_frame.CopyFrom(_marshall(df))
+    return delta
+
+
+class ArrowDataFrameTest(unittest.TestCase):
+    def test_marshall(self):
+        """Columns hold the same values as in the DataFrame proto."""
+        df = pd.DataFrame(
+            {
+                "floats": [1.5, np.nan],
+                "ints": [1, 2],
+                "bools": [True, False],
+                "objects": ["a", None],
+                "categories": pd.Categorical(["x", None]),
+                "timedeltas": pd.to_timedelta([1, 2], unit="ns"),
+            }
+        )
+        columns, metadata = _read(_marshall(df))
+
+        self.assertEqual(
+            {
+                "columns": list(df.columns),
+                "types": [
+                    "doubles",
+                    "int64s",
+                    "int64s",
+                    "strings",
+                    "strings",
+                    "timedeltas",
+                ],
+                "index": {"type": "range_index", "start": 0, "stop": 2},
+            },
+            metadata,
+        )
+        self.assertEqual(1.5, columns["col_0"][0])
+        self.assertTrue(np.isnan(columns["col_0"][1]))
+        self.assertEqual([1, 2], columns["col_1"])
+        self.assertEqual([1, 0], columns["col_2"])
+        self.assertEqual(["a", "None"], columns["col_3"])
+        self.assertEqual(["x", "nan"], columns["col_4"])
+        self.assertEqual([1, 2], columns["col_5"])
+        self.assertNotIn("index", columns)
+
+    def test_marshall_datetimes(self):
+        df = pd.DataFrame(
+            {"dates": pd.to_datetime(["2019-04-09T12:34:56"]).tz_localize("UTC")},
+            index=pd.DatetimeIndex(["2019-04-09T12:34:56"]).tz_localize("UTC"),
+        )
+        columns, metadata = _read(_marshall(df))
+
+        self.assertEqual("datetimes", metadata["types"][0])
+        self.assertEqual({"type": "datetime_index"}, metadata["index"])
+        self.assertEqual([1554813296 * 10 ** 9], columns["col_0"])
+        self.assertEqual([1554813296 * 10 ** 9], columns["index"])
+
+    def test_marshall_index(self):
+        """Test the index types that have an index column."""
+        indices = [
+            (pd.Index(["a", "b"]), "plain_index", ["a", "b"]),
+            (pd.Int64Index([3, 4]), "int_64_index", [3, 4]),
+            (pd.Float64Index([0.5, 1.5]), "float_64_index", [0.5, 1.5]),
+            (pd.TimedeltaIndex([1, 2]), "timedelta_index", [1, 2]),
+        ]
+        for index, index_type, values in indices:
+            columns, metadata = _read(_marshall(pd.DataFrame({"a": [1, 2]}, index)))
+            self.assertEqual(index_type, metadata["index"]["type"])
+            self.assertEqual(values, columns["index"])
+
+        _, metadata = _read(_marshall(pd.DataFrame({"a": [1, 2]}, ["a", "b"])))
+        self.assertEqual("strings", metadata["index"]["data_type"])
+
+    def test_marshall_data_frame(self):
+        """marshall_data_frame only uses Arrow when it's enabled and
+        allowed, and the data supports it."""
+        df = pd.DataFrame({"a": [1, 2]})
+        multi_index_df = pd.DataFrame(
+            {"a": [1, 2]}, pd.MultiIndex.from_tuples([(1, 2), (3, 4)])
+        )
+
+        def is_arrow(data, allow_arrow=True):
+            proto_df = DataFrame()
+            data_frame_proto.marshall_data_frame(data, proto_df, allow_arrow)
+            return bool(proto_df.arrow_data)
+
+        with _patch_serialization("legacy"):
+            self.assertFalse(is_arrow(df))
+
+        with _patch_serialization("arrow"):
+            self.assertTrue(is_arrow(df))
+            self.assertFalse(is_arrow(df, allow_arrow=False))
+            self.assertFalse(is_arrow(df.style))
+            self.assertFalse(is_arrow(multi_index_df))
+
+    def test_add_rows(self):
+        delta1 = _create_delta(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        delta2 = _create_delta(pd.DataFrame({"a": [3, 4, 5], "b": ["z", "x", "z"]}))
+
+        data_frame_proto.add_rows(delta1, delta2)
+        columns, metadata = _read(delta1.new_element.data_frame)
+        self.assertEqual([1, 2, 3, 4, 5], columns["col_0"])
+        self.assertEqual(["x", "y", "z", "x", "z"], columns["col_1"])
+        self.assertEqual(
+            {"type": "range_index", "start": 0, "stop": 5}, metadata["index"]
+        )
+        self.assertEqual(
+            5, data_frame_proto.get_num_rows(delta1.new_element.data_frame)
+        )
+
+        # max_rows
+        data_frame_proto.add_rows(delta1, delta2, max_rows=4)
+        columns, metadata = _read(delta1.new_element.data_frame)
+        self.assertEqual([5, 3, 4, 5], columns["col_0"])
+        self.assertEqual(
+            {"type": "range_index", "start": 4, "stop": 8}, metadata["index"]
+        )
+
+    def test_add_rows_categories(self):
+        """Categorical columns with different categories can be concatenated."""
+        delta1 = _create_delta(pd.DataFrame({"a": pd.Categorical(["x", "y"])}))
+        delta2 = _create_delta(pd.DataFrame({"a": pd.Categorical(["z", "x"])}))
+
+        data_frame_proto.add_rows(delta1, delta2)
+        columns, _ = _read(delta1.new_element.data_frame)
+        self.assertEqual(["x", "y", "z", "x"], columns["col_0"])
+
+    def test_add_rows_errors(self):
+        delta = _create_delta(pd.DataFrame({"a": [1, 2]}))
+
+        with self.assertRaises(ValueError) as e:
+            data_frame_proto.add_rows(
+                delta, _create_delta(pd.DataFrame({"a": [1, 2], "b": [3, 4]}))
+            )
+        self.assertEqual("Dataframes have incompatible shapes", str(e.exception))
+
+        with self.assertRaises(ValueError) as e:
+            data_frame_proto.add_rows(delta, _create_delta(pd.DataFrame({"a": [1.5]})))
+        self.assertEqual("Cannot concatenate int64s with doubles.", str(e.exception))
+
+        legacy_delta = Delta()
+        data_frame_proto.marshall_data_frame(
+            pd.DataFrame({"a": [1]}), legacy_delta.new_element.data_frame
+        )
+        with self.assertRaises(ValueError):
+            data_frame_proto.add_rows(delta, legacy_delta)
+
+        # Adding rows to an empty DataFrame replaces it.
+        empty_delta = _create_delta(pd.DataFrame())
+        data_frame_proto.add_rows(empty_delta, legacy_delta)
+        self.assertEqual(
+            legacy_delta.new_element.data_frame, empty_delta.new_element.data_frame
+        )
+
+
+class DeltaGeneratorArrowTest(testutil.DeltaGeneratorTestCase):
+    def test_dataframe_add_rows(self):
+        """st.dataframe and its add_rows are marshalled as Arrow."""
+        with _patch_serialization("arrow"):
+            el = self.new_delta_generator().dataframe(pd.DataFrame({"a": [1, 2]}))
+            el.add_rows(pd.DataFrame({"a": [3]}))
+
+        proto_df = self.get_delta_from_queue().new_element.data_frame
+        self.assertEqual(0, len(proto_df.data.cols))
+        columns, _ = _read(proto_df)
+        self.assertEqual([1, 2, 3], columns["col_0"])
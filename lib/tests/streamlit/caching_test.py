@@ -16,6 +16,7 @@
 """st.caching unit tests."""
 import threading
 import unittest
+from contextlib import contextmanager
 
 from mock import patch
 
@@ -163,6 +164,39 @@ class CacheTest(unittest.TestCase):
         st.text("foo")
         warning.assert_not_called()
 
+    def test_write_in_streamlit_call(self):
+        """Test that the cache is written in a ReportThread.streamlit_call
+        context."""
+        depth = [0]
+        written_depths = []
+
+        @contextmanager
+        def streamlit_call_ctx():
+            depth[0] += 1
+            try:
+                yield
+            finally:
+                depth[0] -= 1
+
+        def write_to_mem_cache(*args):
+            written_depths.append(depth[0])
+
+        @st.cache(show_spinner=False)
+        def f():
+            return "test_write_in_streamlit_call"
+
+        thread = threading.current_thread()
+        thread.streamlit_call_ctx = streamlit_call_ctx
+        try:
+            with patch.object(
+                caching, "_write_to_mem_cache", side_effect=write_to_mem_cache
+            ):
+                f()
+        finally:
+            del thread.streamlit_call_ctx
+
+        self.assertEqual([1], written_depths)
+
     def test_caching_counter(self):
         """Test that _within_cached_function_counter behaves properly in
         multiple threads."""
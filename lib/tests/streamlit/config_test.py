@@ -263,6 +263,8 @@ class ConfigTest(unittest.TestCase):
                 u"browser.serverPort",
                 u"client.caching",
                 u"client.displayEnabled",
+                u"global.chartDataPrecision",
+                u"global.dataFrameSerialization",
                 u"global.developmentMode",
                 u"global.disableWatchdogWarning",
                 u"global.logLevel",
@@ -274,6 +276,10 @@ class ConfigTest(unittest.TestCase):
                 u"global.unitTest",
                 u"global.useNode",
                 u"runner.magicEnabled",
+                u"runner.asyncInterrupt",
+                u"runner.maxConcurrentRuns",
+                u"runner.maxElementMemoSize",
+                u"runner.numProcesses",
                 u"runner.installTracer",
                 u"runner.fixMatplotlib",
                 u"s3.accessKeyId",
@@ -284,12 +290,27 @@ class ConfigTest(unittest.TestCase):
                 u"s3.requireLoginToView",
                 u"s3.secretAccessKey",
                 u"s3.url",
+                u"server.dataFrameWindowColumns",
+                u"server.dataFrameWindowRows",
                 u"server.enableCORS",
                 u"server.folderWatchBlacklist",
                 u"server.headless",
+                u"server.maxOutboundBytes",
                 u"server.liveSave",
+                u"server.maxElementUpdateRate",
+                u"server.maxReportSize",
+                u"server.maxRetainedDataFrameSize",
+                u"server.numPreheatedSessions",
+                u"server.numWorkers",
                 u"server.port",
+                u"server.refillPreheatedSessions",
                 u"server.runOnSave",
+                u"server.shareScriptRuns",
+                u"server.slowClientTimeout",
+                u"server.websocketCompression",
+                u"server.websocketCompressionLevel",
+                u"server.websocketCompressionMemLevel",
+                u"server.websocketCompressionMinSize",
             ]
         )
         keys = sorted(config._config_options.keys())
@@ -37,6 +37,7 @@ from streamlit.proto.DataFrame_pb2 import Table
 from streamlit.proto.Delta_pb2 import Delta
 from streamlit.proto.VegaLiteChart_pb2 import VegaLiteChart
 from streamlit.proto.NamedDataSet_pb2 import NamedDataSet
+from tests import testutil
 
 
 def _css_style(prop, value):
@@ -74,17 +75,33 @@ class DataFrameProtoTest(unittest.TestCase):
         pass
 
     def test_marshall_styles(self):
-        """Test streamlit.data_frame_proto._marshall_styles.
-
-        Need to test the following:
-        * styler is:
-          * None
-          * not None
-        * display_values is:
-          * None
-          * not None
-        """
-        pass
+        """Test streamlit.data_frame_proto._marshall_styles."""
+        df = pd.DataFrame({"a": [-1.0, 2.0, -3.0], "b": [0.5, 0.25, 1.0]})
+
+        # Without a styler, all cells have the empty style.
+        proto = DataFrame().style
+        data_frame_proto._marshall_styles(proto, df)
+        self.assertEqual([CellStyle()], list(proto.unique_styles))
+        self.assertEqual([[0, 0, 0], [0, 0, 0]], [i.data for i in proto.style_indices])
+
+        # Each distinct style is stored once.
+        styler = df.style.applymap(
+            lambda v: "color: red" if v < 0 else "", subset=["a"]
+        ).format("{:.0%}", subset=["b"])
+        proto = DataFrame().style
+        data_frame_proto._marshall_styles(proto, df, styler)
+
+        def get_style(col, row):
+            return proto.unique_styles[proto.style_indices[col].data[row]]
+
+        self.assertEqual(5, len(proto.unique_styles))
+        self.assertEqual(get_style(0, 0), get_style(0, 2))
+        self.assertEqual([_css_style("color", "red")], list(get_style(0, 0).css))
+        self.assertEqual(CellStyle(), get_style(0, 1))
+        self.assertEqual(
+            ["50%", "25%", "100%"],
+            [get_style(1, row).display_value for row in range(3)],
+        )
 
     def test_get_css_styles(self):
         """Test streamlit.data_frame_proto._get_css_styles.
@@ -270,6 +287,95 @@ class DataFrameProtoTest(unittest.TestCase):
             err_msg = "Dtype |S6 not understood."
         self.assertEqual(err_msg, str(e.value))
 
+    def test_marshall_string_dictionary(self):
+        """Test that categorical and low-cardinality string columns are
+        dictionary-encoded."""
+        cat_data = pd.Series(pd.Categorical(["lo", "hi", np.nan, "lo"]))
+        cat_proto = AnyArray()
+        data_frame_proto._marshall_any_array(cat_data, cat_proto)
+        self.assertEqual(["hi", "lo", "nan"], cat_proto.string_dictionary.values.data)
+        self.assertEqual([1, 0, 2, 1], cat_proto.string_dictionary.codes.data)
+
+        str_data = pd.Series(["a", "b", None, "a", "a", "b"])
+        str_proto = AnyArray()
+        data_frame_proto._marshall_any_array(str_data, str_proto)
+        self.assertEqual(["a", "b", "None"], str_proto.string_dictionary.values.data)
+        self.assertEqual([0, 1, 2, 0, 0, 1], str_proto.string_dictionary.codes.data)
+
+        # Mostly distinct strings, and objects that aren't strings, are sent
+        # as strings.
+        unique_data = pd.Series(["a", "b", "c", "a"])
+        unique_proto = AnyArray()
+        data_frame_proto._marshall_any_array(unique_data, unique_proto)
+        self.assertEqual(["a", "b", "c", "a"], unique_proto.strings.data)
+
+        mixed_data = pd.Series([1, 1.0, 1, 1.0], dtype=object)
+        mixed_proto = AnyArray()
+        data_frame_proto._marshall_any_array(mixed_data, mixed_proto)
+        self.assertEqual(["1", "1.0", "1", "1.0"], mixed_proto.strings.data)
+
+    def test_marshall_single_precision(self):
+        """Test that floats are sent as 32-bit floats if
+        global.chartDataPrecision is "single" and the element allows it."""
+        df = pd.DataFrame({"a": [0.1, 2.5], "b": [1, 2]})
+
+        def marshall(precision, allow_single_precision):
+            proto = DataFrame()
+            with patch(
+                "streamlit.config.get_option",
+                side_effect=testutil.build_mock_config_get_option(
+                    {"global.chartDataPrecision": precision}
+                ),
+            ):
+                data_frame_proto.marshall_data_frame(
+                    df, proto, allow_single_precision=allow_single_precision
+                )
+            return proto.data.cols
+
+        cols = marshall("single", True)
+        self.assertEqual("floats", cols[0].WhichOneof("type"))
+        self.assertEqual(np.float32(0.1), cols[0].floats.data[0])
+        self.assertEqual([1, 2], cols[1].int64s.data)
+
+        self.assertEqual("doubles", marshall("single", False)[0].WhichOneof("type"))
+        self.assertEqual("doubles", marshall("double", True)[0].WhichOneof("type"))
+
+    def test_marshall_packed_arrays(self):
+        """Test that arrays filled from their buffers match ones filled
+        element by element."""
+        int_data = np.array(
+            [0, 1, -1, 127, 128, 16383, 16384, -(2 ** 63), 2 ** 63 - 1], dtype=np.int64
+        )
+        int_proto = AnyArray()
+        int_proto.int64s.data.extend(int_data)
+        packed_int_proto = AnyArray()
+        data_frame_proto._marshall_any_array(int_data, packed_int_proto)
+        self.assertEqual(int_proto, packed_int_proto)
+        self.assertEqual(
+            int_proto.SerializeToString(), packed_int_proto.SerializeToString()
+        )
+
+        float_data = np.array([0.0, -1.5, 1e300, np.inf, -np.inf], dtype=np.float32)
+        float_proto = AnyArray()
+        float_proto.doubles.data.extend(float_data)
+        packed_float_proto = AnyArray()
+        data_frame_proto._marshall_any_array(float_data, packed_float_proto)
+        self.assertEqual(float_proto, packed_float_proto)
+
+        # Packed data is appended, like extend.
+        label_proto = Int32Array()
+        label_proto.data.extend([5])
+        data_frame_proto._extend_packed_ints(
+            label_proto, np.array([-1, 0, 3], dtype=np.int8)
+        )
+        self.assertEqual([5, -1, 0, 3], label_proto.data)
+
+        # Empty arrays
+        empty_proto = AnyArray()
+        data_frame_proto._marshall_any_array(np.array([], dtype=np.int64), empty_proto)
+        self.assertEqual("int64s", empty_proto.WhichOneof("type"))
+        self.assertEqual(0, len(empty_proto.int64s.data))
+
     def test_add_rows(self):
         """Test streamlit.data_frame_proto._add_rows."""
         # Generic Data
@@ -343,6 +449,36 @@ class DataFrameProtoTest(unittest.TestCase):
         err_msg = "Dataframes have incompatible shapes"
         self.assertEqual(err_msg, str(e.value))
 
+    def test_add_rows_max_rows(self):
+        """Test that add_rows keeps the last max_rows rows."""
+        dt1 = Delta()
+        data_frame_proto.marshall_data_frame(
+            pd.DataFrame({"a": [1, 2, 3]}), dt1.new_element.data_frame
+        )
+        dt2 = Delta()
+        data_frame_proto.marshall_data_frame(
+            pd.DataFrame({"a": [4, 5]}), dt2.add_rows.data
+        )
+
+        data_frame_proto.add_rows(dt1, dt2, max_rows=4)
+
+        df = dt1.new_element.data_frame
+        self.assertEqual([2, 3, 4, 5], df.data.cols[0].int64s.data)
+        self.assertEqual(1, df.index.range_index.start)
+        self.assertEqual(5, df.index.range_index.stop)
+        self.assertEqual(4, len(df.style.style_indices[0].data))
+        self.assertEqual(4, data_frame_proto.get_num_rows(df))
+
+        # The rows being added are trimmed too.
+        dt3 = Delta()
+        data_frame_proto.marshall_data_frame(
+            pd.DataFrame({"a": [6, 7, 8]}), dt3.add_rows.data
+        )
+        data_frame_proto.add_rows(dt1, dt3, max_rows=2)
+        self.assertEqual([7, 8], df.data.cols[0].int64s.data)
+        self.assertEqual(6, df.index.range_index.start)
+        self.assertEqual(8, df.index.range_index.stop)
+
     def test_concat_index(self):
         """Test streamlit.data_frame_proto._concat_index."""
         # Empty
@@ -491,6 +627,56 @@ class DataFrameProtoTest(unittest.TestCase):
         err_msg = "Cannot concatenate int64s with doubles."
         self.assertEqual(err_msg, str(e.value))
 
+    def test_concat_string_dictionary(self):
+        """Test concatenating dictionary-encoded strings with strings."""
+
+        def dictionary(values, codes):
+            any_array = AnyArray()
+            any_array.string_dictionary.values.data.extend(values)
+            any_array.string_dictionary.codes.data.extend(codes)
+            return any_array
+
+        def strings(values):
+            any_array = AnyArray()
+            any_array.strings.data.extend(values)
+            return any_array
+
+        aa1 = dictionary(["a", "b"], [0, 1, 0])
+        data_frame_proto._concat_any_array(aa1, dictionary(["c", "a"], [1, 0]))
+        self.assertEqual(dictionary(["a", "b", "c"], [0, 1, 0, 0, 2]), aa1)
+
+        data_frame_proto._concat_any_array(aa1, strings(["d", "b"]))
+        self.assertEqual(dictionary(["a", "b", "c", "d"], [0, 1, 0, 0, 2, 3, 1]), aa1)
+
+        aa2 = strings(["b", "a"])
+        data_frame_proto._concat_any_array(aa2, dictionary(["a"], [0, 0]))
+        self.assertEqual(dictionary(["b", "a"], [0, 1, 1, 1]), aa2)
+        self.assertTrue(data_frame_proto._can_append_any_array(aa2, strings(["a"])))
+
+        data_frame_proto._trim_any_array(aa2, 2)
+        self.assertEqual(dictionary(["b", "a"], [1, 1]), aa2)
+        self.assertEqual(2, data_frame_proto._any_array_len(aa2))
+
+    def test_concat_floats(self):
+        """Test concatenating floats with different precisions."""
+        aa1 = AnyArray()
+        aa1.floats.data.extend([0.5, 1.5])
+        aa2 = AnyArray()
+        aa2.doubles.data.extend([2.25])
+        self.assertTrue(data_frame_proto._can_append_any_array(aa1, aa2))
+
+        combined = AnyArray()
+        combined.doubles.data.extend([0.5, 1.5, 2.25])
+
+        data_frame_proto._concat_any_array(aa1, aa2)
+        self.assertEqual(combined, aa1)
+
+        aa3 = AnyArray()
+        aa3.floats.data.extend([3.5])
+        combined.doubles.data.extend([3.5])
+        data_frame_proto._concat_any_array(aa1, aa3)
+        self.assertEqual(combined, aa1)
+
     def test_concat_cell_style_array(self):
         """Test streamlit.data_frame_proto._concat_cell_style_array."""
         cell_style1 = CellStyle()
@@ -519,6 +705,39 @@ class DataFrameProtoTest(unittest.TestCase):
         data_frame_proto._concat_cell_style_array(style0, style1)
         self.assertEqual(str(style0), str(style1))
 
+    def test_concat_table_style(self):
+        """Test streamlit.data_frame_proto._concat_table_style."""
+
+        def marshall_styles(df, styler):
+            proto = DataFrame().style
+            data_frame_proto._marshall_styles(proto, df, styler)
+            return proto
+
+        df = pd.DataFrame({"a": [1, 2]})
+        style1 = marshall_styles(df, df.style.applymap(lambda v: "color: red"))
+        style2 = marshall_styles(
+            df, df.style.applymap(lambda v: "color: red" if v > 1 else "color: blue")
+        )
+
+        # The styles that both have are only stored once.
+        data_frame_proto._concat_table_style(style1, style2)
+        self.assertEqual(3, len(style1.unique_styles))
+        self.assertEqual([1, 1, 2, 1], style1.style_indices[0].data)
+        self.assertEqual(
+            [_css_style("color", "blue")], list(style1.unique_styles[2].css)
+        )
+
+        # If one isn't dictionary-encoded, neither is the result.
+        cell_style = CellStyle()
+        cell_style.css.extend([_css_style("color", "black")])
+        style3 = DataFrame().style
+        style3.cols.add().styles.extend([cell_style])
+        data_frame_proto._concat_table_style(style1, style3)
+        self.assertEqual(0, len(style1.style_indices))
+        self.assertEqual(5, len(style1.cols[0].styles))
+        self.assertEqual(style1.cols[0].styles[2].css[0].value, "blue")
+        self.assertEqual(cell_style, style1.cols[0].styles[4])
+
     def test_get_data_frame(self):
         """Test streamlit.data_frame_proto._get_data_frame."""
         # Test delta not new_element or add_rows
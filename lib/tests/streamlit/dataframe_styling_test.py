@@ -165,7 +165,7 @@ class DataFrameStylingTest(unittest.TestCase):
 
     def _get_element(self):
         """Returns the most recent element in the DeltaGenerator queue"""
-        return self._report_queue._queue[-1].delta.new_element
+        return list(self._report_queue)[-1].delta.new_element
 
     def _assert_column_display_values(self, proto_df, col, display_values):
         """Asserts that cells in a column have the given display_values"""
@@ -189,14 +189,14 @@ def get_cell_style(proto_df, col, row):
     """Returns the CellStyle for the given cell, or an empty CellStyle
     if no style for the given cell exists
     """
-    if col >= len(proto_df.style.cols):
+    if col >= len(proto_df.style.style_indices):
         return CellStyle()
 
-    col_style = proto_df.style.cols[col]
-    if row >= len(col_style.styles):
+    style_indices = proto_df.style.style_indices[col]
+    if row >= len(style_indices.data):
         return CellStyle()
 
-    return col_style.styles[row]
+    return proto_df.style.unique_styles[style_indices.data[row]]
 
 
 def make_cssstyle_proto(property, value):
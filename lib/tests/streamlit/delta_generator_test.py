@@ -107,7 +107,9 @@ class FakeDeltaGenerator(object):
         """
         self._exception_msg = str(e)
 
-    def _enqueue_new_element_delta(self, marshall_element, delta_type, last_index):
+    def _enqueue_new_element_delta(
+        self, marshall_element, delta_type, last_index, memo_key=None
+    ):
         """Fake enqueue new element delta.
 
         The real DeltaGenerator method actually enqueues the deltas but
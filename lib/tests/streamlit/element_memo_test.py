@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""element_memo unit tests."""
+
+import unittest
+
+import pandas as pd
+from mock import patch
+
+import streamlit as st
+from streamlit import element_memo
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tests import testutil
+
+
+def _patch_memo_size(size_mb):
+    return patch(
+        "streamlit.element_memo.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"runner.maxElementMemoSize": size_mb}
+        ),
+    )
+
+
+def _create_msg(body):
+    msg = ForwardMsg()
+    msg.delta.new_element.text.body = body
+    return msg
+
+
+class ElementMemoTest(unittest.TestCase):
+    def tearDown(self):
+        element_memo.clear()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(element_memo.get_key("dataframe", ([1, 2],), {}))
+
+    def test_get_key(self):
+        """Keys are stable, and change with the element's inputs."""
+        with _patch_memo_size(1):
+            df = pd.DataFrame({"a": [1, 2, 3]})
+            key = element_memo.get_key("dataframe", (df,), {"width": 10})
+            self.assertEqual(
+                key, element_memo.get_key("dataframe", (df.copy(),), {"width": 10})
+            )
+
+            self.assertNotEqual(
+                key, element_memo.get_key("dataframe", (df,), {"width": 20})
+            )
+            self.assertNotEqual(key, element_memo.get_key("table", (df,), {}))
+
+            changed_df = df.copy()
+            changed_df.iloc[2, 0] = 4
+            self.assertNotEqual(
+                key, element_memo.get_key("dataframe", (changed_df,), {"width": 10})
+            )
+
+            renamed_df = df.rename(columns={"a": "b"})
+            self.assertNotEqual(
+                key, element_memo.get_key("dataframe", (renamed_df,), {"width": 10})
+            )
+
+    def test_not_memoizable(self):
+        with _patch_memo_size(1):
+            self.assertIsNone(element_memo.get_key("pyplot", (), {}))
+            self.assertIsNone(element_memo.get_key("json", (lambda: None,), {}))
+
+    def test_put_and_get(self):
+        with _patch_memo_size(1):
+            msg = _create_msg("hello")
+            element_memo.put("key", msg)
+
+            element_bytes, msg_hash = element_memo.get("key")
+            self.assertEqual(msg.delta.new_element.SerializeToString(), element_bytes)
+            self.assertEqual(msg.hash, msg_hash)
+            self.assertIsNone(element_memo.get("other_key"))
+
+    def test_eviction(self):
+        """The least recently used elements are evicted first."""
+        # Room for two elements.
+        with _patch_memo_size(2.5e-3):
+            element_memo.put("a", _create_msg("a" * 1000))
+            element_memo.put("b", _create_msg("b" * 1000))
+            element_memo.get("a")
+            element_memo.put("c", _create_msg("c" * 1000))
+
+            self.assertIsNotNone(element_memo.get("a"))
+            self.assertIsNone(element_memo.get("b"))
+            self.assertIsNotNone(element_memo.get("c"))
+
+            # Elements bigger than the memo are never memoized.
+            element_memo.put("d", _create_msg("d" * 3000))
+            self.assertIsNone(element_memo.get("d"))
+            self.assertIsNotNone(element_memo.get("c"))
+
+
+class DeltaGeneratorElementMemoTest(testutil.DeltaGeneratorTestCase):
+    def tearDown(self):
+        super(DeltaGeneratorElementMemoTest, self).tearDown()
+        element_memo.clear()
+
+    def test_memoized_element(self):
+        """An element that's displayed again isn't marshalled again."""
+        df = pd.DataFrame({"a": [1, 2, 3]})
+        with _patch_memo_size(1):
+            st.dataframe(df)
+            first_msg = self.get_message_from_queue()
+
+            with patch("streamlit.elements.data_frame_proto.marshall_data_frame") as p:
+                st.dataframe(df.copy())
+                p.assert_not_called()
+            second_msg = self.get_message_from_queue()
+
+        self.assertEqual(first_msg.delta, second_msg.delta)
+        self.assertEqual(first_msg.hash, second_msg.hash)
@@ -113,6 +113,7 @@ class MetricsTest(unittest.TestCase):
             config.set_option("global.metrics", False)
             client = streamlit.metrics.Client.get_current()
             client._metrics = {}
+            num_default_metrics = len(client._raw_metrics)
 
             # yapf: disable
             client._raw_metrics = [
@@ -132,8 +133,8 @@ class MetricsTest(unittest.TestCase):
             client.get("unittest_gauge").set(42)
             client.get("unittest_gauge").dec()
 
-            calls = [
-                call(),  # Constructor
+            # The constructor creates one metric per default metric.
+            calls = [call()] * num_default_metrics + [
                 call(),  # unittest_counter
                 call(),  # unittest_counter_labels
                 call(),  # unittest_gauge
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""script_cache unit tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from streamlit import magic
+from streamlit import script_cache
+
+
+class ScriptCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._script_path = os.path.join(self._dir, "script.py")
+        self._write_script("x = 1")
+
+    def tearDown(self):
+        script_cache.invalidate(self._script_path)
+        shutil.rmtree(self._dir)
+
+    def _write_script(self, contents):
+        with open(self._script_path, "w") as f:
+            f.write(contents)
+
+    def test_get_code(self):
+        """The script is only recompiled when it changes."""
+        with patch(
+            "streamlit.script_cache.magic.add_magic", side_effect=magic.add_magic
+        ) as add_magic:
+            code = script_cache.get_code(self._script_path)
+            self.assertIs(code, script_cache.get_code(self._script_path))
+            self.assertEqual(1, add_magic.call_count)
+
+            self._write_script("x = 2")
+            new_code = script_cache.get_code(self._script_path)
+            self.assertIsNot(code, new_code)
+            self.assertEqual(2, add_magic.call_count)
+
+            namespace = {}
+            exec(new_code, namespace)
+            self.assertEqual(2, namespace["x"])
+
+    def test_invalidate(self):
+        """Invalidated scripts are recompiled."""
+        code = script_cache.get_code(self._script_path)
+        script_cache.invalidate(self._script_path)
+        self.assertIsNot(code, script_cache.get_code(self._script_path))
+
+    def test_compile_error(self):
+        """Compile errors are raised every time, and aren't cached."""
+        self._write_script("because i am a compile error!")
+        with self.assertRaises(SyntaxError):
+            script_cache.get_code(self._script_path)
+        with self.assertRaises(SyntaxError):
+            script_cache.get_code(self._script_path)
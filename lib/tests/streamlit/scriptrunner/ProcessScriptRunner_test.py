@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests ProcessScriptRunner functionality"""
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from streamlit.ProcessScriptRunner import ProcessScriptRunner
+from streamlit.ProcessScriptRunner import ScriptWorkerPool
+from streamlit.ProcessScriptRunner import _drop_edited_modules
+from streamlit.Report import Report
+from streamlit.ScriptRequestQueue import RerunData
+from streamlit.ScriptRequestQueue import ScriptRequest
+from streamlit.ScriptRequestQueue import ScriptRequestQueue
+from streamlit.ScriptRunner import ScriptRunnerEvent
+from streamlit.proto.Widget_pb2 import WidgetStates
+from tests import testutil
+
+
+class ProcessScriptRunnerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Like bootstrap.run, start the workers on the main thread.
+        ScriptWorkerPool._singleton = None
+        ScriptWorkerPool.get_current()
+
+    @classmethod
+    def tearDownClass(cls):
+        ScriptWorkerPool._singleton = None
+
+    def test_run_script(self):
+        """Tests that we can run a script to completion in a worker."""
+        scriptrunner = TestProcessScriptRunner("good_script.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertEqual(["complete!"], scriptrunner.text_deltas())
+
+    def test_compile_error(self):
+        """Tests that compile errors are passed on from the worker."""
+        scriptrunner = TestProcessScriptRunner("compile_error.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertIsInstance(scriptrunner.exceptions[0], SyntaxError)
+
+    def test_stop_and_rerun(self):
+        """Tests that a script running in a worker can be stopped and
+        rerun, and that the worker is reused."""
+        scriptrunner = TestProcessScriptRunner("infinite_loop.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        time.sleep(0.5)
+        scriptrunner.enqueue_rerun()
+        time.sleep(0.5)
+        scriptrunner.request_queue.enqueue(ScriptRequest.SHUTDOWN)
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertEqual(["loop_forever"], scriptrunner.text_deltas())
+
+    def test_interrupt(self):
+        """Tests that a worker stops a script that doesn't call Streamlit,
+        if runner.asyncInterrupt is set."""
+        # Start workers that inherit the option.
+        saved_pool = ScriptWorkerPool._singleton
+        ScriptWorkerPool._singleton = None
+        try:
+            with patch(
+                "streamlit.ScriptRunner.config.get_option",
+                side_effect=testutil.build_mock_config_get_option(
+                    {"runner.asyncInterrupt": True}
+                ),
+            ):
+                ScriptWorkerPool.get_current()
+
+            scriptrunner = TestProcessScriptRunner("busy_loop.py")
+            scriptrunner.enqueue_rerun()
+            scriptrunner.start()
+
+            time.sleep(0.5)
+            scriptrunner.request_queue.enqueue(ScriptRequest.SHUTDOWN)
+            scriptrunner.join()
+        finally:
+            ScriptWorkerPool._singleton = saved_pool
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertEqual(["busy_loop"], scriptrunner.text_deltas())
+
+
+class ScriptWorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self._saved_pool = ScriptWorkerPool._singleton
+        ScriptWorkerPool._singleton = None
+
+    def tearDown(self):
+        ScriptWorkerPool._singleton = self._saved_pool
+
+    def test_get_current_from_threads(self):
+        """Tests that threads that get the pool at the same time share one
+        pool."""
+        pools = []
+
+        def get_pool():
+            pools.append(ScriptWorkerPool.get_current())
+
+        # Starting a worker process takes a while. (And these threads have
+        # no IOLoop.)
+        with patch(
+            "streamlit.ProcessScriptRunner._ScriptWorker",
+            side_effect=lambda: time.sleep(0.05),
+        ) as script_worker, patch("tornado.ioloop.IOLoop.current"):
+            threads = [threading.Thread(target=get_pool) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(4, len(pools))
+        self.assertEqual(1, len(set(id(pool) for pool in pools)))
+        self.assertEqual(1, script_worker.call_count)
+
+    @patch("streamlit.ProcessScriptRunner._ScriptWorker", side_effect=MagicMock)
+    def test_replace_dead_worker(self, _):
+        """Tests that a dead worker is replaced on the IOLoop's thread, not
+        the thread that releases it."""
+        pool = ScriptWorkerPool.get_current()
+        pool._ioloop = MagicMock()
+
+        worker = pool.acquire()
+        worker.is_alive.return_value = False
+        pool.release(worker)
+
+        self.assertEqual(0, len(pool._idle_workers))
+        pool._ioloop.add_callback.assert_called_once_with(pool._add_new_worker)
+
+        pool._add_new_worker()
+        new_worker = pool.acquire()
+        self.assertIsNot(worker, new_worker)
+
+
+class DropEditedModulesTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        sys.path.insert(0, self._dir)
+
+    def tearDown(self):
+        sys.path.remove(self._dir)
+        sys.modules.pop("edited_module", None)
+        sys.modules.pop("unedited_module", None)
+        shutil.rmtree(self._dir)
+
+    def test_drop_edited_modules(self):
+        """Tests that modules in the script's folder that were edited since
+        the last run are removed from sys.modules."""
+        since = time.time()
+        for name, mtime in [("edited_module", since + 1), ("unedited_module", 0)]:
+            filepath = os.path.join(self._dir, name + ".py")
+            with open(filepath, "w") as f:
+                f.write("VALUE = 1\n")
+            importlib.import_module(name)
+            os.utime(filepath, (mtime, mtime))
+
+        _drop_edited_modules(self._dir, since)
+
+        self.assertNotIn("edited_module", sys.modules)
+        self.assertIn("unedited_module", sys.modules)
+        self.assertIn("unittest", sys.modules)
+
+
+class TestProcessScriptRunner(ProcessScriptRunner):
+    """Subclasses ProcessScriptRunner to provide some testing features."""
+
+    def __init__(self, script_name):
+        self.report = Report(
+            os.path.join(os.path.dirname(__file__), "test_data", script_name),
+            "test command line",
+        )
+        self.request_queue = ScriptRequestQueue()
+
+        super(TestProcessScriptRunner, self).__init__(
+            report=self.report,
+            main_dg=None,
+            sidebar_dg=None,
+            widget_states=WidgetStates(),
+            request_queue=self.request_queue,
+        )
+
+        # Accumulates all ScriptRunnerEvents emitted by us, and the
+        # exceptions sent with them.
+        self.events = []
+        self.exceptions = []
+
+        def record_event(event, exception=None, **kwargs):
+            self.events.append(event)
+            if exception is not None:
+                self.exceptions.append(exception)
+
+            # Like ReportSession, clear the report when a run starts.
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                self.report.clear()
+
+        self.on_event.connect(record_event, weak=False)
+
+    def enqueue_rerun(self):
+        self.request_queue.enqueue(ScriptRequest.RERUN, RerunData(widget_state=None))
+
+    def join(self):
+        if self._request_thread is not None:
+            self._request_thread.join()
+
+    def text_deltas(self):
+        return [
+            msg.delta.new_element.text.body
+            for msg in self.report._queue
+            if msg.HasField("delta") and msg.delta.new_element.HasField("text")
+        ]
@@ -19,6 +19,8 @@ import os
 import time
 import unittest
 
+from mock import patch
+
 from streamlit.DeltaGenerator import DeltaGenerator
 from streamlit.Report import Report
 from streamlit.ReportQueue import ReportQueue
@@ -29,6 +31,7 @@ from streamlit.ScriptRunner import ScriptRunner
 from streamlit.ScriptRunner import ScriptRunnerEvent
 from streamlit.proto.BlockPath_pb2 import BlockPath
 from streamlit.proto.Widget_pb2 import WidgetStates
+from tests import testutil
 
 
 def _create_widget(id, states):
@@ -154,6 +157,101 @@ class ScriptRunnerTest(unittest.TestCase):
         )
         self._assert_text_deltas(scriptrunner, ["loop_forever"])
 
+    @patch(
+        "streamlit.ScriptRunner.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"runner.asyncInterrupt": True}
+        ),
+    )
+    def test_interrupt(self, _):
+        """Tests that we can stop and rerun a script that doesn't call
+        Streamlit."""
+        scriptrunner = TestScriptRunner("busy_loop.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        time.sleep(0.1)
+        scriptrunner.enqueue_rerun()
+        scriptrunner.interrupt()
+        time.sleep(0.1)
+        scriptrunner.enqueue_stop()
+        scriptrunner.interrupt()
+        scriptrunner.join()
+
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_events(
+            scriptrunner,
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self._assert_text_deltas(scriptrunner, ["busy_loop"])
+
+    @patch(
+        "streamlit.ScriptRunner.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"runner.asyncInterrupt": True}
+        ),
+    )
+    def test_interrupt_streamlit_call(self, _):
+        """Tests that a script isn't interrupted while it's inside a
+        Streamlit call."""
+        scriptrunner = TestScriptRunner("busy_loop.py")
+        scriptrunner.enqueue_delay_secs = 0.2
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        # Interrupt the script while it's enqueuing its text element.
+        time.sleep(0.1)
+        scriptrunner.enqueue_stop()
+        scriptrunner.interrupt()
+        scriptrunner.join()
+
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_events(
+            scriptrunner,
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self._assert_text_deltas(scriptrunner, ["busy_loop"])
+
+    @patch(
+        "streamlit.ScriptRunner.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"runner.asyncInterrupt": True}
+        ),
+    )
+    def test_interrupt_after_leaked_call_depth(self, _):
+        """Tests that a Streamlit call that wasn't counted out, e.g. because
+        an exception landed in _streamlit_call, doesn't outlive its run."""
+        scriptrunner = TestScriptRunner("busy_loop.py")
+        scriptrunner._streamlit_call_depth = 1
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        time.sleep(0.1)
+        scriptrunner.enqueue_stop()
+        scriptrunner.interrupt()
+        scriptrunner.join()
+
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_events(
+            scriptrunner,
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self.assertEqual(0, scriptrunner._streamlit_call_depth)
+
     def test_shutdown(self):
         """Test that we can shutdown while a script is running."""
         scriptrunner = TestScriptRunner("infinite_loop.py")
@@ -355,7 +453,11 @@ class TestScriptRunner(ScriptRunner):
         # DeltaGenerator deltas will be enqueued into self.report_queue.
         self.report_queue = ReportQueue()
 
+        # Set this to make every enqueue slow.
+        self.enqueue_delay_secs = 0
+
         def enqueue_fn(msg):
+            time.sleep(self.enqueue_delay_secs)
             self.report_queue.enqueue(msg)
             self.maybe_handle_execution_control_request()
             return True
@@ -422,7 +524,7 @@ class TestScriptRunner(ScriptRunner):
 
     def deltas(self):
         """Returns the delta messages in our ReportQueue"""
-        return [msg.delta for msg in self.report_queue._queue if msg.HasField("delta")]
+        return [msg.delta for msg in self.report_queue if msg.HasField("delta")]
 
     def get_widget_id(self, widget_type, label):
         """Returns the id of the widget with the specified type and label"""
@@ -90,7 +90,7 @@ class DeltaGeneratorTestCase(unittest.TestCase):
         -------
         ForwardMsg
         """
-        return self.report_queue._queue[index]
+        return list(self.report_queue)[index]
 
     def get_delta_from_queue(self, index=-1):
         """Get a Delta proto from the queue, by index.
@@ -99,4 +99,4 @@ class DeltaGeneratorTestCase(unittest.TestCase):
         -------
         Delta
         """
-        return self.report_queue._queue[index].delta
+        return self.get_message_from_queue(index).delta
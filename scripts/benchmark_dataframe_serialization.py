@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks marshalling DataFrames as protobufs vs. Arrow IPC streams.
+
+For tall and wide frames of numbers, and frames of strings, categories and
+datetimes, prints the time to marshall and serialize the DataFrame proto each way (see
+global.dataFrameSerialization), and the size of the result.
+
+Usage: python scripts/benchmark_dataframe_serialization.py [--scale 1.0]
+"""
+
+import timeit
+
+import click
+import numpy as np
+import pandas as pd
+
+import streamlit.elements.arrow_data_frame as arrow_data_frame
+import streamlit.elements.data_frame_proto as data_frame_proto
+from streamlit.proto.DataFrame_pb2 import DataFrame
+
+# Number of times each frame is marshalled per measurement.
+NUM_ITERATIONS = 3
+
+
+def _build_frames(scale):
+    """Return a dict of frame name -> pandas.DataFrame."""
+
+    def numbers(rows, cols):
+        return pd.DataFrame(
+            np.random.randn(int(rows * scale), cols),
+            columns=["c%d" % i for i in range(cols)],
+        )
+
+    rows = int(200000 * scale)
+    words = np.array(["alpha", "beta", "gamma", "delta", "epsilon"])
+    mixed = pd.DataFrame(
+        {
+            "floats": np.random.randn(rows),
+            "ints": np.random.randint(0, 1000000, rows),
+            "strings": words[np.random.randint(0, len(words), rows)].astype(object),
+            "dates": pd.date_range("2019-01-01", periods=rows, freq="s", tz="UTC"),
+        }
+    )
+    # DataFrame protos don't support categories, so this is Arrow only.
+    categories = pd.DataFrame({"categories": pd.Categorical(mixed["strings"])})
+
+    return {
+        "tall": numbers(1000000, 5),
+        "wide": numbers(1000, 1000),
+        "mixed": mixed,
+        "category": categories,
+    }
+
+
+def _marshall_legacy(df):
+    proto_df = DataFrame()
+    data_frame_proto.marshall_data_frame(df, proto_df)
+    return proto_df.SerializeToString()
+
+
+def _marshall_arrow(df):
+    proto_df = DataFrame()
+    arrow_data_frame.marshall(df, proto_df)
+    return proto_df.SerializeToString()
+
+
+@click.command()
+@click.option("--scale", default=1.0, help="Multiplies the number of rows.")
+def main(scale):
+    frames = _build_frames(scale)
+
+    click.echo(
+        "%-8s %-8s %12s %10s %10s" % ("frame", "format", "bytes", "secs", "MB/s")
+    )
+
+    for name, df in frames.items():
+        for fmt, marshall in (("proto", _marshall_legacy), ("arrow", _marshall_arrow)):
+            try:
+                size = len(marshall(df))
+            except NotImplementedError:
+                click.echo("%-8s %-8s %12s" % (name, fmt, "unsupported"))
+                continue
+            secs = timeit.timeit(lambda: marshall(df), number=NUM_ITERATIONS)
+            secs /= NUM_ITERATIONS
+            click.echo(
+                "%-8s %-8s %12s %10.3f %10.1f"
+                % (name, fmt, size, secs, size / secs / 1e6)
+            )
+
+
+if __name__ == "__main__":
+    main()
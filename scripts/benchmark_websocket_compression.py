@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2018-2019 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks WebSocket permessage-deflate compression on typical reports.
+
+For each compression level, prints the compression ratio and the throughput
+(i.e. the CPU cost) of compressing a report's serialized ForwardMsgs the way
+Tornado does when server.websocketCompression is enabled.
+
+Usage: python scripts/benchmark_websocket_compression.py [--mem-level 8]
+"""
+
+import timeit
+import zlib
+
+import click
+import numpy as np
+import pandas as pd
+
+from streamlit.DeltaGenerator import DeltaGenerator
+from streamlit.proto.BlockPath_pb2 import BlockPath
+from streamlit.server.server_util import serialize_forward_msg
+
+# Number of times each report is compressed per measurement.
+NUM_ITERATIONS = 5
+
+
+def _build_reports():
+    """Return a dict of report name -> list of serialized ForwardMsgs."""
+    df = pd.DataFrame(np.random.randn(2000, 5), columns=list("abcde"))
+    spec = {
+        "mark": "line",
+        "encoding": {
+            "x": {"field": "a", "type": "quantitative"},
+            "y": {"field": "b", "type": "quantitative"},
+        },
+    }
+
+    def build(fn):
+        msgs = []
+
+        def enqueue(msg):
+            msgs.append(msg)
+            return True
+
+        fn(DeltaGenerator(enqueue, container=BlockPath.MAIN))
+        return [serialize_forward_msg(msg) for msg in msgs]
+
+    return {
+        "text": build(
+            lambda dg: [dg.markdown("Some *text* %s" % i) for i in range(200)]
+        ),
+        "dataframe": build(lambda dg: dg.dataframe(df)),
+        "line_chart": build(lambda dg: dg.line_chart(df)),
+        "vega_lite": build(lambda dg: dg.vega_lite_chart(df, spec)),
+        "json": build(
+            lambda dg: dg.json({"k%s" % i: list(range(20)) for i in range(200)})
+        ),
+    }
+
+
+def _compress_all(payloads, level, mem_level):
+    # Tornado uses a raw deflate stream with context takeover.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, mem_level)
+    total = 0
+    for payload in payloads:
+        total += len(compressor.compress(payload))
+        total += len(compressor.flush(zlib.Z_SYNC_FLUSH))
+    return total
+
+
+@click.command()
+@click.option("--mem-level", default=8, help="zlib memory level (1-9).")
+def main(mem_level):
+    reports = _build_reports()
+
+    click.echo(
+        "%-12s %6s %12s %12s %8s %10s"
+        % ("report", "level", "raw bytes", "wire bytes", "ratio", "MB/s")
+    )
+
+    for name, payloads in reports.items():
+        raw_size = sum(len(p) for p in payloads)
+        for level in (1, 3, 6, 9):
+            wire_size = _compress_all(payloads, level, mem_level)
+            secs = timeit.timeit(
+                lambda: _compress_all(payloads, level, mem_level), number=NUM_ITERATIONS
+            )
+            throughput = raw_size * NUM_ITERATIONS / secs / 1e6
+            click.echo(
+                "%-12s %6s %12s %12s %8.1f %10.1f"
+                % (
+                    name,
+                    level,
+                    raw_size,
+                    wire_size,
+                    float(raw_size) / wire_size,
+                    throughput,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()